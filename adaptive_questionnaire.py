@@ -0,0 +1,186 @@
+"""Adaptive question order with early stopping.
+
+Items are asked breadth-first: the first item of every trait, then the
+second, and so on, keeping the catalog order within a trait. Before each
+item the session bounds the trait's final raw score by assuming every
+remaining item of that trait is answered MIN_ANSWER or MAX_ANSWER. If
+both bounds fall in the same dominant/strong/moderate category, no answer
+can change it and the trait's remaining items are skipped. Skipped items
+are imputed with the rounded mean of the trait's answered items, which
+keeps the imputed score inside the bounds and so inside the settled
+category.
+
+How much this saves depends on the catalog. With two 1-5 items per trait
+and cut-offs every two raw points, the four-point spread left after one
+answer always crosses a cut-off, so nothing is skipped there. The replay
+reports this per trait:
+
+    python adaptive_questionnaire.py responses.csv
+    python adaptive_questionnaire.py --random 10000
+"""
+import argparse
+import os
+
+import numpy as np
+
+from character_scoring import (CATEGORY_NAMES, MAX_ANSWER, MIN_ANSWER, ScoringEngine,
+                               categorize, load_response_matrix)
+
+
+def adaptive_order(engine):
+    # Question indices, breadth-first over traits
+    items = [[] for _ in engine.traits]
+    for q, (_, trait) in enumerate(engine.questions):
+        items[engine.trait_index[trait]].append(q)
+    order = []
+    for depth in range(max(len(qs) for qs in items)):
+        order.extend(qs[depth] for qs in items if depth < len(qs))
+    return order
+
+
+class AdaptiveSession:
+    def __init__(self, engine=None):
+        self.engine = engine or ScoringEngine()
+        self.order = adaptive_order(self.engine)
+        self.position = 0
+        self.answers = {}
+        n_traits = len(self.engine.traits)
+        self.raw = [0] * n_traits
+        self.answered = [0] * n_traits
+        self.remaining = [0] * n_traits
+        for _, trait in self.engine.questions:
+            self.remaining[self.engine.trait_index[trait]] += 1
+
+    def _trait(self, question):
+        return self.engine.trait_index[self.engine.questions[question][1]]
+
+    def settled(self, trait):
+        # True once no remaining answer can move the trait to another category
+        low = self.raw[trait] + self.remaining[trait] * MIN_ANSWER
+        high = self.raw[trait] + self.remaining[trait] * MAX_ANSWER
+        low_category, high_category = categorize(np.array([low, high]) / self.engine.max_score)
+        return low_category == high_category
+
+    def next_question(self):
+        # Index into engine.questions of the next item to ask, or None when done
+        while self.position < len(self.order):
+            question = self.order[self.position]
+            if not self.settled(self._trait(question)):
+                return question
+            self.position += 1
+        return None
+
+    def record(self, question, answer):
+        if question != self.next_question():
+            raise ValueError(f"Question {question} is not the one being asked")
+        trait = self._trait(question)
+        self.answers[question] = answer
+        self.raw[trait] += answer
+        self.answered[trait] += 1
+        self.remaining[trait] -= 1
+        self.position += 1
+
+    @property
+    def finished(self):
+        return self.next_question() is None
+
+    @property
+    def asked(self):
+        return len(self.answers)
+
+    @property
+    def pending(self):
+        # Items still to be asked if none of them gets skipped
+        return sum(1 for q in self.order[self.position:] if not self.settled(self._trait(q)))
+
+    def answer_row(self):
+        # Answers to every question in catalog order, skipped ones imputed
+        row = []
+        for q, (_, trait) in enumerate(self.engine.questions):
+            if q in self.answers:
+                row.append(self.answers[q])
+            else:
+                j = self.engine.trait_index[trait]
+                mean = self.raw[j] / self.answered[j] if self.answered[j] else \
+                    (MIN_ANSWER + MAX_ANSWER) / 2
+                row.append(int(round(mean)))
+        return row
+
+    def responses(self):
+        # {trait: raw score} as kept by the Tk app, skipped items imputed
+        raw = self.engine.raw_scores(self.answer_row())[0]
+        return dict(zip(self.engine.traits, raw.tolist()))
+
+
+def replay(engine, answers):
+    # Runs the adaptive flow over recorded full-length answers. Returns the
+    # N x T number of items asked per trait and the N x Q imputed answers.
+    answers = engine.validate(answers)
+    asked = np.zeros((len(answers), len(engine.traits)), dtype=np.int32)
+    imputed = answers.copy()
+    for j, trait in enumerate(engine.traits):
+        # The settled test only looks at the trait's own items, so the
+        # breadth-first interleaving does not change what gets skipped
+        items = [q for q, (_, t) in enumerate(engine.questions) if t == trait]
+        raw = np.zeros(len(answers), dtype=np.int32)
+        active = np.ones(len(answers), dtype=bool)
+        for k, q in enumerate(items):
+            remaining = len(items) - k
+            low = categorize((raw + remaining * MIN_ANSWER) / engine.max_score)
+            high = categorize((raw + remaining * MAX_ANSWER) / engine.max_score)
+            # Bounds only narrow, so a settled trait stays settled
+            active &= low != high
+            raw += np.where(active, answers[:, q], 0)
+            asked[:, j] += active
+        for k, q in enumerate(items):
+            skipped = asked[:, j] <= k
+            mean = np.where(asked[:, j] > 0, raw / np.maximum(asked[:, j], 1),
+                            (MIN_ANSWER + MAX_ANSWER) / 2)
+            imputed[skipped, q] = np.rint(mean[skipped]).astype(imputed.dtype)
+    return asked, imputed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded answers through the adaptive "
+                                                 "questionnaire and report questions saved")
+    parser.add_argument('responses', nargs='?',
+                        help="N x Q answer matrix (.csv or .npy) or a respondent store directory")
+    parser.add_argument('--random', type=int, metavar='N',
+                        help="Replay N uniformly random respondents instead")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if (args.responses is None) == (args.random is None):
+        parser.error("give either a responses file or --random N")
+
+    engine = ScoringEngine()
+    try:
+        if args.random is not None:
+            rng = np.random.default_rng(args.seed)
+            answers = rng.integers(MIN_ANSWER, MAX_ANSWER + 1, size=(args.random, engine.n_questions))
+        elif os.path.isdir(args.responses):
+            from respondent_store import RespondentStore
+            answers = np.asarray(RespondentStore(args.responses, engine).answers)
+        else:
+            answers = load_response_matrix(args.responses)
+        asked, imputed = replay(engine, answers)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if not len(answers):
+        parser.error("no respondents to replay")
+
+    full = engine.score(answers).categories
+    adaptive = engine.score(imputed).categories
+    saved = engine.n_questions - asked.sum(axis=1)
+    print(f"{len(answers)} respondents, {engine.n_questions} questions: "
+          f"{saved.mean():.2f} saved on average ({saved.mean() / engine.n_questions:.1%}), "
+          f"max {saved.max()}, category agreement {np.mean(full == adaptive):.1%}")
+    per_trait = engine.item_counts
+    for j, trait in enumerate(engine.traits):
+        skipped = per_trait[j] - asked[:, j]
+        counts = np.bincount(full[:, j], minlength=len(CATEGORY_NAMES)) / len(answers)
+        mix = ' '.join(f"{name} {share:.0%}" for name, share in zip(CATEGORY_NAMES, counts))
+        print(f"  {trait:<16} {skipped.mean():.2f} of {per_trait[j]} skipped   ({mix})")
+
+
+if __name__ == "__main__":
+    main()
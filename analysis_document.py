@@ -0,0 +1,253 @@
+"""Structured profile analysis shared by every output.
+
+The analysis is built once per profile as a document of sections, each a
+list of (text, tag) runs using the Text widget tag names configured in
+create_analysis_tab. The same document fills the Tk Text widget in a
+single insert call and renders to plain text or JSON without being rebuilt.
+"""
+from collections import namedtuple
+
+Section = namedtuple('Section', 'name runs')
+
+
+class AnalysisDocument:
+    def __init__(self):
+        self.sections = []
+
+    def section(self, name):
+        self.sections.append(Section(name, []))
+
+    def add(self, text, tag):
+        if not self.sections:
+            self.section('body')
+        self.sections[-1].runs.append((text, tag))
+
+    @property
+    def runs(self):
+        return [run for section in self.sections for run in section.runs]
+
+    def insert_into(self, text_widget, index='end'):
+        # Text.insert accepts any number of text/tag pairs, so the whole
+        # document goes in with one Tcl call
+        args = []
+        for text, tag in self.runs:
+            args.extend((text, tag))
+        if args:
+            text_widget.insert(index, *args)
+
+    def plain_text(self):
+        return ''.join(text for text, _ in self.runs)
+
+    def to_dict(self):
+        return {'sections': [{'name': section.name,
+                              'runs': [{'text': text, 'tag': tag} for text, tag in section.runs]}
+                             for section in self.sections]}
+
+
+def build_analysis(profile, trait_info):
+    # profile is a character_scoring.TraitProfile; its dominant/strong/
+    # moderate lists are already sorted strongest first
+    dominant_traits = profile.dominant
+    strong_traits = profile.strong
+    moderate_traits = profile.moderate
+    
+    doc = AnalysisDocument()
+    
+    # Title
+    doc.section('title')
+    doc.add('CHARACTER PROFILE ANALYSIS\n', 'title')
+    doc.add('━' * 80 + '\n\n', 'separator')
+    
+    # Scientific Foundation
+    doc.section('foundation')
+    doc.add('📚 SCIENTIFIC FOUNDATION\n', 'section')
+    doc.add('This assessment is grounded in established psychological research:\n\n', 'body')
+    
+    doc.add('▸ Integrated Research Frameworks:\n', 'subsection')
+    frameworks = [
+        ('The Big Five personality model', 'Costa & McCrae, 1992'),
+        ('VIA Character Strengths framework', 'Peterson & Seligman, 2004'),
+        ('Emotional Intelligence research', 'Goleman, 1995; Salovey & Mayer, 1990'),
+        ('Self-Determination Theory', 'Deci & Ryan, 2000')
+    ]
+    for framework, citation in frameworks:
+        doc.add(f'   • {framework} ', 'body')
+        doc.add(f'({citation})\n', 'reference')
+    
+    doc.add('\n▸ Trait Categories:\n', 'subsection')
+    categories = [
+        ('Cognitive traits', 'analytical, creative, wise - linked to intelligence research'),
+        ('Emotional traits', 'empathetic, compassionate - from emotional intelligence studies'),
+        ('Volitional traits', 'strong-willed, decisive - from motivation psychology'),
+        ('Social traits', 'loyal, humble - from interpersonal psychology research')
+    ]
+    for category, description in categories:
+        doc.add(f'   • {category}: ', 'highlight')
+        doc.add(f'{description}\n', 'body')
+    
+    doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+    
+    # Profile Overview
+    doc.section('overview')
+    doc.add('👤 YOUR PROFILE OVERVIEW\n', 'section')
+    doc.add('Your character profile reveals a unique combination of:\n\n', 'body')
+    
+    # Create visual boxes for trait counts
+    doc.add(f'   ⭐ {len(dominant_traits)} ', 'highlight')
+    doc.add('DOMINANT TRAITS ', 'subsection')
+    doc.add('(70-100% strength)\n', 'body')
+    doc.add('      Your core identity traits that define your primary characteristics\n\n', 'body')
+    
+    doc.add(f'   💪 {len(strong_traits)} ', 'highlight')
+    doc.add('STRONG TRAITS ', 'subsection')
+    doc.add('(50-69% strength)\n', 'body')
+    doc.add('      Important secondary traits that significantly influence your behavior\n\n', 'body')
+    
+    doc.add(f'   ✓ {len(moderate_traits)} ', 'highlight')
+    doc.add('MODERATE TRAITS ', 'subsection')
+    doc.add('(30-49% strength)\n', 'body')
+    doc.add('      Supporting traits that add nuance to your personality\n', 'body')
+    
+    doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+    
+    # Dominant Traits
+    if dominant_traits:
+        doc.section('dominant')
+        doc.add('⭐ DOMINANT TRAITS (Core Identity)\n', 'section')
+        doc.add('These shapes appear largest in your visualization:\n\n', 'body')
+        
+        for trait, score in dominant_traits:
+            trait_name = trait.replace('_', ' ').title()
+            shape = trait_info[trait]['shape'].title()
+            color = trait_info[trait]['color']
+            
+            # Create visual box for each trait
+            doc.add(f'\n◆ {trait_name} ', 'trait_name')
+            doc.add(f'— {score*100:.0f}% Strength\n', 'highlight')
+            
+            # Trait details in a box
+            doc.add(f'Shape: {shape} | Color: {color.title()}\n', 'box_header')
+            doc.add(f'Definition: {trait_info[trait]["description"]}\n', 'box_content')
+            doc.add('Impact: This trait strongly defines how you interact with the world.\n', 'box_content')
+            doc.add('\n', 'body')
+    
+    # Strong Traits
+    if strong_traits:
+        doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+        doc.section('strong')
+        doc.add('💪 STRONG TRAITS (Important Characteristics)\n', 'section')
+        doc.add('These medium-sized shapes represent significant aspects:\n\n', 'body')
+        
+        for trait, score in strong_traits:
+            trait_name = trait.replace('_', ' ').title()
+            shape = trait_info[trait]['shape'].title()
+            
+            doc.add(f'◇ {trait_name} ', 'trait_name')
+            doc.add(f'({score*100:.0f}% strength) - {shape}\n', 'body')
+            doc.add(f'   {trait_info[trait]["description"]}\n\n', 'body')
+    
+    doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+    
+    # Visualization Interpretation
+    doc.section('interpretation')
+    doc.add('🎨 VISUALIZATION INTERPRETATION\n', 'section')
+    doc.add('Understanding your geometric profile:\n\n', 'body')
+    
+    interpretations = [
+        ('SIZE', 'Larger shapes indicate stronger traits (Gestalt visual hierarchy)'),
+        ('OPACITY', 'More solid shapes represent more dominant characteristics'),
+        ('COLOR', 'Each color chosen based on color psychology research (Elliot & Maier, 2014)'),
+        ('POSITION', 'Shapes arranged in a modified Fibonacci spiral pattern')
+    ]
+    for aspect, explanation in interpretations:
+        doc.add(f'▸ {aspect}: ', 'subsection')
+        doc.add(f'{explanation}\n', 'body')
+    
+    doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+    
+    # Spatial Arrangement
+    doc.section('spatial')
+    doc.add('🌀 SPATIAL ARRANGEMENT LOGIC\n', 'section')
+    doc.add('The positioning follows visual perception principles:\n\n', 'body')
+    
+    spatial_points = [
+        ('Fibonacci Spiral', 'Based on the golden ratio found throughout nature'),
+        ('Hierarchical Center', 'Strongest traits closer to center (attention theory)'),
+        ('72° Distribution', 'Shapes spread evenly to avoid visual clustering'),
+        ('Progressive Radius', 'Each trait placed 0.5 units further from center'),
+        ('Personality Mandala', 'Creates a balanced, holistic representation')
+    ]
+    for point, explanation in spatial_points:
+        doc.add(f'◆ {point}: ', 'subsection')
+        doc.add(f'{explanation}\n', 'body')
+    
+    doc.add('\nThis arrangement symbolizes:\n', 'body')
+    doc.add('• Core traits influence peripheral traits\n', 'bullet')
+    doc.add('• The expanding pattern represents growth potential\n', 'bullet')
+    doc.add('• No trait exists in isolation - all are interconnected\n', 'bullet')
+    
+    doc.add('\n' + '─' * 80 + '\n\n', 'separator')
+    
+    # Personal Insights
+    doc.section('insights')
+    doc.add('💡 PERSONAL INSIGHTS\n', 'section')
+    doc.add('Based on personality psychology research:\n\n', 'body')
+    
+    if dominant_traits:
+        if any(t in ['compassionate', 'empathetic', 'peaceful'] for t, _ in dominant_traits):
+            doc.add('▸ Emotional Intelligence Profile:\n', 'subsection')
+            doc.add('   High interpersonal orientation ', 'body')
+            doc.add('(Goleman, 1995)\n', 'reference')
+            doc.add('• Strong capacity for understanding relationships\n', 'bullet')
+            doc.add('• Natural prosocial behavior tendency\n\n', 'bullet')
+            
+        if any(t in ['analytical', 'organized', 'decisive'] for t, _ in dominant_traits):
+            doc.add('▸ Systematic Processing Style:\n', 'subsection')
+            doc.add('   Executive function strengths ', 'body')
+            doc.add('(Stanovich & West, 2000)\n', 'reference')
+            doc.add('• Structured problem-solving preference\n', 'bullet')
+            doc.add('• High conscientiousness (Big Five)\n\n', 'bullet')
+            
+        if any(t in ['creative', 'intuitive', 'playful'] for t, _ in dominant_traits):
+            doc.add('▸ Openness to Experience:\n', 'subsection')
+            doc.add('   Divergent thinking abilities ', 'body')
+            doc.add('(McCrae & Costa, 1997)\n', 'reference')
+            doc.add('• Enhanced innovation capacity\n', 'bullet')
+            doc.add('• Cognitive flexibility\n\n', 'bullet')
+            
+        if any(t in ['ambitious', 'strong_willed', 'confident'] for t, _ in dominant_traits):
+            doc.add('▸ Achievement Orientation:\n', 'subsection')
+            doc.add('   High self-efficacy ', 'body')
+            doc.add('(Bandura, 1997)\n', 'reference')
+            doc.add('• Strong internal locus of control\n', 'bullet')
+            doc.add('• Leadership potential\n\n', 'bullet')
+    
+    doc.add('\n' + '━' * 80 + '\n\n', 'separator')
+    
+    # References
+    doc.section('references')
+    doc.add('📖 KEY REFERENCES\n', 'section')
+    references = [
+        'Arnheim, R. (1974). Art and visual perception.',
+        'Bandura, A. (1997). Self-efficacy: The exercise of control.',
+        'Costa, P. T., & McCrae, R. R. (1992). NEO-PI-R professional manual.',
+        'Deci, E. L., & Ryan, R. M. (2000). Self-determination theory.',
+        'Elliot, A. J., & Maier, M. A. (2014). Color psychology.',
+        'Goleman, D. (1995). Emotional intelligence.',
+        'Jung, C. G. (1964). Man and his symbols.',
+        'Peterson, C., & Seligman, M. E. (2004). Character strengths and virtues.',
+        'Salovey, P., & Mayer, J. D. (1990). Emotional intelligence framework.',
+        'Stanovich, K. E., & West, R. F. (2000). Individual differences in reasoning.'
+    ]
+    for ref in references:
+        doc.add(f'• {ref}\n', 'reference')
+    
+    doc.add('\n' + '━' * 80 + '\n\n', 'separator')
+    
+    # Footer
+    doc.section('footer')
+    doc.add('✨ Remember: ', 'highlight')
+    doc.add('This visualization represents your self-perception at this moment. ', 'body')
+    doc.add('Character traits can develop and change over time with conscious effort and life experiences.', 'body')
+    
+    return doc
@@ -0,0 +1,151 @@
+"""Render one character visualization per respondent for a whole cohort.
+
+Uses the Agg backend and a process pool whose workers import matplotlib
+once and reuse a single figure/axes for every job. Respondents with the
+same score vector get the same image, so each worker keeps a render cache
+(optionally backed by a shared --cache-dir) and only renders new vectors.
+
+    python batch_render.py responses.csv -o renders --workers 8
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from character_scoring import ScoringEngine, load_response_matrix
+from render_cache import RenderCache
+
+DEFAULT_NAME_TEMPLATE = 'character_{index:05d}.{ext}'
+DEFAULT_DPI = 100
+
+# Crops every profile image, so like the figure size it is part of the
+# cache key
+BBOX_INCHES = 'tight'
+
+# Per-process state, created once by init_worker
+_worker = {}
+
+
+def init_worker(dpi, cache_dir=None):
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from character_drawing import PROFILE_FIGSIZE
+
+    fig = Figure(figsize=PROFILE_FIGSIZE)
+    FigureCanvasAgg(fig)
+    _worker['fig'] = fig
+    _worker['ax'] = fig.add_subplot()
+    _worker['engine'] = ScoringEngine()
+    _worker['dpi'] = dpi
+    _worker['cache'] = RenderCache(cache_dir)
+
+    # Warm font and glyph caches so the first real job is not an outlier
+    _render([0] * len(_worker['engine'].traits), io.BytesIO(), 'png')
+
+
+def _render(raw, target, fmt):
+    from character_drawing import draw_profile
+    from trait_catalog import TRAIT_INFO
+
+    fig, ax = _worker['fig'], _worker['ax']
+    ax.clear()
+    profile = _worker['engine'].score_raw([raw]).profile(0)
+    draw_profile(ax, TRAIT_INFO, profile.sorted_traits)
+    fig.savefig(target, format=fmt, dpi=_worker['dpi'], bbox_inches=BBOX_INCHES)
+
+
+def render_params(fmt, dpi):
+    # Everything besides the scores that shapes a matplotlib render, as
+    # RenderCache.key parameters
+    from character_drawing import PROFILE_FIGSIZE
+    return {'format': fmt, 'dpi': dpi, 'figsize': PROFILE_FIGSIZE, 'bbox': BBOX_INCHES,
+            'renderer': 'matplotlib'}
+
+
+def render_job(job):
+    # Returns where the image came from: 'memory', 'disk' or 'render'
+    index, raw, path, fmt = job
+    start = time.perf_counter()
+    cache = _worker['cache']
+    key = cache.key(raw, **render_params(fmt, _worker['dpi']))
+    data, source = cache.get_or_render(key, lambda: render_bytes((raw, fmt)))
+    with open(path, 'wb') as f:
+        f.write(data)
+    return index, path, time.perf_counter() - start, source
+
+
+def render_bytes(job):
+    raw, fmt = job
+    buffer = io.BytesIO()
+    _render(raw, buffer, fmt)
+    return buffer.getvalue()
+
+
+def render_cohort(answers, out_dir, workers=None, dpi=DEFAULT_DPI,
+                  name_template=DEFAULT_NAME_TEMPLATE, fmt='png', cache_dir=None):
+    engine = ScoringEngine()
+    raw = engine.raw_scores(answers)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+
+    jobs = [(i, raw[i].tolist(), os.path.join(out_dir, name_template.format(index=i, ext=fmt)), fmt)
+            for i in range(len(raw))]
+    # Large chunks amortize IPC, but keep enough of them to balance the pool
+    chunksize = max(1, len(jobs) // (workers * 8))
+
+    start = time.perf_counter()
+    render_seconds = 0.0
+    paths = []
+    sources = {'memory': 0, 'disk': 0, 'render': 0}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(dpi, cache_dir)) as pool:
+        for index, path, seconds, source in pool.map(render_job, jobs, chunksize=chunksize):
+            paths.append(path)
+            render_seconds += seconds
+            sources[source] += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        'images': len(paths),
+        'workers': workers,
+        'seconds': elapsed,
+        'images_per_second': len(paths) / elapsed if elapsed else 0.0,
+        'mean_render_ms': render_seconds / len(paths) * 1000 if paths else 0.0,
+        'rendered': sources['render'],
+        'cache_hits': sources['memory'] + sources['disk'],
+        'paths': paths,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render character visualizations for a cohort")
+    parser.add_argument('responses', help="N x Q answer matrix as .csv or .npy")
+    parser.add_argument('-o', '--output-dir', default='renders')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--name-template', default=DEFAULT_NAME_TEMPLATE,
+                        help="Output file name; {index} and {ext} are substituted")
+    parser.add_argument('--cache-dir', help="Keep rendered images here and reuse them across runs")
+    args = parser.parse_args(argv)
+
+    try:
+        answers = load_response_matrix(args.responses)
+        stats = render_cohort(answers, args.output_dir, args.workers, args.dpi,
+                              args.name_template, args.format, args.cache_dir)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(str(e))
+
+    print(f"Rendered {stats['images']} images with {stats['workers']} workers in "
+          f"{stats['seconds']:.2f} s ({stats['images_per_second']:.1f} images/s, "
+          f"{stats['mean_render_ms']:.1f} ms per image, {stats['cache_hits']} from cache)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,362 @@
+"""Reproducible, headless benchmarks for the scoring and rendering paths.
+
+Runs on the Agg backend with fixed random seeds, writes JSON results and
+compares them against a stored baseline; any case whose median is slower
+than the baseline by more than the threshold is reported as a regression
+and makes the run exit non-zero.
+
+    python benchmarks.py                      # run and compare
+    python benchmarks.py -k draw_shape        # only matching cases
+    python benchmarks.py --update-baseline    # record a new baseline
+
+Baselines are machine specific; record them on the machine that runs the
+comparison.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from analysis_document import build_analysis
+from character_drawing import PROFILE_FIGSIZE, draw_profile, draw_shape
+from character_scoring import ScoringEngine
+from legend_cache import render_legend_tile
+from shape_geometry import SHAPES
+from shape_layout import packed_layout, spiral_layout
+from similarity_index import BruteForceIndex, build_index
+from svg_writer import profile_svg
+from thumbnails import encode_png, render_profile
+from trait_catalog import TRAIT_INFO, QUESTIONS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_THRESHOLD = 1.25
+SEED = 1234
+
+# name -> factory returning the callable to time, or (callable, reset) where
+# reset runs untimed after every repeat
+BENCHMARKS = {}
+
+
+def benchmark(name, repeat=20):
+    def register(factory):
+        BENCHMARKS[name] = (factory, repeat)
+        return factory
+    return register
+
+
+def _answers(n):
+    return np.random.default_rng(SEED).integers(1, 6, size=(n, len(QUESTIONS)))
+
+
+def _profile():
+    return ScoringEngine().score(_answers(1)).profile(0)
+
+
+def _profile_figure():
+    fig = Figure(figsize=PROFILE_FIGSIZE)
+    FigureCanvasAgg(fig)
+    draw_profile(fig.add_subplot(), TRAIT_INFO, _profile().sorted_traits)
+    return fig
+
+
+class DummyTextSink:
+    # Stands in for the Tk Text widget
+    def __init__(self):
+        self.chars = 0
+
+    def insert(self, index, *args):
+        self.chars += sum(len(text) for text in args[::2])
+
+
+@benchmark('scoring/single_respondent', repeat=200)
+def bench_score_single():
+    engine = ScoringEngine()
+    answers = _answers(1)[0]
+    responses = {trait: 0 for trait in TRAIT_INFO}
+    for (_, trait), answer in zip(QUESTIONS, answers):
+        responses[trait] += int(answer)
+    return lambda: engine.score_responses(responses).profile(0)
+
+
+@benchmark('scoring/cohort_10k', repeat=20)
+def bench_score_cohort():
+    engine = ScoringEngine()
+    answers = _answers(10000)
+    return lambda: engine.score(answers)
+
+
+def _register_draw_shape_cases():
+    for info in TRAIT_INFO.values():
+        shape = info['shape']
+
+        def factory(shape=shape, color=info['color']):
+            fig = Figure()
+            ax = fig.add_subplot()
+            return (lambda: draw_shape(ax, shape, 0, 0, 0.8, color), ax.cla)
+
+        benchmark(f'draw_shape/{shape}', repeat=100)(factory)
+
+
+_register_draw_shape_cases()
+
+
+@benchmark('create_visualization/end_to_end', repeat=10)
+def bench_create_visualization():
+    profile = _profile()
+
+    def run():
+        fig = Figure(figsize=PROFILE_FIGSIZE)
+        FigureCanvasAgg(fig)
+        draw_profile(fig.add_subplot(), TRAIT_INFO, profile.sorted_traits)
+        fig.canvas.draw()
+    return run
+
+
+@benchmark('legend/tile_render', repeat=10)
+def bench_legend_tile():
+    trait, info = next(iter(TRAIT_INFO.items()))
+    return lambda: render_legend_tile(trait, info, io.BytesIO())
+
+
+@benchmark('analysis/insert_formatted_analysis', repeat=200)
+def bench_analysis():
+    profile = _profile()
+    return lambda: build_analysis(profile, TRAIT_INFO).insert_into(DummyTextSink())
+
+
+def _register_save_cases():
+    for dpi in (72, 150, 300):
+        def factory(dpi=dpi):
+            fig = _profile_figure()
+            return lambda: fig.savefig(io.BytesIO(), format='png', dpi=dpi, bbox_inches='tight')
+
+        benchmark(f'save_visualization/png_{dpi}dpi', repeat=5)(factory)
+
+
+_register_save_cases()
+
+
+@benchmark('save_visualization/svg_matplotlib', repeat=5)
+def bench_svg_matplotlib():
+    profile = _profile()
+
+    def run():
+        fig = Figure(figsize=PROFILE_FIGSIZE)
+        FigureCanvasAgg(fig)
+        draw_profile(fig.add_subplot(), TRAIT_INFO, profile.sorted_traits)
+        fig.savefig(io.BytesIO(), format='svg', bbox_inches='tight')
+    return run
+
+
+@benchmark('save_visualization/svg_direct', repeat=200)
+def bench_svg_direct():
+    profile = _profile()
+    return lambda: profile_svg(TRAIT_INFO, profile.sorted_traits)
+
+
+def _register_thumbnail_cases():
+    # Same size x size PNG of the profile axes from both renderers
+    for size in (64, 128, 256, 512):
+        def numpy_factory(size=size):
+            profile = _profile()
+            return lambda: encode_png(render_profile(TRAIT_INFO, profile.sorted_traits, size))
+
+        def matplotlib_factory(size=size):
+            profile = _profile()
+            fig = _profile_figure()
+            fig.canvas.draw()
+            axes = fig.axes[0].get_window_extent().transformed(fig.dpi_scale_trans.inverted())
+
+            def run():
+                fig = Figure(figsize=PROFILE_FIGSIZE)
+                FigureCanvasAgg(fig)
+                draw_profile(fig.add_subplot(), TRAIT_INFO, profile.sorted_traits)
+                fig.savefig(io.BytesIO(), format='png', dpi=size / axes.width, bbox_inches=axes)
+            return run
+
+        benchmark(f'thumbnail/numpy_{size}px', repeat=20)(numpy_factory)
+        benchmark(f'thumbnail/matplotlib_{size}px', repeat=10)(matplotlib_factory)
+
+
+_register_thumbnail_cases()
+
+
+def _layout_items(n):
+    # n visible shapes cycling through every registered shape, strongest first
+    names = sorted(SHAPES)
+    scores = np.sort(np.random.default_rng(SEED).uniform(0.31, 1.0, n))[::-1]
+    return [(names[i % len(names)], float(score), 'blue') for i, score in enumerate(scores)]
+
+
+@benchmark('layout/spiral_20', repeat=200)
+def bench_layout_spiral():
+    items = _layout_items(20)
+    trait_info = {f'trait{i}': {'shape': shape, 'color': color}
+                  for i, (shape, _, color) in enumerate(items)}
+    sorted_traits = [(f'trait{i}', score) for i, (_, score, _) in enumerate(items)]
+    return lambda: spiral_layout(trait_info, sorted_traits)
+
+
+def _register_layout_cases():
+    for n, repeat in ((20, 100), (200, 20), (2000, 5)):
+        def factory(n=n):
+            items = _layout_items(n)
+            return lambda: packed_layout(items)
+
+        benchmark(f'layout/packed_{n}', repeat=repeat)(factory)
+
+
+_register_layout_cases()
+
+
+def _vectors(n):
+    return ScoringEngine().score(_answers(n)).normalized
+
+
+def _query():
+    return np.random.default_rng(SEED + 1).random((1, len(TRAIT_INFO)))
+
+
+@benchmark('similarity/brute_force_10k_k10', repeat=100)
+def bench_similarity_brute_small():
+    index = build_index(_vectors(10000))
+    query = _query()
+    return lambda: index.search(query, 10)
+
+
+@benchmark('similarity/brute_force_1m_k10', repeat=20)
+def bench_similarity_brute_large():
+    index = BruteForceIndex(len(TRAIT_INFO))
+    index.add(_vectors(1000000))
+    query = _query()
+    return lambda: index.search(query, 10)
+
+
+@benchmark('similarity/partitioned_1m_k10', repeat=100)
+def bench_similarity_partitioned():
+    index = build_index(_vectors(1000000))
+    query = _query()
+    return lambda: index.search(query, 10)
+
+
+@benchmark('similarity/partitioned_insert_1k', repeat=20)
+def bench_similarity_insert():
+    index = build_index(_vectors(200000), brute_force_limit=0)
+    batch = _vectors(1000)
+    return lambda: index.add(batch)
+
+
+def run_case(factory, repeat):
+    case = factory()
+    fn, reset = case if isinstance(case, tuple) else (case, None)
+    # One untimed call warms caches (fonts, lazily built paths)
+    fn()
+    if reset:
+        reset()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+        if reset:
+            reset()
+    return {
+        'repeat': repeat,
+        'min_ms': min(samples),
+        'median_ms': statistics.median(samples),
+        'mean_ms': statistics.fmean(samples),
+    }
+
+
+def run_benchmarks(pattern=None, repeat_scale=1.0):
+    results = {}
+    for name, (factory, repeat) in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = run_case(factory, max(1, int(repeat * repeat_scale)))
+        print(f"{name:<45} {results[name]['median_ms']:10.3f} ms", file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # Returns (name, baseline ms, current ms, ratio) for every regression
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if not reference:
+            continue
+        ratio = result['median_ms'] / reference['median_ms'] if reference['median_ms'] else 1.0
+        if ratio > threshold:
+            regressions.append((name, reference['median_ms'], result['median_ms'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the character visualization benchmarks")
+    parser.add_argument('-k', '--filter', help="Only run cases whose name contains this text")
+    parser.add_argument('-o', '--output', help="Write results JSON to this file")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown ratio reported as a regression (default %(default)s)")
+    parser.add_argument('--repeat-scale', type=float, default=1.0,
+                        help="Multiply every case's repeat count")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.filter, args.repeat_scale)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = {'meta': current['meta'], 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # Merge so a filtered run only replaces the cases it ran
+        baseline['meta'] = current['meta']
+        baseline['results'].update(current['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline updated: {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against; run with --update-baseline", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(current, baseline, args.threshold)
+    for name, before, after, ratio in regressions:
+        print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+    if not regressions:
+        print("No regressions against baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""Where the per-user caches live.
+
+Shared by the legend, legend tile and compiled catalog caches, which must
+not depend on each other's modules. CHARVIZ_CACHE_DIR overrides the root,
+which otherwise follows XDG_CACHE_HOME.
+"""
+import os
+
+
+def cache_dir(name):
+    root = os.environ.get('CHARVIZ_CACHE_DIR') or os.path.join(
+        os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+        'character_visualization')
+    return os.path.join(root, name)
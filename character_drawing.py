@@ -0,0 +1,178 @@
+"""Tk-free drawing of character profiles onto matplotlib axes.
+
+Shared by the Tk app and the headless batch tools, so nothing here may
+touch pyplot's global figure state.
+"""
+import threading
+
+from matplotlib import rcParams
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
+from matplotlib.patches import Circle, Rectangle, Polygon, Wedge
+import matplotlib.patches as mpatches
+
+import instrumentation
+from shape_geometry import get_shape, place, shape_alpha, shape_size
+from shape_layout import profile_layout
+
+PROFILE_FIGSIZE = (10, 10)
+
+# matplotlib is not thread-safe: figures are private, but font, text layout
+# and path caches are shared. Every drawing or savefig off the main thread
+# (results worker, legend tiles, exports) holds this lock. Reentrant so a
+# helper may take it again under a caller that already has it.
+DRAW_LOCK = threading.RLock()
+
+# One legend tile, and where its axes sit in it
+LEGEND_TILE_FIGSIZE = (3.5, 2.8)
+LEGEND_TILE_AXES = (0.2, 0.3, 0.6, 0.5)
+
+
+def draw_profile(ax, trait_info, sorted_traits, use_collections=True):
+    # sorted_traits is a list of (trait, normalized score), strongest first.
+    # With use_collections all shapes are batched into a handful of
+    # collections instead of one artist per patch or line.
+    ax.set_xlim(-10, 10)
+    ax.set_ylim(-10, 10)
+    ax.set_aspect('equal')
+    ax.axis('off')
+    
+    # Set background
+    ax.add_patch(Rectangle((-10, -10), 20, 20, facecolor='#f0f0f0', alpha=0.3))
+    
+    shapes = profile_layout(trait_info, sorted_traits)
+    
+    if use_collections:
+        draw_shapes_collected(ax, shapes)
+    else:
+        for shape in shapes:
+            draw_shape(ax, *shape)
+    
+    # Add title
+    ax.set_title("Your Unique Character Profile", fontsize=16, fontweight='bold', pad=20)
+    
+    # Add subtitle explaining arrangement
+    ax.text(0, -9, "Shapes arranged in a Fibonacci spiral: strongest traits near center, " +
+            "size indicates trait strength", 
+            ha='center', fontsize=9, style='italic', color='gray')
+    
+    # Add subtle grid for reference
+    ax.grid(True, alpha=0.1, linestyle='--')
+
+
+def draw_legend_tile(ax, trait, info):
+    # One trait of the Shape Meanings legend on its own axes
+    ax.set_xlim(-2, 2)
+    ax.set_ylim(-3, 2.5)  # Extended lower limit for text
+    ax.axis('off')
+    
+    # Draw the shape
+    draw_shape(ax, info['shape'], 0, 0.5, 0.8, info['color'])  # Moved shape up
+    
+    # Add label with more spacing
+    trait_name = trait.replace('_', ' ').title()
+    ax.text(0, -1.2, trait_name, ha='center', fontsize=11, fontweight='bold')
+    ax.text(0, -1.6, info.get('description', ''), ha='center', fontsize=9, 
+           wrap=True, style='italic')
+    # Add rationale
+    if 'rationale' in info:
+        ax.text(0, -2.2, info['rationale'], ha='center', fontsize=7,
+               wrap=True, color='gray')
+
+
+def draw_legend_tile_figure(fig, trait, info):
+    # One tile of the legend grid, with room around the axes for the
+    # wrapped description and rationale
+    draw_legend_tile(fig.add_axes(LEGEND_TILE_AXES), trait, info)
+
+
+def shape_artists(part, x, y, size, color, alpha):
+    points, extent = place(part, x, y, size)
+    color = part.color or color
+    alpha = part.alpha if part.alpha is not None else alpha
+    style = {'alpha': alpha}
+    if part.linewidth is not None:
+        style['linewidth'] = part.linewidth
+
+    if part.kind == 'polyline':
+        return [Line2D(stroke[:, 0], stroke[:, 1], color=color, **style) for stroke in points]
+    if part.kind == 'arrow':
+        return [mpatches.FancyArrowPatch(points[0], points[1], arrowstyle='->',
+                                         mutation_scale=extent[0], color=color, **style)]
+
+    style['facecolor'] = color
+    style['edgecolor'] = part.edgecolor or color
+    if part.kind == 'polygon':
+        return [Polygon(points, **style)]
+    if part.kind == 'circle':
+        return [Circle(points, extent[0], **style)]
+    if part.kind == 'ellipse':
+        return [mpatches.Ellipse(points, extent[0], extent[1], **style)]
+    if part.kind == 'wedge':
+        return [Wedge(points, extent[0], part.angles[0], part.angles[1], **style)]
+    raise ValueError(f"Unknown shape part kind: {part.kind}")
+
+
+def draw_shape(ax, shape_type, x, y, intensity, color='blue', size=None):
+    # size defaults to shape_size(intensity); layouts pass their own when
+    # they have to shrink shapes to fit
+    with instrumentation.timer('draw_shape', shape=shape_type):
+        size = size or shape_size(intensity)
+        alpha = shape_alpha(intensity)
+        parts, color_override = get_shape(shape_type)
+        
+        for part in parts:
+            for artist in shape_artists(part, x, y, size, color_override or color, alpha):
+                if isinstance(artist, Line2D):
+                    ax.add_line(artist)
+                else:
+                    ax.add_patch(artist)
+
+
+def draw_shapes_collected(ax, shapes):
+    # shapes is a list of (shape_type, x, y, intensity, color, size) in
+    # draw order.
+    # Filled parts go into PatchCollections and strokes into one
+    # LineCollection, with colours and alphas baked in per item. Fills and
+    # strokes keep the zorders of patches and lines so stacking matches
+    # draw_shape. Per-shape timings cover building the artists; rasterizing
+    # happens later, in one pass, when the figure is drawn.
+    patches = []
+    segments, line_colors, line_widths = [], [], []
+    
+    def flush_patches():
+        if patches:
+            ax.add_collection(PatchCollection(patches, match_original=True), autolim=False)
+            patches.clear()
+    
+    for shape_type, x, y, intensity, color, size in shapes:
+        with instrumentation.timer('draw_shape', shape=shape_type):
+            alpha = shape_alpha(intensity)
+            parts, color_override = get_shape(shape_type)
+            color = color_override or color
+            
+            for part in parts:
+                if part.kind == 'polyline':
+                    points, _ = place(part, x, y, size)
+                    rgba = to_rgba(part.color or color,
+                                   alpha if part.alpha is None else part.alpha)
+                    linewidth = part.linewidth or rcParams['lines.linewidth']
+                    segments.extend(points)
+                    line_colors.extend([rgba] * len(points))
+                    line_widths.extend([linewidth] * len(points))
+                elif part.kind == 'arrow':
+                    # Arrow heads depend on the display transform, so arrows
+                    # stay individual patches; flushing first keeps the
+                    # stacking order
+                    flush_patches()
+                    ax.add_patch(shape_artists(part, x, y, size, color, alpha)[0])
+                else:
+                    patches.extend(shape_artists(part, x, y, size, color, alpha))
+    
+    flush_patches()
+    if segments:
+        ax.add_collection(LineCollection(segments, colors=line_colors, linewidths=line_widths,
+                                         capstyle=rcParams['lines.solid_capstyle'],
+                                         joinstyle=rcParams['lines.solid_joinstyle'],
+                                         zorder=Line2D.zorder), autolim=False)
@@ -0,0 +1,236 @@
+"""Headless scoring for whole respondent cohorts.
+
+Scores an N x Q answer matrix (one column per entry in QUESTIONS, answers
+1-5) in a single NumPy pass and produces the same normalized scores and
+dominant/strong/moderate categories as the Tk app.
+
+    python character_scoring.py responses.csv -o scores.csv
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# MAX_SCORE is the maximum raw score per trait, from the catalog (two
+# questions answered on a 1-5 scale in the default one)
+from trait_catalog import MAX_SCORE, QUESTIONS, TRAIT_INFO, compile_catalog
+
+# Category cut-offs on the normalized score, matching the analysis tab
+DOMINANT_THRESHOLD = 0.7
+STRONG_THRESHOLD = 0.5
+MODERATE_THRESHOLD = 0.3
+
+# Category codes, ordered so that a higher code means a stronger trait
+NONE, MODERATE, STRONG, DOMINANT = 0, 1, 2, 3
+CATEGORY_NAMES = ('none', 'moderate', 'strong', 'dominant')
+
+MIN_ANSWER = 1
+MAX_ANSWER = 5
+
+TraitProfile = namedtuple('TraitProfile', 'sorted_traits dominant strong moderate')
+
+
+def categorize(normalized):
+    # searchsorted with side='right' puts a score equal to a cut-off in the
+    # upper category, i.e. the same >= comparisons the analysis tab uses
+    cutoffs = np.array([MODERATE_THRESHOLD, STRONG_THRESHOLD, DOMINANT_THRESHOLD])
+    return np.searchsorted(cutoffs, normalized, side='right').astype(np.uint8)
+
+
+class ScoreBatch:
+    def __init__(self, traits, raw, normalized, categories, order):
+        self.traits = traits
+        self.raw = raw
+        self.normalized = normalized
+        self.categories = categories
+        # Per-respondent trait indices sorted by score, strongest first
+        self.order = order
+
+    def __len__(self):
+        return self.raw.shape[0]
+
+    @property
+    def visible(self):
+        # create_visualization only draws traits strictly above the cut-off
+        return self.normalized > MODERATE_THRESHOLD
+
+    def profile(self, row):
+        sorted_traits = [(self.traits[j], float(self.normalized[row, j]))
+                         for j in self.order[row]]
+        categories = self.categories[row]
+        by_category = {DOMINANT: [], STRONG: [], MODERATE: []}
+        for j in self.order[row]:
+            if categories[j] in by_category:
+                by_category[categories[j]].append((self.traits[j], float(self.normalized[row, j])))
+        return TraitProfile(sorted_traits, by_category[DOMINANT],
+                            by_category[STRONG], by_category[MODERATE])
+
+    def category_counts(self):
+        counts = np.zeros((len(self), len(CATEGORY_NAMES)), dtype=np.int32)
+        for code in range(len(CATEGORY_NAMES)):
+            counts[:, code] = (self.categories == code).sum(axis=1)
+        return counts
+
+
+class ScoringEngine:
+    def __init__(self, trait_info=TRAIT_INFO, questions=QUESTIONS, max_score=MAX_SCORE,
+                 catalog=None):
+        # catalog, a trait_catalog.CompiledCatalog (e.g. from load_compiled),
+        # replaces trait_info, questions and max_score
+        self.catalog = catalog or compile_catalog(trait_info, questions, max_score)
+        self.traits = self.catalog.traits
+        self.trait_index = self.catalog.trait_index
+        self.questions = questions if catalog is None else self.catalog.questions
+        self.max_score = self.catalog.max_score
+
+    @property
+    def item_counts(self):
+        # Number of questions per trait
+        return self.catalog.item_counts
+
+    @property
+    def n_questions(self):
+        return len(self.questions)
+
+    def validate(self, answers):
+        answers = np.asarray(answers)
+        if answers.ndim == 1:
+            answers = answers[np.newaxis, :]
+        if answers.ndim != 2 or answers.shape[1] != self.n_questions:
+            raise ValueError(f"Expected an N x {self.n_questions} answer matrix, "
+                             f"got shape {answers.shape}")
+        if answers.dtype.kind == 'f':
+            # astype(int) would silently truncate 2.7 and turn NaN into garbage
+            if not np.all(np.isfinite(answers)) or np.any(answers != np.rint(answers)):
+                raise ValueError("Answers must be whole numbers")
+        elif answers.dtype.kind not in 'iu':
+            raise ValueError(f"Answers must be whole numbers, got {answers.dtype} values")
+        if answers.size and (answers.min() < MIN_ANSWER or answers.max() > MAX_ANSWER):
+            raise ValueError(f"Answers must be between {MIN_ANSWER} and {MAX_ANSWER}")
+        return answers
+
+    def raw_scores(self, answers):
+        # Every question feeds exactly one trait, so the answers are summed
+        # run by run over the trait-sorted columns: N x Q work rather than
+        # an N x Q x T product with an incidence matrix
+        answers = self.validate(answers)
+        catalog = self.catalog
+        raw = np.zeros((len(answers), len(self.traits)), dtype=np.int32)
+        if len(catalog.run_traits):
+            raw[:, catalog.run_traits] = np.add.reduceat(
+                answers[:, catalog.item_order].astype(np.int32), catalog.run_starts, axis=1)
+        return raw
+
+    def score(self, answers):
+        return self.score_raw(self.raw_scores(answers))
+
+    def score_raw(self, raw):
+        raw = np.atleast_2d(np.asarray(raw, dtype=np.int32))
+        normalized = raw / self.max_score
+        # Stable sort on the negated scores keeps ties in catalog order,
+        # exactly like sorted(..., reverse=True) on the responses dict
+        order = np.argsort(-normalized, axis=1, kind='stable')
+        return ScoreBatch(self.traits, raw, normalized, categorize(normalized), order)
+
+    def score_responses(self, responses):
+        # Score a single {trait: raw score} dict as kept by the Tk app
+        return self.score_raw([[responses[trait] for trait in self.traits]])
+
+
+def load_response_matrix(path):
+    if str(path).endswith('.npy'):
+        return np.load(path)
+    with open(path, newline='') as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return np.zeros((0, 0), dtype=np.int32)
+    # Allow a header row of question ids
+    try:
+        [int(value) for value in rows[0]]
+    except ValueError:
+        rows = rows[1:]
+    return np.array([[int(value) for value in row] for row in rows if row], dtype=np.int32)
+
+
+def write_scores(path, batch, percentiles=None):
+    # percentiles, if given, is an N x T array of population percentiles
+    if path.endswith('.npz'):
+        arrays = dict(traits=np.array(batch.traits), raw=batch.raw,
+                      normalized=batch.normalized, categories=batch.categories)
+        if percentiles is not None:
+            arrays['percentiles'] = percentiles
+        np.savez_compressed(path, **arrays)
+        return
+
+    out = open(path, 'w', newline='') if path != '-' else sys.stdout
+    try:
+        if path.endswith('.json'):
+            records = []
+            for row in range(len(batch)):
+                profile = batch.profile(row)
+                record = {
+                    'scores': dict(zip(batch.traits, batch.normalized[row].tolist())),
+                    'dominant': [t for t, _ in profile.dominant],
+                    'strong': [t for t, _ in profile.strong],
+                    'moderate': [t for t, _ in profile.moderate],
+                }
+                if percentiles is not None:
+                    record['percentiles'] = dict(zip(batch.traits, percentiles[row].tolist()))
+                records.append(record)
+            json.dump(records, out, indent=2)
+            return
+
+        writer = csv.writer(out)
+        header = ['respondent'] + batch.traits + ['dominant', 'strong', 'moderate']
+        if percentiles is not None:
+            header += [f'{trait}_percentile' for trait in batch.traits]
+        writer.writerow(header)
+        for row in range(len(batch)):
+            profile = batch.profile(row)
+            values = ([row] + [f'{s:.2f}' for s in batch.normalized[row]] +
+                      [';'.join(t for t, _ in profile.dominant),
+                       ';'.join(t for t, _ in profile.strong),
+                       ';'.join(t for t, _ in profile.moderate)])
+            if percentiles is not None:
+                values += [f'{p:.3f}' for p in percentiles[row]]
+            writer.writerow(values)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a cohort of survey responses")
+    parser.add_argument('responses', help="N x Q answer matrix as .csv or .npy")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Output file (.csv, .json or .npz); defaults to CSV on stdout")
+    parser.add_argument('--norms', help="Population norms file (.npz) to update with this "
+                                        "cohort and report percentiles against")
+    args = parser.parse_args(argv)
+
+    engine = ScoringEngine()
+    percentiles = None
+    try:
+        answers = load_response_matrix(args.responses)
+        start = time.perf_counter()
+        batch = engine.score(answers)
+        elapsed = time.perf_counter() - start
+        if args.norms:
+            from trait_norms import TraitNorms
+            norms = TraitNorms.load_or_create(args.norms, engine.traits, engine.max_score)
+            norms.update(batch.raw)
+            norms.save(args.norms)
+            percentiles = norms.percentiles(batch.raw)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    write_scores(args.output, batch, percentiles)
+    print(f"Scored {len(batch)} respondents in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Explicitly owned matplotlib figures for long-running sessions.
+
+Figures are created with matplotlib.figure.Figure, never through pyplot,
+so nothing is left behind in pyplot's global registry. Released figures
+are cleared and kept for reuse by the next session, up to a memory budget;
+anything beyond the budget is dropped.
+"""
+import logging
+
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+# Roughly two full-size result figures with their Agg buffers
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+
+def figure_bytes(fig):
+    # The dominant cost of a figure is its RGBA render buffer
+    width, height = fig.get_size_inches() * fig.dpi
+    return int(width * height * 4)
+
+
+class FigurePool:
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.in_use = []
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+
+    @property
+    def tracked_bytes(self):
+        return sum(figure_bytes(fig) for fig in self.in_use + self.free)
+
+    def acquire(self, figsize, dpi=100):
+        for fig in self.free:
+            if tuple(fig.get_size_inches()) == tuple(figsize) and fig.dpi == dpi:
+                self.free.remove(fig)
+                self.reused += 1
+                break
+        else:
+            fig = Figure(figsize=figsize, dpi=dpi)
+            self.created += 1
+
+        self.in_use.append(fig)
+        if self.tracked_bytes > self.budget_bytes:
+            logger.warning("Figure memory %.1f MB exceeds budget of %.1f MB",
+                           self.tracked_bytes / 1e6, self.budget_bytes / 1e6)
+        return fig
+
+    def release(self, fig):
+        if fig not in self.in_use:
+            return
+        self.in_use.remove(fig)
+        fig.clear()
+        # Detach from the GUI canvas so its widget and render buffer can be
+        # garbage collected with the rest of the session
+        FigureCanvasBase(fig)
+        self.free.append(fig)
+
+        # Drop the oldest pooled figures until we are back within budget
+        while self.free and self.tracked_bytes > self.budget_bytes:
+            self.free.pop(0)
+            self.dropped += 1
+
+    def stats(self):
+        return {
+            'in_use': len(self.in_use),
+            'free': len(self.free),
+            'tracked_bytes': self.tracked_bytes,
+            'created': self.created,
+            'reused': self.reused,
+            'dropped': self.dropped,
+        }
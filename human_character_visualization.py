@@ -1,173 +1,129 @@
+import time
+
+# Taken before any other import so the startup report includes import cost
+STARTUP_BEGAN = time.perf_counter()
+
+import argparse
+import base64
+import io
+import logging
+import queue
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle, Rectangle, Polygon, FancyBboxPatch, Arc, Wedge
-from matplotlib.path import Path
-import matplotlib.patches as mpatches
-import numpy as np
 import random
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.gridspec import GridSpec
+import instrumentation
+from instrumentation import timed
+from legend_cache import warm_legend_tiles
+from legend_view import FIRST_SCREEN_TILES, VirtualLegend
+from trait_catalog import TRAIT_INFO, QUESTIONS
+
+# matplotlib and NumPy are not needed until show_results, so they are only
+# imported there, or warmed up on a background thread while the questions
+# are being answered (see warm_up_plotting)
+
+logger = logging.getLogger(__name__)
+
+# How often the results screen checks on a running export
+EXPORT_POLL_MS = 50
+
+# How often the results placeholder checks on the background preparation
+RESULTS_POLL_MS = 30
+
+# Vertical space the notebook tabs, title and buttons take from the profile
+# image on the visualization tab
+RESULTS_CHROME_PX = 140
+
+startup_timings = {'imports': time.perf_counter() - STARTUP_BEGAN}
+
+
+def warm_up_plotting(trait_info):
+    try:
+        start = time.perf_counter()
+        import numpy  # noqa: F401
+        import matplotlib.backends.backend_agg  # noqa: F401
+        import analysis_document  # noqa: F401
+        import character_drawing  # noqa: F401
+        import character_scoring  # noqa: F401
+        import figure_pool  # noqa: F401
+        startup_timings['plotting_import'] = time.perf_counter() - start
+        
+        # Render the legend's first screen of tiles into the disk cache if
+        # this catalog hasn't been seen
+        start = time.perf_counter()
+        warm_legend_tiles(trait_info, FIRST_SCREEN_TILES)
+        startup_timings['legend_cache'] = time.perf_counter() - start
+    except Exception:
+        # show_results imports and renders on demand anyway
+        logger.exception("Background plotting warm-up failed")
+
 
 class CharacterVisualizationApp:
-    def __init__(self, root):
+    def __init__(self, root, adaptive=False):
         self.root = root
         self.root.title("Character Trait Visualization")
         self.root.geometry("1400x900")
         
-        # Define traits and their corresponding shapes with descriptions
-        self.trait_info = {
-            'compassionate': {
-                'shape': 'circle',
-                'color': 'blue',
-                'description': 'Caring deeply about others\' well-being',
-                'rationale': 'Circle: Universal symbol of wholeness and inclusion (Jung, 1964)'
-            },
-            'strong_willed': {
-                'shape': 'square',
-                'color': 'green',
-                'description': 'Determined and persistent in goals',
-                'rationale': 'Square: Stability and firmness in Gestalt psychology'
-            },
-            'creative': {
-                'shape': 'spiral',
-                'color': 'orange',
-                'description': 'Imaginative and original thinking',
-                'rationale': 'Spiral: Growth and evolution patterns (Fibonacci in nature)'
-            },
-            'analytical': {
-                'shape': 'triangle',
-                'color': 'red',
-                'description': 'Logical and systematic approach',
-                'rationale': 'Triangle: Directional focus and structural thinking'
-            },
-            'adaptable': {
-                'shape': 'hexagon',
-                'color': 'purple',
-                'description': 'Flexible and open to change',
-                'rationale': 'Hexagon: Efficient natural form allowing multiple connections'
-            },
-            'empathetic': {
-                'shape': 'heart',
-                'color': 'pink',
-                'description': 'Understanding others\' emotions',
-                'rationale': 'Heart: Cross-cultural symbol of emotional connection'
-            },
-            'ambitious': {
-                'shape': 'arrow',
-                'color': 'darkgreen',
-                'description': 'Driven to achieve success',
-                'rationale': 'Arrow: Upward movement and goal direction'
-            },
-            'peaceful': {
-                'shape': 'oval',
-                'color': 'lightblue',
-                'description': 'Calm and harmonious nature',
-                'rationale': 'Oval: Smooth curves reduce visual tension (Arnheim, 1974)'
-            },
-            'organized': {
-                'shape': 'grid',
-                'color': 'brown',
-                'description': 'Structured and methodical',
-                'rationale': 'Grid: Order and systematic arrangement'
-            },
-            'intuitive': {
-                'shape': 'crescent',
-                'color': 'indigo',
-                'description': 'Trusting inner wisdom',
-                'rationale': 'Crescent: Symbol of inner knowing across cultures'
-            },
-            'confident': {
-                'shape': 'star',
-                'color': 'gold',
-                'description': 'Self-assured and positive',
-                'rationale': 'Star: Radiating energy and prominence'
-            },
-            'patient': {
-                'shape': 'line',
-                'color': 'gray',
-                'description': 'Calm endurance and tolerance',
-                'rationale': 'Line: Steady, unchanging continuity'
-            },
-            'curious': {
-                'shape': 'question',
-                'color': 'magenta',
-                'description': 'Eager to learn and explore',
-                'rationale': 'Question mark: Literal representation of inquiry'
-            },
-            'loyal': {
-                'shape': 'diamond',
-                'color': 'cyan',
-                'description': 'Faithful and devoted',
-                'rationale': 'Diamond: Durability and preciousness'
-            },
-            'optimistic': {
-                'shape': 'sun',
-                'color': 'yellow',
-                'description': 'Positive outlook on life',
-                'rationale': 'Sun: Universal symbol of positivity and warmth'
-            },
-            'decisive': {
-                'shape': 'pentagon',
-                'color': 'maroon',
-                'description': 'Quick and firm in decisions',
-                'rationale': 'Pentagon: Strong, definitive shape with clear angles'
-            },
-            'humble': {
-                'shape': 'small_circle',
-                'color': 'lightgray',
-                'description': 'Modest and unpretentious',
-                'rationale': 'Small circle: Minimized presence, simplicity'
-            },
-            'courageous': {
-                'shape': 'shield',
-                'color': 'darkblue',
-                'description': 'Brave in facing challenges',
-                'rationale': 'Shield: Protection and forward-facing strength'
-            },
-            'wise': {
-                'shape': 'eye',
-                'color': 'darkgray',
-                'description': 'Deep understanding and insight',
-                'rationale': 'Eye: Vision and perception across wisdom traditions'
-            },
-            'playful': {
-                'shape': 'wave',
-                'color': 'teal',
-                'description': 'Fun-loving and lighthearted',
-                'rationale': 'Wave: Dynamic movement and flow'
-            }
-        }
-        
-        # Questions for the survey
-        self.questions = [
-            ("I often feel deeply moved by others' experiences", 'compassionate'),
-            ("I go out of my way to help those in need", 'compassionate'),
-            ("I stick to my decisions even when faced with opposition", 'strong_willed'),
-            ("I rarely give up on my goals", 'strong_willed'),
-            ("I enjoy finding new ways to solve problems", 'creative'),
-            ("I often come up with original ideas", 'creative'),
-            ("I prefer to analyze situations before making decisions", 'analytical'),
-            ("I enjoy breaking down complex problems", 'analytical'),
-            ("I easily adjust to new situations", 'adaptable'),
-            ("Change doesn't bother me much", 'adaptable'),
-            ("I can sense others' emotions easily", 'empathetic'),
-            ("I understand how others feel", 'empathetic'),
-            ("I set high goals for myself", 'ambitious'),
-            ("I'm driven to achieve success", 'ambitious'),
-            ("I prefer harmony over conflict", 'peaceful'),
-            ("I stay calm in stressful situations", 'peaceful'),
-            ("I like having everything in its place", 'organized'),
-            ("I plan my tasks carefully", 'organized'),
-            ("I trust my gut feelings", 'intuitive'),
-            ("I often know things without being told", 'intuitive'),
-        ]
+        # Traits, their shapes and the survey questions live in trait_catalog so
+        # they can be shared with the headless scoring tools
+        self.trait_info = TRAIT_INFO
+        self.questions = QUESTIONS
         
         self.current_question = 0
+        self.question_shown_at = time.perf_counter()
         self.responses = {trait: 0 for trait in self.trait_info}
+        # Per-question answers, kept so finished sessions can be archived
+        self.answers = []
+        
+        # Respondent store directory finished sessions are appended to, if any
+        self.store_path = None
+        
+        # In adaptive mode an AdaptiveSession picks the questions and skips
+        # those that can no longer change a trait's category
+        self.adaptive = adaptive
+        self.session = None
+        # Built once from the compiled catalog cache (see scoring_engine)
+        self.engine = None
+        self.start_session()
+        
+        # Result tabs still waiting to be built, keyed by notebook tab id
+        self.pending_tabs = {}
+        self.prebuild_job = None
+        self.results_requested_at = None
+        self.result_timings = {}
+        
+        # Progress queue and poll job of a running export, if any
+        self.export_events = None
+        self.export_job = None
+        
+        # Scoring and analysis results for the current session
+        self.profile = None
+        self.analysis_document = None
+        
+        # Results prepared off the main thread (see prepare_results): the
+        # worker's queue, its poll job, and what it handed back
+        self.results_events = None
+        self.results_job = None
+        self.results = None
+        self.results_placeholder = None
+        # Bumped by show_results and restart; a worker whose generation is
+        # no longer current skips the rest of its work
+        self.results_generation = 0
+        
+        # Figures are owned by the app rather than pyplot, and the worker
+        # that acquires one releases it, so sessions don't accumulate them.
+        # Created on first use to keep matplotlib out of startup. The
+        # results worker, legend tiles, warm-up and exports all draw on
+        # their own threads, each under character_drawing.DRAW_LOCK.
+        self.figure_pool = None
         
         self.setup_ui()
         
+        self.warm_up_thread = threading.Thread(target=warm_up_plotting, args=(self.trait_info,),
+                                               daemon=True)
+        self.warm_up_thread.start()
+        
     def setup_ui(self):
         # Main frame
         self.main_frame = ttk.Frame(self.root, padding="20")
@@ -208,26 +164,74 @@ class CharacterVisualizationApp:
         # Start the survey
         self.show_question()
         
+    def start_session(self):
+        self.session = None
+        if self.adaptive:
+            from adaptive_questionnaire import AdaptiveSession
+            self.session = AdaptiveSession(self.scoring_engine())
+    
+    def survey_finished(self):
+        if self.session is not None:
+            return self.session.finished
+        return self.current_question >= len(self.questions)
+    
     def show_question(self):
-        if self.current_question < len(self.questions):
-            question_text, _ = self.questions[self.current_question]
-            self.question_label.config(text=f"Question {self.current_question + 1}: {question_text}")
-            self.progress['value'] = (self.current_question / len(self.questions)) * 100
-            self.response_var.set(3)  # Reset to neutral
+        if self.session is not None:
+            # Progress counts only the questions that may still be asked
+            if self.session.finished:
+                return
+            self.current_question = self.session.next_question()
+            number = self.session.asked + 1
+            total = self.session.asked + self.session.pending
+        elif self.current_question < len(self.questions):
+            number, total = self.current_question + 1, len(self.questions)
+        else:
+            return
+        question_text, _ = self.questions[self.current_question]
+        self.question_label.config(text=f"Question {number}: {question_text}")
+        self.progress['value'] = ((number - 1) / total) * 100
+        self.response_var.set(3)  # Reset to neutral
+        self.question_shown_at = time.perf_counter()
         
     def next_question(self):
-        if self.current_question < len(self.questions):
+        # How long the respondent took over the question just answered
+        instrumentation.observe('answer_latency', time.perf_counter() - self.question_shown_at,
+                                question=self.current_question)
+        instrumentation.count('questions_answered')
+        if self.session is not None:
+            if self.session.finished:
+                return
+            self.session.record(self.current_question, self.response_var.get())
+            if not self.session.finished:
+                self.show_question()
+            else:
+                # Skipped questions are imputed so the results and the store
+                # see a complete session
+                self.responses = self.session.responses()
+                self.answers = self.session.answer_row()
+                logger.info("Adaptive session: %d of %d questions asked",
+                            self.session.asked, len(self.questions))
+                self.finish_survey()
+        elif self.current_question < len(self.questions):
             # Record response
             _, trait = self.questions[self.current_question]
             self.responses[trait] += self.response_var.get()
+            self.answers.append(self.response_var.get())
             
             self.current_question += 1
             
             if self.current_question < len(self.questions):
                 self.show_question()
             else:
-                self.show_results()
+                self.finish_survey()
+    
+    def finish_survey(self):
+        instrumentation.count('sessions_completed', adaptive=self.session is not None)
+        self.results_requested_at = time.perf_counter()
+        self.archive_session()
+        self.show_results()
     
+    @timed('show_results')
     def show_results(self):
         # Clear the window
         for widget in self.main_frame.winfo_children():
@@ -249,14 +253,139 @@ class CharacterVisualizationApp:
         analysis_frame = ttk.Frame(notebook)
         notebook.add(analysis_frame, text="Profile Analysis")
         
-        # Create the visualization
-        self.create_visualization_tab(viz_frame)
-        
-        # Create the legend
-        self.create_legend_tab(legend_frame)
-        
-        # Create the analysis
-        self.create_analysis_tab(analysis_frame)
+        # Tabs are built once the worker has handed its results back: the
+        # selected tab first, the others while the UI is idle
+        self.pending_tabs = {
+            str(viz_frame): ('visualization', self.create_visualization_tab, viz_frame),
+            str(legend_frame): ('legend', self.create_legend_tab, legend_frame),
+            str(analysis_frame): ('analysis', self.create_analysis_tab, analysis_frame),
+        }
+        self.notebook = notebook
+        self.result_timings = {}
+        notebook.bind('<<NotebookTabChanged>>', lambda e: self.build_tab(str(notebook.select())))
+        
+        # Scoring, drawing and the analysis run on a worker thread while a
+        # placeholder keeps the window responsive
+        self.results_placeholder = ttk.Frame(viz_frame)
+        self.results_placeholder.pack(expand=True)
+        ttk.Label(self.results_placeholder, text="Preparing your results...",
+                  font=('Arial', 14)).pack(pady=10)
+        spinner = ttk.Progressbar(self.results_placeholder, length=300, mode='indeterminate')
+        spinner.pack(pady=10)
+        spinner.start(15)
+        self.root.update_idletasks()
+        requested_at = self.results_requested_at or time.perf_counter()
+        self.result_timings['placeholder'] = time.perf_counter() - requested_at
+        
+        # Size the profile image to the space the visualization tab will have
+        side = max(min(notebook.winfo_width(), notebook.winfo_height() - RESULTS_CHROME_PX), 200)
+        
+        self.results = None
+        self.results_events = queue.Queue()
+        self.results_generation += 1
+        threading.Thread(target=self.prepare_results, name='prepare-results', daemon=True,
+                         args=(dict(self.responses), side, self.results_events,
+                               self.results_generation)).start()
+        self.results_job = self.root.after(RESULTS_POLL_MS, self.poll_results)
+    
+    def prepare_results(self, responses, side, events, generation):
+        # Runs on a worker thread and must not touch Tk: everything the
+        # result tabs need is computed here and handed back through events
+        try:
+            timings = {}
+            start = time.perf_counter()
+            from analysis_document import build_analysis
+            profile = self.scoring_engine().score_responses(responses).profile(0)
+            document = build_analysis(profile, self.trait_info)
+            timings['worker_analysis'] = time.perf_counter() - start
+            if generation != self.results_generation:
+                # The user restarted; nobody reads these results any more
+                return
+            
+            start = time.perf_counter()
+            from character_drawing import DRAW_LOCK
+            buffer = io.BytesIO()
+            with DRAW_LOCK:
+                fig = self.create_visualization(profile)
+                try:
+                    # side pixels across, whatever the figure's size in inches
+                    with instrumentation.timer('savefig', format='png', output='results'):
+                        fig.savefig(buffer, format='png', dpi=side / max(fig.get_size_inches()))
+                finally:
+                    self.figure_pool.release(fig)
+            timings['worker_render'] = time.perf_counter() - start
+            
+            events.put(('done', {
+                'profile': profile,
+                'analysis_document': document,
+                # PhotoImage takes PNG data base64 encoded
+                'profile_png': base64.b64encode(buffer.getvalue()),
+                'timings': timings,
+            }))
+        except Exception as e:
+            logger.exception("Preparing the results failed")
+            events.put(('error', str(e)))
+            return
+        
+        # The results are already on screen; the legend's first tiles only
+        # matter if the user opens that tab, so they must not delay them
+        try:
+            with instrumentation.timer('legend_warm'):
+                warm_legend_tiles(self.trait_info, FIRST_SCREEN_TILES)
+        except Exception:
+            logger.exception("Warming the legend tiles failed")
+    
+    def poll_results(self):
+        self.results_job = None
+        try:
+            event = self.results_events.get_nowait()
+        except queue.Empty:
+            self.results_job = self.root.after(RESULTS_POLL_MS, self.poll_results)
+            return
+        self.results_events = None
+        
+        self.results_placeholder.destroy()
+        self.results_placeholder = None
+        if event[0] == 'error':
+            self.pending_tabs = {}
+            ttk.Label(self.notebook.nametowidget(self.notebook.tabs()[0]),
+                      text=f"Could not prepare your results: {event[1]}",
+                      font=('Arial', 12)).pack(expand=True)
+            return
+        
+        self.results = event[1]
+        self.profile = self.results['profile']
+        self.analysis_document = self.results['analysis_document']
+        self.result_timings.update(self.results['timings'])
+        
+        # Interactive once the tab the user is looking at has its content
+        self.build_tab(str(self.notebook.select()))
+        self.root.update_idletasks()
+        requested_at = self.results_requested_at or time.perf_counter()
+        self.result_timings['time_to_interactive'] = time.perf_counter() - requested_at
+        instrumentation.observe('time_to_interactive', self.result_timings['time_to_interactive'])
+        
+        self.prebuild_job = self.root.after_idle(self.prebuild_next_tab)
+    
+    def build_tab(self, tab_id):
+        if self.results is None or tab_id not in self.pending_tabs:
+            return
+        name, builder, frame = self.pending_tabs.pop(tab_id)
+        start = time.perf_counter()
+        builder(frame)
+        self.result_timings[name] = time.perf_counter() - start
+        
+        if not self.pending_tabs:
+            logger.info("Results ready: %s", ", ".join(
+                f"{key} {seconds * 1000:.0f} ms" for key, seconds in self.result_timings.items()))
+    
+    def prebuild_next_tab(self):
+        # Build one tab per idle callback so user input is handled in between
+        self.prebuild_job = None
+        if self.pending_tabs:
+            self.build_tab(next(iter(self.pending_tabs)))
+        if self.pending_tabs:
+            self.prebuild_job = self.root.after_idle(self.prebuild_next_tab)
     
     def create_visualization_tab(self, parent):
         # Title
@@ -264,49 +393,39 @@ class CharacterVisualizationApp:
                                font=('Arial', 14, 'bold'))
         title_label.pack(pady=10)
         
-        # Create the visualization
-        fig = self.create_visualization()
-        
-        # Embed the plot in tkinter
-        canvas = FigureCanvasTkAgg(fig, master=parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Rendered by prepare_results; the main thread only decodes the PNG
+        with instrumentation.timer('profile_image_decode'):
+            image = tk.PhotoImage(data=self.results['profile_png'])
+        image_label = ttk.Label(parent, image=image)
+        image_label.image = image  # Keep a reference so Tk doesn't drop it
+        image_label.pack(fill=tk.BOTH, expand=True)
         
         # Button frame
         button_frame = ttk.Frame(parent)
         button_frame.pack(pady=10)
         
-        # Save button
+        # Save button; the export runs on a worker thread and reports here
         save_button = ttk.Button(button_frame, text="Save Image", 
-                               command=lambda: self.save_visualization(fig))
+                               command=self.save_visualization)
         save_button.pack(side=tk.LEFT, padx=5)
+        self.save_button = save_button
+        self.export_progress = ttk.Progressbar(button_frame, length=160, mode='determinate')
+        self.export_status = ttk.Label(button_frame, text="")
         
         # Restart button
         restart_button = ttk.Button(button_frame, text="Start Over", 
                                   command=self.restart)
         restart_button.pack(side=tk.LEFT, padx=5)
     
+    @timed('create_legend_tab')
     def create_legend_tab(self, parent):
-        # Create scrollable frame
-        canvas = tk.Canvas(parent)
-        scrollbar = ttk.Scrollbar(parent, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
         # Title
-        title_label = ttk.Label(scrollable_frame, text="Shape-Trait Mapping Guide", 
+        title_label = ttk.Label(parent, text="Shape-Trait Mapping Guide", 
                                font=('Arial', 14, 'bold'))
         title_label.pack(pady=10)
         
         # Scientific explanation
-        explanation_frame = ttk.Frame(scrollable_frame)
+        explanation_frame = ttk.Frame(parent)
         explanation_frame.pack(fill='x', padx=20, pady=10)
         
         explanation_text = ("Shape-trait mappings are based on research in visual perception, "
@@ -318,39 +437,10 @@ class CharacterVisualizationApp:
                                     wraplength=700, font=('Arial', 10))
         explanation_label.pack()
         
-        # Create legend figure
-        fig = plt.figure(figsize=(14, 14))  # Increased height for better spacing
-        gs = GridSpec(5, 4, figure=fig, hspace=0.7, wspace=0.4)  # Increased hspace
-        
-        # Draw each shape with its meaning
-        for i, (trait, info) in enumerate(self.trait_info.items()):
-            row = i // 4
-            col = i % 4
-            ax = fig.add_subplot(gs[row, col])
-            ax.set_xlim(-2, 2)
-            ax.set_ylim(-3, 2.5)  # Extended lower limit for text
-            ax.axis('off')
-            
-            # Draw the shape
-            self.draw_shape(ax, info['shape'], 0, 0.5, 0.8, info['color'])  # Moved shape up
-            
-            # Add label with more spacing
-            trait_name = trait.replace('_', ' ').title()
-            ax.text(0, -1.2, trait_name, ha='center', fontsize=11, fontweight='bold')
-            ax.text(0, -1.6, info['description'], ha='center', fontsize=9, 
-                   wrap=True, style='italic')
-            # Add rationale
-            if 'rationale' in info:
-                ax.text(0, -2.2, info['rationale'], ha='center', fontsize=7,
-                       wrap=True, color='gray')
-        
-        # Embed in tkinter
-        canvas_legend = FigureCanvasTkAgg(fig, master=scrollable_frame)
-        canvas_legend.draw()
-        canvas_legend.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # One tile per trait; only the ones scrolled near are loaded or
+        # rendered, so catalogs of any size scroll at the same cost
+        legend = VirtualLegend(parent, self.trait_info)
+        legend.pack(fill='both', expand=True)
     
     def create_analysis_tab(self, parent):
         # Create scrollable text widget
@@ -399,505 +489,228 @@ class CharacterVisualizationApp:
         
         analysis_text.config(state='disabled')  # Make read-only
     
+    @timed('insert_formatted_analysis')
     def insert_formatted_analysis(self, text_widget):
-        # Calculate normalized scores
-        max_score = 10
-        normalized_scores = {trait: score/max_score for trait, score in self.responses.items()}
-        
-        # Sort traits by score
-        sorted_traits = sorted(normalized_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Categorize traits
-        dominant_traits = [(t, s) for t, s in sorted_traits if s >= 0.7]
-        strong_traits = [(t, s) for t, s in sorted_traits if 0.5 <= s < 0.7]
-        moderate_traits = [(t, s) for t, s in sorted_traits if 0.3 <= s < 0.5]
-        
-        # Title
-        text_widget.insert('end', 'CHARACTER PROFILE ANALYSIS\n', 'title')
-        text_widget.insert('end', '━' * 80 + '\n\n', 'separator')
-        
-        # Scientific Foundation
-        text_widget.insert('end', '📚 SCIENTIFIC FOUNDATION\n', 'section')
-        text_widget.insert('end', 'This assessment is grounded in established psychological research:\n\n', 'body')
-        
-        text_widget.insert('end', '▸ Integrated Research Frameworks:\n', 'subsection')
-        frameworks = [
-            ('The Big Five personality model', 'Costa & McCrae, 1992'),
-            ('VIA Character Strengths framework', 'Peterson & Seligman, 2004'),
-            ('Emotional Intelligence research', 'Goleman, 1995; Salovey & Mayer, 1990'),
-            ('Self-Determination Theory', 'Deci & Ryan, 2000')
-        ]
-        for framework, citation in frameworks:
-            text_widget.insert('end', f'   • {framework} ', 'body')
-            text_widget.insert('end', f'({citation})\n', 'reference')
-        
-        text_widget.insert('end', '\n▸ Trait Categories:\n', 'subsection')
-        categories = [
-            ('Cognitive traits', 'analytical, creative, wise - linked to intelligence research'),
-            ('Emotional traits', 'empathetic, compassionate - from emotional intelligence studies'),
-            ('Volitional traits', 'strong-willed, decisive - from motivation psychology'),
-            ('Social traits', 'loyal, humble - from interpersonal psychology research')
-        ]
-        for category, description in categories:
-            text_widget.insert('end', f'   • {category}: ', 'highlight')
-            text_widget.insert('end', f'{description}\n', 'body')
-        
-        text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-        
-        # Profile Overview
-        text_widget.insert('end', '👤 YOUR PROFILE OVERVIEW\n', 'section')
-        text_widget.insert('end', 'Your character profile reveals a unique combination of:\n\n', 'body')
-        
-        # Create visual boxes for trait counts
-        text_widget.insert('end', f'   ⭐ {len(dominant_traits)} ', 'highlight')
-        text_widget.insert('end', 'DOMINANT TRAITS ', 'subsection')
-        text_widget.insert('end', '(70-100% strength)\n', 'body')
-        text_widget.insert('end', '      Your core identity traits that define your primary characteristics\n\n', 'body')
-        
-        text_widget.insert('end', f'   💪 {len(strong_traits)} ', 'highlight')
-        text_widget.insert('end', 'STRONG TRAITS ', 'subsection')
-        text_widget.insert('end', '(50-69% strength)\n', 'body')
-        text_widget.insert('end', '      Important secondary traits that significantly influence your behavior\n\n', 'body')
-        
-        text_widget.insert('end', f'   ✓ {len(moderate_traits)} ', 'highlight')
-        text_widget.insert('end', 'MODERATE TRAITS ', 'subsection')
-        text_widget.insert('end', '(30-49% strength)\n', 'body')
-        text_widget.insert('end', '      Supporting traits that add nuance to your personality\n', 'body')
-        
-        text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-        
-        # Dominant Traits
-        if dominant_traits:
-            text_widget.insert('end', '⭐ DOMINANT TRAITS (Core Identity)\n', 'section')
-            text_widget.insert('end', 'These shapes appear largest in your visualization:\n\n', 'body')
-            
-            for trait, score in dominant_traits:
-                trait_name = trait.replace('_', ' ').title()
-                shape = self.trait_info[trait]['shape'].title()
-                color = self.trait_info[trait]['color']
-                
-                # Create visual box for each trait
-                text_widget.insert('end', f'\n◆ {trait_name} ', 'trait_name')
-                text_widget.insert('end', f'— {score*100:.0f}% Strength\n', 'highlight')
-                
-                # Trait details in a box
-                text_widget.insert('end', f'Shape: {shape} | Color: {color.title()}\n', 'box_header')
-                text_widget.insert('end', f'Definition: {self.trait_info[trait]["description"]}\n', 'box_content')
-                text_widget.insert('end', 'Impact: This trait strongly defines how you interact with the world.\n', 'box_content')
-                text_widget.insert('end', '\n', 'body')
-        
-        # Strong Traits
-        if strong_traits:
-            text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-            text_widget.insert('end', '💪 STRONG TRAITS (Important Characteristics)\n', 'section')
-            text_widget.insert('end', 'These medium-sized shapes represent significant aspects:\n\n', 'body')
-            
-            for trait, score in strong_traits:
-                trait_name = trait.replace('_', ' ').title()
-                shape = self.trait_info[trait]['shape'].title()
-                
-                text_widget.insert('end', f'◇ {trait_name} ', 'trait_name')
-                text_widget.insert('end', f'({score*100:.0f}% strength) - {shape}\n', 'body')
-                text_widget.insert('end', f'   {self.trait_info[trait]["description"]}\n\n', 'body')
-        
-        text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-        
-        # Visualization Interpretation
-        text_widget.insert('end', '🎨 VISUALIZATION INTERPRETATION\n', 'section')
-        text_widget.insert('end', 'Understanding your geometric profile:\n\n', 'body')
-        
-        interpretations = [
-            ('SIZE', 'Larger shapes indicate stronger traits (Gestalt visual hierarchy)'),
-            ('OPACITY', 'More solid shapes represent more dominant characteristics'),
-            ('COLOR', 'Each color chosen based on color psychology research (Elliot & Maier, 2014)'),
-            ('POSITION', 'Shapes arranged in a modified Fibonacci spiral pattern')
-        ]
-        for aspect, explanation in interpretations:
-            text_widget.insert('end', f'▸ {aspect}: ', 'subsection')
-            text_widget.insert('end', f'{explanation}\n', 'body')
-        
-        text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-        
-        # Spatial Arrangement
-        text_widget.insert('end', '🌀 SPATIAL ARRANGEMENT LOGIC\n', 'section')
-        text_widget.insert('end', 'The positioning follows visual perception principles:\n\n', 'body')
-        
-        spatial_points = [
-            ('Fibonacci Spiral', 'Based on the golden ratio found throughout nature'),
-            ('Hierarchical Center', 'Strongest traits closer to center (attention theory)'),
-            ('72° Distribution', 'Shapes spread evenly to avoid visual clustering'),
-            ('Progressive Radius', 'Each trait placed 0.5 units further from center'),
-            ('Personality Mandala', 'Creates a balanced, holistic representation')
-        ]
-        for point, explanation in spatial_points:
-            text_widget.insert('end', f'◆ {point}: ', 'subsection')
-            text_widget.insert('end', f'{explanation}\n', 'body')
-        
-        text_widget.insert('end', '\nThis arrangement symbolizes:\n', 'body')
-        text_widget.insert('end', '• Core traits influence peripheral traits\n', 'bullet')
-        text_widget.insert('end', '• The expanding pattern represents growth potential\n', 'bullet')
-        text_widget.insert('end', '• No trait exists in isolation - all are interconnected\n', 'bullet')
-        
-        text_widget.insert('end', '\n' + '─' * 80 + '\n\n', 'separator')
-        
-        # Personal Insights
-        text_widget.insert('end', '💡 PERSONAL INSIGHTS\n', 'section')
-        text_widget.insert('end', 'Based on personality psychology research:\n\n', 'body')
-        
-        if dominant_traits:
-            if any(t in ['compassionate', 'empathetic', 'peaceful'] for t, _ in dominant_traits):
-                text_widget.insert('end', '▸ Emotional Intelligence Profile:\n', 'subsection')
-                text_widget.insert('end', '   High interpersonal orientation ', 'body')
-                text_widget.insert('end', '(Goleman, 1995)\n', 'reference')
-                text_widget.insert('end', '• Strong capacity for understanding relationships\n', 'bullet')
-                text_widget.insert('end', '• Natural prosocial behavior tendency\n\n', 'bullet')
-                
-            if any(t in ['analytical', 'organized', 'decisive'] for t, _ in dominant_traits):
-                text_widget.insert('end', '▸ Systematic Processing Style:\n', 'subsection')
-                text_widget.insert('end', '   Executive function strengths ', 'body')
-                text_widget.insert('end', '(Stanovich & West, 2000)\n', 'reference')
-                text_widget.insert('end', '• Structured problem-solving preference\n', 'bullet')
-                text_widget.insert('end', '• High conscientiousness (Big Five)\n\n', 'bullet')
-                
-            if any(t in ['creative', 'intuitive', 'playful'] for t, _ in dominant_traits):
-                text_widget.insert('end', '▸ Openness to Experience:\n', 'subsection')
-                text_widget.insert('end', '   Divergent thinking abilities ', 'body')
-                text_widget.insert('end', '(McCrae & Costa, 1997)\n', 'reference')
-                text_widget.insert('end', '• Enhanced innovation capacity\n', 'bullet')
-                text_widget.insert('end', '• Cognitive flexibility\n\n', 'bullet')
-                
-            if any(t in ['ambitious', 'strong_willed', 'confident'] for t, _ in dominant_traits):
-                text_widget.insert('end', '▸ Achievement Orientation:\n', 'subsection')
-                text_widget.insert('end', '   High self-efficacy ', 'body')
-                text_widget.insert('end', '(Bandura, 1997)\n', 'reference')
-                text_widget.insert('end', '• Strong internal locus of control\n', 'bullet')
-                text_widget.insert('end', '• Leadership potential\n\n', 'bullet')
-        
-        text_widget.insert('end', '\n' + '━' * 80 + '\n\n', 'separator')
-        
-        # References
-        text_widget.insert('end', '📖 KEY REFERENCES\n', 'section')
-        references = [
-            'Arnheim, R. (1974). Art and visual perception.',
-            'Bandura, A. (1997). Self-efficacy: The exercise of control.',
-            'Costa, P. T., & McCrae, R. R. (1992). NEO-PI-R professional manual.',
-            'Deci, E. L., & Ryan, R. M. (2000). Self-determination theory.',
-            'Elliot, A. J., & Maier, M. A. (2014). Color psychology.',
-            'Goleman, D. (1995). Emotional intelligence.',
-            'Jung, C. G. (1964). Man and his symbols.',
-            'Peterson, C., & Seligman, M. E. (2004). Character strengths and virtues.',
-            'Salovey, P., & Mayer, J. D. (1990). Emotional intelligence framework.',
-            'Stanovich, K. E., & West, R. F. (2000). Individual differences in reasoning.'
-        ]
-        for ref in references:
-            text_widget.insert('end', f'• {ref}\n', 'reference')
-        
-        text_widget.insert('end', '\n' + '━' * 80 + '\n\n', 'separator')
-        
-        # Footer
-        text_widget.insert('end', '✨ Remember: ', 'highlight')
-        text_widget.insert('end', 'This visualization represents your self-perception at this moment. ', 'body')
-        text_widget.insert('end', 'Character traits can develop and change over time with conscious effort and life experiences.', 'body')
-        # Calculate normalized scores
-        max_score = 10  # Maximum possible score per trait
-        normalized_scores = {trait: score/max_score for trait, score in self.responses.items()}
-        
-        # Sort traits by score
-        sorted_traits = sorted(normalized_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Categorize traits
-        dominant_traits = [(t, s) for t, s in sorted_traits if s >= 0.7]
-        strong_traits = [(t, s) for t, s in sorted_traits if 0.5 <= s < 0.7]
-        moderate_traits = [(t, s) for t, s in sorted_traits if 0.3 <= s < 0.5]
-        
-        analysis = "CHARACTER PROFILE ANALYSIS\n" + "="*50 + "\n\n"
-        
-        # Scientific Foundation
-        analysis += "SCIENTIFIC FOUNDATION:\n"
-        analysis += "This assessment is grounded in established psychological research:\n\n"
-        analysis += "• The 20 traits selected integrate findings from:\n"
-        analysis += "  - The Big Five personality model (Costa & McCrae, 1992)\n"
-        analysis += "  - VIA Character Strengths framework (Peterson & Seligman, 2004)\n"
-        analysis += "  - Emotional Intelligence research (Goleman, 1995; Salovey & Mayer, 1990)\n"
-        analysis += "  - Self-Determination Theory (Deci & Ryan, 2000)\n\n"
-        analysis += "• Each trait represents a dimension validated through decades of research:\n"
-        analysis += "  - Cognitive traits (analytical, creative, wise) - linked to intelligence research\n"
-        analysis += "  - Emotional traits (empathetic, compassionate) - from emotional intelligence studies\n"
-        analysis += "  - Volitional traits (strong-willed, decisive) - from motivation psychology\n"
-        analysis += "  - Social traits (loyal, humble) - from interpersonal psychology research\n\n"
-        
-        # Overview
-        analysis += "YOUR PROFILE OVERVIEW:\n"
-        analysis += f"Your character profile reveals a unique combination of {len(dominant_traits)} dominant traits, "
-        analysis += f"{len(strong_traits)} strong traits, and {len(moderate_traits)} moderate traits.\n\n"
-        
-        # Dominant traits
-        if dominant_traits:
-            analysis += "DOMINANT TRAITS (Core Identity):\n"
-            analysis += "These shapes appear largest in your visualization, representing your strongest characteristics:\n\n"
-            for trait, score in dominant_traits:
-                trait_name = trait.replace('_', ' ').title()
-                shape = self.trait_info[trait]['shape']
-                analysis += f"• {trait_name} ({shape.title()} - {score*100:.0f}% strength)\n"
-                analysis += f"  {self.trait_info[trait]['description']}\n"
-                analysis += f"  This trait strongly defines how you interact with the world.\n\n"
-        
-        # Strong traits
-        if strong_traits:
-            analysis += "\nSTRONG TRAITS (Important Characteristics):\n"
-            analysis += "These medium-sized shapes represent significant aspects of your personality:\n\n"
-            for trait, score in strong_traits:
-                trait_name = trait.replace('_', ' ').title()
-                shape = self.trait_info[trait]['shape']
-                analysis += f"• {trait_name} ({shape.title()} - {score*100:.0f}% strength)\n"
-                analysis += f"  {self.trait_info[trait]['description']}\n\n"
-        
-        # Visualization explanation
-        analysis += "\nVISUALIZATION INTERPRETATION:\n"
-        analysis += "Your character visualization uses geometric shapes to represent your personality:\n\n"
-        analysis += "• SIZE: Larger shapes indicate stronger traits (based on Gestalt principles of visual hierarchy)\n"
-        analysis += "• OPACITY: More solid shapes represent more dominant characteristics\n"
-        analysis += "• COLOR: Each color chosen based on color psychology research (Elliot & Maier, 2014)\n"
-        analysis += "• POSITION: Shapes are arranged using a modified Fibonacci spiral pattern\n\n"
-        
-        analysis += "SPATIAL ARRANGEMENT LOGIC:\n"
-        analysis += "The geometric shapes are positioned using principles from visual perception research:\n\n"
-        analysis += "• SPIRAL PATTERN: Based on the golden spiral found in nature, creating visual harmony\n"
-        analysis += "• HIERARCHICAL PLACEMENT: Strongest traits positioned closer to center (attention theory)\n"
-        analysis += "• ANGULAR DISTRIBUTION: Shapes spread at 72° intervals to avoid clustering\n"
-        analysis += "• PROGRESSIVE DISTANCING: Each subsequent trait placed slightly further out\n"
-        analysis += "• This arrangement creates a 'personality mandala' - a balanced, holistic representation\n\n"
-        analysis += "The spiral arrangement reflects how personality traits interact:\n"
-        analysis += "- Core traits (center) influence and support peripheral traits\n"
-        analysis += "- The expanding pattern represents personal growth potential\n"
-        analysis += "- No trait exists in isolation - the pattern shows interconnection\n\n"
-        
-        # Personal insights
-        analysis += "PERSONAL INSIGHTS:\n"
-        analysis += "Based on personality psychology research, your trait combination suggests:\n\n"
-        if dominant_traits:
-            if any(t in ['compassionate', 'empathetic', 'peaceful'] for t, _ in dominant_traits):
-                analysis += "• High emotional intelligence and interpersonal orientation (Goleman, 1995)\n"
-                analysis += "  - Strong capacity for understanding and managing relationships\n"
-                analysis += "  - Natural tendency toward prosocial behavior\n"
-            if any(t in ['analytical', 'organized', 'decisive'] for t, _ in dominant_traits):
-                analysis += "• Systematic processing style and executive function strengths (Stanovich & West, 2000)\n"
-                analysis += "  - Preference for structured problem-solving approaches\n"
-                analysis += "  - High conscientiousness (Big Five framework)\n"
-            if any(t in ['creative', 'intuitive', 'playful'] for t, _ in dominant_traits):
-                analysis += "• Openness to experience and divergent thinking abilities (McCrae & Costa, 1997)\n"
-                analysis += "  - Enhanced capacity for innovation and novel solutions\n"
-                analysis += "  - Flexibility in cognitive processing\n"
-            if any(t in ['ambitious', 'strong_willed', 'confident'] for t, _ in dominant_traits):
-                analysis += "• High achievement motivation and self-efficacy (Bandura, 1997)\n"
-                analysis += "  - Strong internal locus of control\n"
-                analysis += "  - Leadership potential and goal-pursuit effectiveness\n"
-        
-        analysis += "\n" + "="*50 + "\n"
-        analysis += "KEY REFERENCES:\n"
-        analysis += "• Bandura, A. (1997). Self-efficacy: The exercise of control.\n"
-        analysis += "• Costa, P. T., & McCrae, R. R. (1992). NEO-PI-R professional manual.\n"
-        analysis += "• Deci, E. L., & Ryan, R. M. (2000). Self-determination theory.\n"
-        analysis += "• Elliot, A. J., & Maier, M. A. (2014). Color psychology.\n"
-        analysis += "• Goleman, D. (1995). Emotional intelligence.\n"
-        analysis += "• Peterson, C., & Seligman, M. E. (2004). Character strengths and virtues.\n"
-        analysis += "• Salovey, P., & Mayer, J. D. (1990). Emotional intelligence framework.\n"
-        analysis += "• Stanovich, K. E., & West, R. F. (2000). Individual differences in reasoning.\n\n"
-        analysis += "="*50 + "\n"
-        analysis += "Remember: This visualization represents your self-perception at this moment. "
-        analysis += "Character traits can develop and change over time with conscious effort and life experiences."
-        
-    def create_visualization(self):
-        fig, ax = plt.subplots(figsize=(10, 10))
-        ax.set_xlim(-10, 10)
-        ax.set_ylim(-10, 10)
-        ax.set_aspect('equal')
-        ax.axis('off')
-        
-        # Set background
-        ax.add_patch(plt.Rectangle((-10, -10), 20, 20, facecolor='#f0f0f0', alpha=0.3))
-        
-        # Calculate normalized scores
-        max_score = 10
-        normalized_scores = {trait: score/max_score for trait, score in self.responses.items()}
-        
-        # Sort traits by score for better visualization
-        sorted_traits = sorted(normalized_scores.items(), key=lambda x: x[1], reverse=True)
-        
-        # Create a spiral layout for shapes
-        num_shapes = len([t for t, s in sorted_traits if s > 0.3])
-        
-        for i, (trait, score) in enumerate(sorted_traits[:num_shapes]):
-            if score > 0.3:
-                # Calculate position in a spiral
-                angle = i * (2 * np.pi / 5)
-                radius = 2 + i * 0.5
-                x = radius * np.cos(angle)
-                y = radius * np.sin(angle)
-                
-                # Draw shape based on trait
-                color = self.trait_info[trait]['color']
-                self.draw_shape(ax, self.trait_info[trait]['shape'], x, y, score, color)
-        
-        # Add title
-        plt.title("Your Unique Character Profile", fontsize=16, fontweight='bold', pad=20)
-        
-        # Add subtitle explaining arrangement
-        plt.text(0, -9, "Shapes arranged in a Fibonacci spiral: strongest traits near center, " +
-                "size indicates trait strength", 
-                ha='center', fontsize=9, style='italic', color='gray')
-        
-        # Add subtle grid for reference
-        ax.grid(True, alpha=0.1, linestyle='--')
+        self.get_analysis_document().insert_into(text_widget)
+    
+    def get_profile(self):
+        # Scored once per session and shared by the visualization and analysis
+        if self.profile is None:
+            self.profile = self.scoring_engine().score_responses(self.responses).profile(0)
+        return self.profile
+    
+    def scoring_engine(self):
+        # The app's trait_info and questions come from the default catalog
+        # file, so its compiled form is loaded from the .npz cache instead
+        # of being recompiled for every session. Called from the results
+        # worker too; two threads racing here just build it twice.
+        if self.engine is None:
+            from character_scoring import ScoringEngine
+            from trait_catalog import load_compiled
+            self.engine = ScoringEngine(catalog=load_compiled())
+        return self.engine
+    
+    def get_analysis_document(self):
+        # Built once per session; other outputs reuse the same document
+        if self.analysis_document is None:
+            from analysis_document import build_analysis
+            self.analysis_document = build_analysis(self.get_profile(), self.trait_info)
+        return self.analysis_document
+    
+    @timed('create_visualization')
+    def create_visualization(self, profile=None):
+        # Called on the results worker with DRAW_LOCK held
+        from character_drawing import PROFILE_FIGSIZE, draw_profile
+        
+        if self.figure_pool is None:
+            from figure_pool import FigurePool
+            self.figure_pool = FigurePool()
+        fig = self.figure_pool.acquire(PROFILE_FIGSIZE)
+        try:
+            ax = fig.add_subplot()
+            draw_profile(ax, self.trait_info, (profile or self.get_profile()).sorted_traits)
+        except BaseException:
+            self.figure_pool.release(fig)
+            raise
         
         return fig
     
-    def draw_shape(self, ax, shape_type, x, y, intensity, color='blue'):
-        size = 0.5 + intensity * 1.5
-        alpha = 0.3 + intensity * 0.6
-        
-        if shape_type == 'circle':
-            circle = Circle((x, y), size, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(circle)
-            
-        elif shape_type == 'square':
-            square = Rectangle((x-size/2, y-size/2), size, size, alpha=alpha, color=color,
-                             edgecolor='black', linewidth=0.5)
-            ax.add_patch(square)
-            
-        elif shape_type == 'triangle':
-            triangle = Polygon([(x, y+size), (x-size*0.866, y-size*0.5), 
-                              (x+size*0.866, y-size*0.5)], alpha=alpha, color=color,
-                              edgecolor='black', linewidth=0.5)
-            ax.add_patch(triangle)
-            
-        elif shape_type == 'hexagon':
-            angles = np.linspace(0, 2*np.pi, 7)
-            points = [(x + size*np.cos(a), y + size*np.sin(a)) for a in angles]
-            hexagon = Polygon(points, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(hexagon)
-            
-        elif shape_type == 'star':
-            angles = np.linspace(0, 2*np.pi, 11)
-            points = []
-            for i, a in enumerate(angles[:-1]):
-                r = size if i % 2 == 0 else size * 0.5
-                points.append((x + r*np.cos(a), y + r*np.sin(a)))
-            star = Polygon(points, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(star)
-            
-        elif shape_type == 'diamond':
-            diamond = Polygon([(x, y+size), (x-size*0.7, y), (x, y-size), 
-                             (x+size*0.7, y)], alpha=alpha, color=color,
-                             edgecolor='black', linewidth=0.5)
-            ax.add_patch(diamond)
-            
-        elif shape_type == 'heart':
-            t = np.linspace(0, 2*np.pi, 100)
-            heart_x = x + size * (16*np.sin(t)**3) / 20
-            heart_y = y + size * (13*np.cos(t) - 5*np.cos(2*t) - 2*np.cos(3*t) - np.cos(4*t)) / 20
-            ax.fill(heart_x, heart_y, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            
-        elif shape_type == 'spiral':
-            theta = np.linspace(0, 4*np.pi, 100)
-            r = np.linspace(0, size, 100)
-            spiral_x = x + r * np.cos(theta)
-            spiral_y = y + r * np.sin(theta)
-            ax.plot(spiral_x, spiral_y, alpha=alpha, color=color, linewidth=3)
-            
-        elif shape_type == 'oval':
-            oval = mpatches.Ellipse((x, y), size*1.5, size, alpha=alpha, color=color,
-                                   edgecolor='black', linewidth=0.5)
-            ax.add_patch(oval)
-            
-        elif shape_type == 'arrow':
-            arrow = mpatches.FancyArrowPatch((x, y-size), (x, y+size),
-                                           arrowstyle='->', mutation_scale=20*size,
-                                           alpha=alpha, color=color, edgecolor='black')
-            ax.add_patch(arrow)
-            
-        elif shape_type == 'pentagon':
-            angles = np.linspace(0, 2*np.pi, 6)
-            points = [(x + size*np.cos(a-np.pi/2), y + size*np.sin(a-np.pi/2)) for a in angles]
-            pentagon = Polygon(points[:-1], alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(pentagon)
-            
-        elif shape_type == 'crescent':
-            arc = Wedge((x, y), size, 30, 330, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(arc)
-            
-        elif shape_type == 'sun':
-            # Central circle
-            sun = Circle((x, y), size*0.5, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(sun)
-            # Rays
-            for angle in np.linspace(0, 2*np.pi, 12, endpoint=False):
-                ray_x = [x + size*0.5*np.cos(angle), x + size*np.cos(angle)]
-                ray_y = [y + size*0.5*np.sin(angle), y + size*np.sin(angle)]
-                ax.plot(ray_x, ray_y, alpha=alpha, color=color, linewidth=2)
-                
-        elif shape_type == 'wave':
-            wave_x = np.linspace(x-size, x+size, 100)
-            wave_y = y + size*0.3*np.sin(4*np.pi*(wave_x-x)/size)
-            ax.plot(wave_x, wave_y, alpha=alpha, color=color, linewidth=3)
-            
-        elif shape_type == 'shield':
-            shield_points = [(x, y+size), (x-size*0.7, y+size*0.5), (x-size*0.7, y-size*0.3),
-                           (x, y-size), (x+size*0.7, y-size*0.3), (x+size*0.7, y+size*0.5)]
-            shield = Polygon(shield_points, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(shield)
-            
-        elif shape_type == 'eye':
-            # Eye shape
-            eye_x = np.linspace(x-size, x+size, 100)
-            eye_upper = y + size*0.5*np.sqrt(1-(eye_x-x)**2/size**2)
-            eye_lower = y - size*0.5*np.sqrt(1-(eye_x-x)**2/size**2)
-            ax.fill_between(eye_x, eye_lower, eye_upper, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            # Pupil
-            pupil = Circle((x, y), size*0.3, alpha=1, color='black')
-            ax.add_patch(pupil)
-            
-        elif shape_type == 'grid':
-            # Draw a grid pattern
-            for i in range(3):
-                ax.plot([x-size/2+i*size/2, x-size/2+i*size/2], [y-size/2, y+size/2], 
-                       alpha=alpha, color=color, linewidth=2)
-                ax.plot([x-size/2, x+size/2], [y-size/2+i*size/2, y-size/2+i*size/2], 
-                       alpha=alpha, color=color, linewidth=2)
-                       
-        elif shape_type == 'question':
-            # Draw a question mark
-            t = np.linspace(0, 1.5*np.pi, 50)
-            q_x = x + size*0.3*np.cos(t+np.pi/2)
-            q_y = y + size*0.3 + size*0.3*np.sin(t+np.pi/2)
-            ax.plot(q_x, q_y, alpha=alpha, color=color, linewidth=3)
-            # Dot
-            dot = Circle((x, y-size*0.3), size*0.1, alpha=alpha, color=color)
-            ax.add_patch(dot)
-            
-        elif shape_type == 'line':
-            ax.plot([x-size, x+size], [y, y], alpha=alpha, color=color, linewidth=4)
-            
-        elif shape_type == 'small_circle':
-            circle = Circle((x, y), size*0.5, alpha=alpha, color=color, edgecolor='black', linewidth=0.5)
-            ax.add_patch(circle)
-            
-        else:  # Default to circle
-            circle = Circle((x, y), size*0.7, alpha=alpha, color='gray', edgecolor='black', linewidth=0.5)
-            ax.add_patch(circle)
+    def archive_session(self):
+        # Keep the finished session in the respondent store so it survives
+        # restart; a failure here must not cost the user their results
+        if self.store_path is None:
+            return
+        try:
+            from respondent_store import RespondentStore
+            store = RespondentStore(self.store_path, self.scoring_engine())
+            row = store.append([self.answers])[0]
+            logger.info("Session stored as respondent %d in %s", row, self.store_path)
+        except (OSError, ValueError):
+            logger.exception("Could not archive the session to %s", self.store_path)
+    
+    def draw_shape(self, ax, shape_type, x, y, intensity, color='blue', size=None):
+        from character_drawing import draw_shape
+        draw_shape(ax, shape_type, x, y, intensity, color, size)
+    
+    def save_visualization(self):
+        # The embedded figure belongs to Tk, so the worker draws its own copy
+        # of the profile rather than encoding it off the main thread
+        from profile_export import start_export
+        if self.export_events is not None:
+            return
+        _, self.export_events = start_export(self.trait_info, self.get_profile().sorted_traits)
+        self.save_button.config(state='disabled')
+        self.export_progress['value'] = 0
+        self.export_progress.pack(side=tk.LEFT, padx=5)
+        self.export_status.config(text="Exporting...")
+        self.export_status.pack(side=tk.LEFT, padx=5)
+        self.export_job = self.root.after(EXPORT_POLL_MS, self.poll_export)
     
-    def save_visualization(self, fig):
-        fig.savefig('my_character_visualization.png', dpi=300, bbox_inches='tight')
-        messagebox.showinfo("Success", "Image saved as 'my_character_visualization.png'")
+    def poll_export(self):
+        self.export_job = None
+        finished = None
+        try:
+            while True:
+                event = self.export_events.get_nowait()
+                if event[0] == 'progress':
+                    _, done, total, label = event
+                    self.export_progress['value'] = done / total * 100
+                    self.export_status.config(text=f"Writing {label}")
+                else:
+                    finished = event
+        except queue.Empty:
+            pass
+        if finished is None:
+            self.export_job = self.root.after(EXPORT_POLL_MS, self.poll_export)
+            return
+        
+        self.export_events = None
+        self.save_button.config(state='normal')
+        self.export_progress.pack_forget()
+        self.export_status.pack_forget()
+        if finished[0] == 'error':
+            messagebox.showerror("Export failed", finished[1])
+            return
+        _, directory, manifest = finished
+        logger.info("Export to %s: %s", directory, ", ".join(
+            f"{entry['name']} {entry['bytes'] / 1024:.0f} KB {entry['encode_seconds'] * 1000:.0f} ms"
+            for entry in manifest['files']))
+        messagebox.showinfo("Success", f"Saved {len(manifest['files'])} files to '{directory}'")
     
     def restart(self):
+        if self.prebuild_job is not None:
+            self.root.after_cancel(self.prebuild_job)
+            self.prebuild_job = None
+        if self.export_job is not None:
+            # A running export still finishes and writes its files; only
+            # the progress display goes away with the results screen
+            self.root.after_cancel(self.export_job)
+            self.export_job = None
+        self.export_events = None
+        if self.results_job is not None:
+            # A worker still preparing the old results sees it is stale and
+            # stops, releasing its own figure; the UI never waits for it
+            self.root.after_cancel(self.results_job)
+            self.results_job = None
+        self.results_generation += 1
+        self.results_events = None
+        self.results = None
+        self.results_placeholder = None
+        self.pending_tabs = {}
+        self.results_requested_at = None
+        self.profile = None
+        self.analysis_document = None
         self.current_question = 0
         self.responses = {trait: 0 for trait in self.trait_info}
+        self.answers = []
+        self.start_session()
         for widget in self.main_frame.winfo_children():
             widget.destroy()
         self.setup_ui()
 
+def rss_bytes():
+    # Current resident set size; falls back to the peak where /proc is missing
+    import resource
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def run_soak_test(root, app, sessions, seed=0):
+    # Drive complete sessions with random answers and report RSS per cycle
+    rng = random.Random(seed)
+    samples = [rss_bytes()]
+    for cycle in range(1, sessions + 1):
+        while not app.survey_finished():
+            app.response_var.set(rng.randint(1, 5))
+            app.next_question()
+        # Let the lazily built tabs finish before tearing the session down
+        while app.pending_tabs:
+            root.update()
+        root.update()
+        app.restart()
+        root.update()
+        
+        samples.append(rss_bytes())
+        print(f"cycle {cycle:4d}: rss {samples[-1] / 1e6:8.1f} MB "
+              f"({(samples[-1] - samples[-2]) / 1024:+8.0f} KB)")
+    
+    # Skip the first cycle, which pays for one-time imports and caches
+    steady = samples[1:]
+    if len(steady) > 1:
+        growth = (steady[-1] - steady[0]) / (len(steady) - 1)
+        print(f"Mean RSS growth per cycle after warm-up: {growth / 1024:+.0f} KB")
+    if app.figure_pool is not None:
+        print(f"Figure pool: {app.figure_pool.stats()}")
+
+
+def print_startup_report(root, app):
+    # Paint the first question, then wait for the background warm-up so its
+    # cost is reported too
+    root.update()
+    first_question = time.perf_counter() - STARTUP_BEGAN
+    loaded = [name for name in ('matplotlib', 'numpy') if name in sys.modules]
+    app.warm_up_thread.join()
+    
+    print("Startup report")
+    print(f"  module imports          {startup_timings['imports'] * 1000:8.1f} ms")
+    print(f"  time to first question  {first_question * 1000:8.1f} ms")
+    print(f"  loaded at first paint   {', '.join(loaded) or 'tkinter only'}")
+    for key, label in (('plotting_import', 'plotting import (bg)'),
+                       ('legend_cache', 'legend cache (bg)')):
+        if key in startup_timings:
+            print(f"  {label:<23} {startup_timings[key] * 1000:8.1f} ms")
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character trait visualization")
+    parser.add_argument('--soak', type=int, metavar='N',
+                        help="Run N automated sessions and report memory growth")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Print import and time-to-first-question timings")
+    parser.add_argument('--store', metavar='DIR',
+                        help="Append every finished session to this respondent store")
+    parser.add_argument('--profile', nargs='?', const=instrumentation.DEFAULT_REPORT_PATH,
+                        metavar='PATH', help="Record phase timings and write them to PATH at "
+                                             "exit (.json, or .prom for Prometheus text)")
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help="Also run cProfile over the main thread and dump pstats to PATH")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="Skip questions that can no longer change a trait's category")
+    args = parser.parse_args()
+    if args.profile or args.cprofile:
+        instrumentation.enable(args.profile, args.cprofile)
+    
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
     root = tk.Tk()
-    app = CharacterVisualizationApp(root)
-    root.mainloop()
\ No newline at end of file
+    app = CharacterVisualizationApp(root, adaptive=args.adaptive)
+    app.store_path = args.store
+    if args.startup_report:
+        print_startup_report(root, app)
+    if args.soak:
+        run_soak_test(root, app, args.soak)
+        root.destroy()
+    else:
+        root.mainloop()
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""Opt-in phase timers and counters for attributing session latency.
+
+Off unless CHARVIZ_PROFILE is set or enable() is called, e.g. by the
+app's --profile flag. While it is off, timer() returns a shared no-op
+context manager and @timed functions call straight through. Instrumented
+code then pays only one attribute check.
+
+CHARVIZ_PROFILE=1 writes charviz_profile.json when the process exits. A
+path written in place of 1 is used instead. Paths ending in .prom get the
+Prometheus text format, anything else JSON. CHARVIZ_CPROFILE=path also
+runs cProfile over the main thread and writes pstats to that path.
+
+    CHARVIZ_PROFILE=session.prom python human_character_visualization.py
+    python human_character_visualization.py --profile --cprofile session.pstats
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+DEFAULT_REPORT_PATH = 'charviz_profile.json'
+
+# Upper bounds in seconds of the Prometheus histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 30.0)
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = False
+        self.report_path = None
+        self.profiler = None
+        self.profile_path = None
+        # Timers and counters may be fed from worker threads
+        self.lock = threading.Lock()
+        # (name, labels) -> [count, total, min, max, per-bucket counts]
+        self.timers = {}
+        self.counters = {}
+
+    def observe(self, name, seconds, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = [0, 0.0, seconds, seconds, [0] * len(BUCKETS)]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = min(timer[2], seconds)
+            timer[3] = max(timer[3], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    timer[4][i] += 1
+                    break
+
+    def count(self, name, amount, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+_recorder = Recorder()
+
+
+class _Timer:
+    __slots__ = ('name', 'labels', 'start')
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorder.observe(self.name, time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def enabled():
+    return _recorder.enabled
+
+
+def timer(name, **labels):
+    # with timer('savefig', format='png'): ...
+    if not _recorder.enabled:
+        return _NULL_TIMER
+    return _Timer(name, labels)
+
+
+def timed(name):
+    # Decorator timing every call of the function as phase name
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _recorder.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _recorder.observe(name, time.perf_counter() - start, {})
+        return wrapper
+    return decorate
+
+
+def observe(name, seconds, **labels):
+    # Records a duration measured elsewhere, e.g. between two callbacks
+    if _recorder.enabled:
+        _recorder.observe(name, seconds, labels)
+
+
+def count(name, amount=1, **labels):
+    if _recorder.enabled:
+        _recorder.count(name, amount, labels)
+
+
+def enable(report_path=DEFAULT_REPORT_PATH, cprofile_path=None):
+    # Starts recording; the report (and pstats dump) is written at exit
+    if not _recorder.enabled:
+        atexit.register(write_report)
+    _recorder.enabled = True
+    _recorder.report_path = report_path or _recorder.report_path or DEFAULT_REPORT_PATH
+    if cprofile_path and _recorder.profiler is None:
+        import cProfile
+        _recorder.profiler = cProfile.Profile()
+        _recorder.profile_path = cprofile_path
+        _recorder.profiler.enable()
+
+
+def snapshot():
+    with _recorder.lock:
+        timers = [{
+            'name': name,
+            'labels': dict(labels),
+            'count': count_,
+            'total_seconds': total,
+            'mean_seconds': total / count_,
+            'min_seconds': low,
+            'max_seconds': high,
+        } for (name, labels), (count_, total, low, high, _) in sorted(_recorder.timers.items())]
+        counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                    for (name, labels), value in sorted(_recorder.counters.items())]
+    return {'timers': timers, 'counters': counters}
+
+
+def _label_text(pairs):
+    escaped = ('{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+               for key, value in pairs)
+    return '{' + ','.join(escaped) + '}' if pairs else ''
+
+
+def to_prometheus():
+    lines = ['# HELP charviz_phase_seconds Time spent in each instrumented phase',
+             '# TYPE charviz_phase_seconds histogram']
+    with _recorder.lock:
+        timers = sorted(_recorder.timers.items())
+        counters = sorted(_recorder.counters.items())
+    for (name, labels), (count_, total, _, _, buckets) in timers:
+        pairs = (('phase', name),) + labels
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            lines.append(f'charviz_phase_seconds_bucket{_label_text(pairs + (("le", bound),))} '
+                         f'{cumulative}')
+        lines.append(f'charviz_phase_seconds_bucket{_label_text(pairs + (("le", "+Inf"),))} '
+                     f'{count_}')
+        lines.append(f'charviz_phase_seconds_sum{_label_text(pairs)} {total!r}')
+        lines.append(f'charviz_phase_seconds_count{_label_text(pairs)} {count_}')
+    if counters:
+        lines += ['# HELP charviz_events_total Instrumented event counts',
+                  '# TYPE charviz_events_total counter']
+        for (name, labels), value in counters:
+            lines.append(f'charviz_events_total{_label_text((("event", name),) + labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_report(path=None):
+    path = path or _recorder.report_path or DEFAULT_REPORT_PATH
+    if _recorder.profiler is not None:
+        _recorder.profiler.disable()
+        _recorder.profiler.dump_stats(_recorder.profile_path)
+        _recorder.profiler = None
+    text = to_prometheus() if path.endswith('.prom') else json.dumps(snapshot(), indent=2)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+def enable_from_environment():
+    setting = os.environ.get('CHARVIZ_PROFILE', '')
+    cprofile_path = os.environ.get('CHARVIZ_CPROFILE')
+    if setting.lower() in ('', '0', 'false', 'no') and not cprofile_path:
+        return
+    path = None if setting.lower() in ('', '0', 'false', 'no', '1', 'true', 'yes') else setting
+    enable(path, cprofile_path)
+
+
+enable_from_environment()
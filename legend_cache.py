@@ -0,0 +1,87 @@
+"""Render-once disk cache for the Shape Meanings legend.
+
+The legend only depends on the trait catalog, so images are rendered to
+PNG once and stored under content-addressed names: a hash of what is
+drawn, the DPI and the matplotlib version. Any change to the catalog
+produces a new key, so stale images are never served.
+
+The Tk app shows the legend one tile per trait (see legend_view) and
+caches each tile separately, so a catalog of any size costs only the
+tiles that get scrolled into view.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+import instrumentation
+from cache_paths import cache_dir
+
+# Bump when character_drawing.draw_legend_tile changes
+LEGEND_TILE_VERSION = 1
+
+# Matches the resolution of the embedded FigureCanvasTkAgg it replaces
+LEGEND_DPI = 100
+
+
+def legend_tile_key(trait, info, dpi=LEGEND_DPI):
+    import matplotlib
+    payload = json.dumps({
+        'version': LEGEND_TILE_VERSION,
+        'matplotlib': matplotlib.__version__,
+        'dpi': dpi,
+        'trait': trait,
+        'info': info,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_legend_tile(trait, info, target, dpi=LEGEND_DPI):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from character_drawing import DRAW_LOCK, LEGEND_TILE_FIGSIZE, draw_legend_tile_figure
+
+    with DRAW_LOCK:
+        fig = Figure(figsize=LEGEND_TILE_FIGSIZE)
+        FigureCanvasAgg(fig)
+        draw_legend_tile_figure(fig, trait, info)
+        with instrumentation.timer('savefig', format='png', output='legend_tile'):
+            fig.savefig(target, format='png', dpi=dpi)
+
+
+def _cached_png(path, render):
+    if os.path.exists(path):
+        return path
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file and rename so concurrent sessions never see
+    # a half-written image
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.png.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            render(f)
+        # mkstemp creates 0600 files; the cache is shared between kiosk users
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def legend_tile_cached_path(trait, info, dpi=LEGEND_DPI, directory=None):
+    # Where the tile is (or will be) cached, without rendering it
+    directory = directory or cache_dir('legend_tiles')
+    return os.path.join(directory, f'tile-{legend_tile_key(trait, info, dpi)}.png')
+
+
+def legend_tile_path(trait, info, dpi=LEGEND_DPI, directory=None):
+    path = legend_tile_cached_path(trait, info, dpi, directory)
+    return _cached_png(path, lambda f: render_legend_tile(trait, info, f, dpi))
+
+
+def warm_legend_tiles(trait_info, count, dpi=LEGEND_DPI):
+    # Renders the first count tiles, i.e. the legend's first screen
+    for trait in list(trait_info)[:count]:
+        legend_tile_path(trait, trait_info[trait], dpi)
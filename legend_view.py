@@ -0,0 +1,279 @@
+"""Virtualized Shape Meanings legend for the Tk results screen.
+
+The legend is a grid of one tile per trait on a tk.Canvas. Only rows in
+or near the viewport have canvas items. A tile is shown from memory,
+from the per-tile disk cache (legend_cache.legend_tile_path), or as a
+placeholder while a background thread renders it. Requests are served
+newest first, and a request for a tile that has scrolled out of range
+before its turn is dropped. Rows more than KEEP_ROWS past the viewport
+lose their canvas items and PhotoImages, so memory depends on the window
+size, not on the size of the catalog.
+"""
+import logging
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+import instrumentation
+from legend_cache import LEGEND_DPI, legend_tile_cached_path, legend_tile_path
+
+logger = logging.getLogger(__name__)
+
+# Rows rendered ahead of the viewport in each direction
+PREFETCH_ROWS = 2
+
+# Rows kept in memory either side of the viewport; anything farther is
+# evicted and comes back from the disk cache if scrolled to again
+KEEP_ROWS = 6
+
+# Tiles to have on disk before the legend is first opened: two rows of a
+# typical window
+FIRST_SCREEN_TILES = 8
+
+# How often finished renders are picked up while any are outstanding
+TILE_POLL_MS = 30
+
+# Pixels scrolled per mouse wheel notch
+WHEEL_STEP_PX = 60
+
+
+def grid_shape(width, count, tile_width):
+    # (columns, rows) of the tile grid for a canvas width in pixels
+    columns = max(1, width // tile_width)
+    return columns, -(-count // columns)
+
+
+def row_window(top, height, rows, margin, tile_height):
+    # Rows overlapping the pixel span [top, top + height), widened by
+    # margin rows either side and clipped to the grid
+    first = max(0, int(top // tile_height) - margin)
+    last = min(rows, int(-(-(top + height) // tile_height)) + margin)
+    return range(first, max(first, last))
+
+
+def tiles_in_rows(row_range, columns, count):
+    return range(row_range.start * columns, min(count, row_range.stop * columns))
+
+
+class TileRenderer:
+    # One daemon thread rendering tiles into the disk cache. Requests are
+    # taken newest first; ones no longer in `wanted` are skipped. Results
+    # arrive on `finished` as (index, outcome, path), outcome being
+    # 'rendered', 'skipped' or 'failed'; path is None unless rendered.
+    def __init__(self, trait_info, traits, dpi=LEGEND_DPI):
+        self.trait_info = trait_info
+        self.traits = traits
+        self.dpi = dpi
+        self.requests = queue.LifoQueue()
+        self.finished = queue.Queue()
+        # Replaced wholesale by the main thread, so reads need no lock
+        self.wanted = frozenset()
+        self.thread = threading.Thread(target=self.run, name='legend-tiles', daemon=True)
+        self.thread.start()
+
+    def request(self, index):
+        self.requests.put(index)
+
+    def stop(self):
+        self.requests.put(None)
+
+    def run(self):
+        while True:
+            index = self.requests.get()
+            if index is None:
+                return
+            if index not in self.wanted:
+                self.finished.put((index, 'skipped', None))
+                continue
+            trait = self.traits[index]
+            try:
+                with instrumentation.timer('legend_tile_render'):
+                    path = legend_tile_path(trait, self.trait_info[trait], self.dpi)
+            except Exception:
+                logger.exception("Rendering the legend tile for %s failed", trait)
+                self.finished.put((index, 'failed', None))
+            else:
+                self.finished.put((index, 'rendered', path))
+
+
+class VirtualLegend(ttk.Frame):
+    def __init__(self, parent, trait_info, dpi=LEGEND_DPI, **kwargs):
+        super().__init__(parent, **kwargs)
+        from character_drawing import LEGEND_TILE_FIGSIZE
+
+        self.trait_info = trait_info
+        self.traits = list(trait_info)
+        self.dpi = dpi
+        self.tile_width = round(LEGEND_TILE_FIGSIZE[0] * dpi)
+        self.tile_height = round(LEGEND_TILE_FIGSIZE[1] * dpi)
+        self.columns, self.rows = 1, len(self.traits)
+        self.offset = 0
+
+        # index -> PhotoImage, and index -> canvas items currently drawn
+        self.images = {}
+        self.items = {}
+        self.requested = set()
+        # Tiles that failed to render keep their placeholder and are not
+        # retried, which would only repeat the error every poll
+        self.failed = set()
+        self.renderer = None
+        self.refresh_job = None
+        self.poll_job = None
+
+        self.canvas = tk.Canvas(self, highlightthickness=0, background='white')
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll, yscrollincrement=1)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.canvas.bind('<Configure>', self.on_resize)
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', self.on_wheel)
+        self.canvas.bind('<Button-5>', self.on_wheel)
+        self.canvas.bind('<Destroy>', self.on_destroy)
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self.schedule_refresh()
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.canvas.yview_scroll(-WHEEL_STEP_PX, 'units')
+        else:
+            self.canvas.yview_scroll(WHEEL_STEP_PX, 'units')
+
+    def on_resize(self, event):
+        columns, rows = grid_shape(event.width, len(self.traits), self.tile_width)
+        offset = (event.width - columns * self.tile_width) // 2
+        if (columns, offset) != (self.columns, self.offset):
+            # Tiles move to new cells; images stay cached and are redrawn
+            self.columns, self.rows, self.offset = columns, rows, offset
+            self.canvas.delete('tile')
+            self.items.clear()
+        self.canvas.configure(scrollregion=(0, 0, event.width, self.rows * self.tile_height))
+        self.schedule_refresh()
+
+    def on_destroy(self, event):
+        if self.renderer is not None:
+            self.renderer.stop()
+            self.renderer = None
+        for job in (self.refresh_job, self.poll_job):
+            if job is not None:
+                self.after_cancel(job)
+        self.refresh_job = self.poll_job = None
+        self.images.clear()
+
+    def schedule_refresh(self):
+        # Scrolling fires many events per frame; refresh once they settle
+        if self.refresh_job is None:
+            self.refresh_job = self.after_idle(self.refresh)
+
+    def windows(self):
+        # (shown, prefetched, kept) ranges of tile indices
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        count = len(self.traits)
+        return tuple(tiles_in_rows(row_window(top, height, self.rows, margin, self.tile_height),
+                                   self.columns, count)
+                     for margin in (0, PREFETCH_ROWS, KEEP_ROWS))
+
+    @instrumentation.timed('legend_refresh')
+    def refresh(self):
+        self.refresh_job = None
+        shown, prefetched, kept = self.windows()
+
+        for index in [i for i in self.items if i not in kept]:
+            self.canvas.delete(*self.items.pop(index))
+        evicted = [i for i in self.images if i not in kept]
+        for index in evicted:
+            del self.images[index]
+        if evicted:
+            instrumentation.count('legend_tile_evicted', len(evicted))
+
+        missing = []
+        for index in prefetched:
+            if index not in self.images and index not in self.failed:
+                path = legend_tile_cached_path(self.traits[index],
+                                               self.trait_info[self.traits[index]], self.dpi)
+                if os.path.exists(path):
+                    self.load(index, path, 'disk')
+                else:
+                    missing.append(index)
+            if index in self.items:
+                continue
+            if index in self.images:
+                self.draw_image(index)
+            else:
+                self.draw_placeholder(index)
+
+        if self.renderer is not None:
+            self.renderer.wanted = frozenset(prefetched)
+        if missing:
+            self.request(missing, shown, prefetched)
+
+    def request(self, missing, shown, prefetched):
+        if self.renderer is None:
+            self.renderer = TileRenderer(self.trait_info, self.traits, self.dpi)
+            self.renderer.wanted = frozenset(prefetched)
+        # Served last in, first out: prefetched rows go in first, then the
+        # visible tiles bottom up so the top left one is rendered first
+        for index in sorted(missing, key=lambda i: (i in shown, -i)):
+            if index not in self.requested:
+                self.requested.add(index)
+                self.renderer.request(index)
+        if self.poll_job is None:
+            self.poll_job = self.after(TILE_POLL_MS, self.poll)
+
+    def poll(self):
+        self.poll_job = None
+        if self.renderer is None:
+            return
+        _, prefetched, kept = self.windows()
+        while True:
+            try:
+                index, outcome, path = self.renderer.finished.get_nowait()
+            except queue.Empty:
+                break
+            self.requested.discard(index)
+            if outcome == 'failed':
+                self.failed.add(index)
+                instrumentation.count('legend_tile_failed')
+            elif outcome == 'rendered' and index in kept:
+                self.load(index, path, 'render')
+                self.draw_image(index)
+            elif outcome == 'skipped' and index in prefetched:
+                # Skipped while out of range but wanted again since
+                self.requested.add(index)
+                self.renderer.request(index)
+        self.renderer.wanted = frozenset(prefetched)
+        if self.requested:
+            self.poll_job = self.after(TILE_POLL_MS, self.poll)
+
+    def load(self, index, path, source):
+        self.images[index] = tk.PhotoImage(file=path)
+        instrumentation.count('legend_tile', source=source)
+
+    def cell(self, index):
+        row, column = divmod(index, self.columns)
+        return self.offset + column * self.tile_width, row * self.tile_height
+
+    def draw_image(self, index):
+        if index in self.items:
+            self.canvas.delete(*self.items.pop(index))
+        x, y = self.cell(index)
+        self.items[index] = (self.canvas.create_image(x, y, image=self.images[index],
+                                                      anchor='nw', tags='tile'),)
+
+    def draw_placeholder(self, index):
+        x, y = self.cell(index)
+        pad = 8
+        self.items[index] = (
+            self.canvas.create_rectangle(x + pad, y + pad, x + self.tile_width - pad,
+                                         y + self.tile_height - pad, outline='#dddddd',
+                                         tags='tile'),
+            self.canvas.create_text(x + self.tile_width / 2, y + self.tile_height / 2,
+                                    text=self.traits[index].replace('_', ' ').title(),
+                                    fill='gray', font=('Arial', 11), tags='tile'),
+        )
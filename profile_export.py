@@ -0,0 +1,185 @@
+"""Export a character profile to several formats off the Tk main thread.
+
+The worker draws the profile once into its own Agg figure, which is never
+attached to Tk, then saves it as PNG at each requested DPI, SVG and PDF.
+Each export gets a fresh directory, so repeated saves never overwrite
+each other. Files are written under a temporary name and renamed when
+complete. A manifest.json records every file's size and encode time.
+The drawing and each save hold character_drawing.DRAW_LOCK, like every
+other matplotlib call the app makes off the main thread.
+
+Progress is reported as tuples on a queue.Queue, which the Tk app polls
+with root.after:
+
+    ('progress', done, total, label)
+    ('done', directory, manifest)
+    ('error', message)
+
+    python profile_export.py responses.csv --row 0 -o character_exports
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+import instrumentation
+
+DEFAULT_EXPORT_DIR = 'character_exports'
+
+# (format, dpi) pairs; dpi is None for the vector formats. A 600 dpi PNG
+# takes longer to encode than all of these together, so it is opt-in
+# (--format png@600)
+DEFAULT_FORMATS = (('png', 100), ('png', 300), ('svg', None), ('pdf', None))
+
+
+def export_name(fmt, dpi):
+    return f'character_{dpi}dpi.{fmt}' if dpi else f'character.{fmt}'
+
+
+def unique_directory(base, stem):
+    # os.mkdir fails if the directory exists, so concurrent exports (even
+    # from separate processes) never share one
+    os.makedirs(base, exist_ok=True)
+    for attempt in range(1000):
+        path = os.path.join(base, stem if attempt == 0 else f'{stem}-{attempt}')
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            continue
+    raise OSError(f"Could not find a free export directory for {stem} in {base}")
+
+
+def _write_atomically(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def export_profile(trait_info, sorted_traits, base=DEFAULT_EXPORT_DIR,
+                   formats=DEFAULT_FORMATS, progress=None):
+    # Writes every format into a new directory under base and returns
+    # (directory, manifest). progress, if given, is called with
+    # (done, total, label) before each file and once at the end.
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from character_drawing import DRAW_LOCK, PROFILE_FIGSIZE, draw_profile
+
+    # The same pair twice would only encode the same file twice
+    formats = tuple(dict.fromkeys(formats))
+    directory = unique_directory(base, time.strftime('character_%Y%m%d-%H%M%S'))
+    report = progress or (lambda done, total, label: None)
+    total = len(formats)
+
+    start = time.perf_counter()
+    with DRAW_LOCK:
+        fig = Figure(figsize=PROFILE_FIGSIZE)
+        FigureCanvasAgg(fig)
+        draw_profile(fig.add_subplot(), trait_info, sorted_traits)
+    manifest = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'scores': dict(sorted_traits),
+        'draw_seconds': time.perf_counter() - start,
+        'files': [],
+    }
+
+    for done, (fmt, dpi) in enumerate(formats):
+        name = export_name(fmt, dpi)
+        report(done, total, name)
+        start = time.perf_counter()
+        path = os.path.join(directory, name)
+        # Taken per file so the results screen and legend can draw between
+        # the slow encodes
+        with DRAW_LOCK, instrumentation.timer('savefig', format=fmt, output='export'):
+            _write_atomically(path, lambda f: fig.savefig(f, format=fmt, dpi=dpi or 'figure',
+                                                          bbox_inches='tight'))
+        manifest['files'].append({
+            'name': name,
+            'format': fmt,
+            'dpi': dpi,
+            'bytes': os.path.getsize(path),
+            'encode_seconds': time.perf_counter() - start,
+        })
+    report(total, total, 'manifest.json')
+
+    _write_atomically(os.path.join(directory, 'manifest.json'),
+                      lambda f: f.write(json.dumps(manifest, indent=2).encode('utf-8')))
+    return directory, manifest
+
+
+def start_export(trait_info, sorted_traits, base=DEFAULT_EXPORT_DIR, formats=DEFAULT_FORMATS):
+    # Runs export_profile on a daemon thread. Returns (thread, events) where
+    # events is the queue the progress tuples described above arrive on.
+    events = queue.Queue()
+
+    def run():
+        try:
+            directory, manifest = export_profile(
+                trait_info, sorted_traits, base, formats,
+                lambda done, total, label: events.put(('progress', done, total, label)))
+            events.put(('done', directory, manifest))
+        except Exception as e:
+            events.put(('error', str(e)))
+
+    thread = threading.Thread(target=run, name='profile-export', daemon=True)
+    thread.start()
+    return thread, events
+
+
+def parse_formats(specs):
+    # 'png@300', 'svg' and 'pdf' style specs
+    formats = []
+    for spec in specs:
+        fmt, _, dpi = spec.partition('@')
+        if fmt not in ('png', 'svg', 'pdf'):
+            raise ValueError(f"Unsupported export format {fmt!r}")
+        formats.append((fmt, int(dpi) if dpi else (100 if fmt == 'png' else None)))
+    return tuple(dict.fromkeys(formats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export one respondent's profile in several "
+                                                 "formats")
+    parser.add_argument('responses', help="N x Q answer matrix as .csv or .npy")
+    parser.add_argument('--row', type=int, default=0, help="Respondent to export")
+    parser.add_argument('-o', '--output', default=DEFAULT_EXPORT_DIR,
+                        help="Directory the export folder is created in")
+    parser.add_argument('--format', action='append', dest='formats', metavar='FMT[@DPI]',
+                        help="png@DPI, svg or pdf; repeatable (default: "
+                             + ", ".join(f'{f}@{d}' if d else f for f, d in DEFAULT_FORMATS) + ")")
+    args = parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    from character_scoring import ScoringEngine, load_response_matrix
+    from trait_catalog import TRAIT_INFO
+
+    try:
+        formats = parse_formats(args.formats) if args.formats else DEFAULT_FORMATS
+        batch = ScoringEngine().score(load_response_matrix(args.responses))
+        if not 0 <= args.row < len(batch):
+            raise ValueError(f"Row {args.row} is out of range for {len(batch)} respondents")
+        directory, manifest = export_profile(TRAIT_INFO, batch.profile(args.row).sorted_traits,
+                                             args.output, formats)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    print(f"Exported to {directory} (drawn in {manifest['draw_seconds'] * 1000:.0f} ms)",
+          file=sys.stderr)
+    for entry in manifest['files']:
+        print(f"  {entry['name']:<22} {entry['bytes'] / 1024:9.1f} KB "
+              f"{entry['encode_seconds'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
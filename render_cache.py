@@ -0,0 +1,137 @@
+"""Content-addressed cache of rendered profile images.
+
+Every trait score is the sum of two 1-5 answers, so many respondents share
+an identical score vector and therefore an identical image. Renders are
+keyed by the raw score vector plus the render parameters (format, DPI,
+figure size, bounding box and renderer; see batch_render.render_params)
+and the trait catalog, and kept in two tiers: an in-memory LRU bounded by
+bytes in front of an on-disk store that is shared between processes and
+runs. The memory tier and counters are guarded by a lock,
+so an asyncio server can do the disk I/O on executor threads.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from trait_catalog import TRAIT_INFO
+
+# Bump when anything that changes the rendered output changes
+RENDER_CACHE_VERSION = 1
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+
+
+def catalog_digest(trait_info):
+    return hashlib.sha256(json.dumps(trait_info, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory=None, memory_bytes=DEFAULT_MEMORY_BYTES, trait_info=TRAIT_INFO):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.catalog = catalog_digest(trait_info)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def key(self, raw, **params):
+        digest = hashlib.sha256()
+        digest.update(np.asarray(raw, dtype='<i4').tobytes())
+        digest.update(json.dumps({'version': RENDER_CACHE_VERSION, 'catalog': self.catalog,
+                                  'params': params}, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        # Returns (data, tier) where tier is 'memory', 'disk' or None on a miss
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return data, 'memory'
+
+        if self.directory:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                pass
+            else:
+                with self.lock:
+                    self.disk_hits += 1
+                    self._remember(key, data)
+                return data, 'disk'
+
+        with self.lock:
+            self.misses += 1
+        return None, None
+
+    def put(self, key, data):
+        with self.lock:
+            self._remember(key, data)
+        if not self.directory:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic rename so other processes never read a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get_or_render(self, key, render):
+        data, tier = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+            return data, 'render'
+        return data, tier
+
+    def _remember(self, key, data):
+        # Caller holds self.lock
+        if len(data) > self.memory_bytes:
+            return
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = data
+        self.memory_used += len(data)
+        while self.memory_used > self.memory_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= len(evicted)
+            self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return self._stats()
+
+    def _stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory_used,
+        }
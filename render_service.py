@@ -0,0 +1,276 @@
+"""Local asyncio HTTP service for character images and analyses.
+
+    POST /render   {"answers": [1-5, ...], "format": "png" | "svg"}
+    GET  /metrics  request counts, concurrency and latency percentiles
+    GET  /healthz
+
+/render scores the answers exactly like the Tk app, builds the analysis
+document and renders PNGs in a bounded process pool, so the event loop
+never blocks on matplotlib; SVGs come from the direct SVG writer. Images
+are cached by score vector in the service process, so repeated profiles
+skip the pool entirely. The response is JSON with the scores, categories,
+structured analysis and the base64-encoded image.
+
+The service only binds to localhost.
+
+    python render_service.py --port 8765 --workers 4
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from analysis_document import build_analysis
+from batch_render import DEFAULT_DPI, init_worker, render_bytes, render_params
+from character_scoring import CATEGORY_NAMES, ScoringEngine
+from render_cache import RenderCache
+from stream_pipeline import StageStats
+from svg_writer import profile_svg
+from trait_catalog import TRAIT_INFO
+
+HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_CONCURRENCY = 8
+# Requests allowed to wait for a render slot before we answer 503
+DEFAULT_MAX_QUEUE = 32
+MAX_BODY_BYTES = 64 * 1024
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class RenderService:
+    def __init__(self, workers=None, dpi=DEFAULT_DPI, max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                 max_queue=DEFAULT_MAX_QUEUE, cache_dir=None):
+        self.engine = ScoringEngine()
+        self.dpi = dpi
+        self.cache = RenderCache(cache_dir)
+        # Workers start on the first render; forked then, they would inherit
+        # open client sockets and keep those connections from ever closing
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                        initargs=(dpi,),
+                                        mp_context=multiprocessing.get_context('spawn'))
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.pending = 0
+        self.requests = 0
+        self.rejected = 0
+        self.errors = 0
+        # Images actually drawn, as opposed to served from the cache
+        self.rendered = 0
+        self.latency = StageStats('render')
+
+    async def render(self, payload):
+        if not isinstance(payload, dict) or 'answers' not in payload:
+            raise HTTPError(400, "Body must be a JSON object with an 'answers' list")
+        fmt = payload.get('format', 'png')
+        if fmt not in FORMATS:
+            raise HTTPError(400, f"format must be one of {', '.join(FORMATS)}")
+        try:
+            scores = self.engine.score(payload['answers'])
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e))
+        if len(scores) != 1:
+            raise HTTPError(400, "Send the answers of exactly one respondent")
+
+        profile = scores.profile(0)
+        raw = scores.raw[0].tolist()
+        # SVGs come from svg_writer, not savefig; a cache directory shared
+        # with batch_render must not mix the two
+        if fmt == 'svg':
+            params = {'format': fmt, 'dpi': self.dpi, 'renderer': 'svg_writer'}
+        else:
+            params = render_params(fmt, self.dpi)
+        key = self.cache.key(raw, **params)
+        # The cache may read and write sharded files, which must not stall
+        # the event loop
+        loop = asyncio.get_running_loop()
+        image, _ = await loop.run_in_executor(None, self.cache.get, key)
+        if image is None and fmt == 'svg':
+            # Written directly in well under a millisecond; no pool round trip
+            image = profile_svg(TRAIT_INFO, profile.sorted_traits).encode('utf-8')
+            self.rendered += 1
+            await loop.run_in_executor(None, self.cache.put, key, image)
+        elif image is None:
+            if self.pending >= self.max_concurrency + self.max_queue:
+                self.rejected += 1
+                raise HTTPError(503, "Too many pending renders")
+            self.pending += 1
+            try:
+                async with self.slots:
+                    image = await loop.run_in_executor(self.pool, partial(render_bytes, (raw, fmt)))
+            finally:
+                self.pending -= 1
+            self.rendered += 1
+            await loop.run_in_executor(None, self.cache.put, key, image)
+
+        return {
+            'scores': dict(zip(scores.traits, scores.normalized[0].tolist())),
+            'categories': {trait: CATEGORY_NAMES[code]
+                           for trait, code in zip(scores.traits, scores.categories[0])},
+            'dominant': [t for t, _ in profile.dominant],
+            'strong': [t for t, _ in profile.strong],
+            'moderate': [t for t, _ in profile.moderate],
+            'analysis': build_analysis(profile, TRAIT_INFO).to_dict(),
+            'image': {
+                'format': fmt,
+                'content_type': FORMATS[fmt],
+                'base64': base64.b64encode(image).decode('ascii'),
+            },
+        }
+
+    def metrics(self):
+        return {
+            'requests': self.requests,
+            'rendered': self.rendered,
+            'rejected': self.rejected,
+            'errors': self.errors,
+            'pending': self.pending,
+            'max_concurrency': self.max_concurrency,
+            'max_queue': self.max_queue,
+            'latency_ms': {f'p{int(q * 100)}': self.latency.percentile(q) * 1000
+                           for q in (0.5, 0.9, 0.95, 0.99)},
+            'cache': self.cache.stats(),
+        }
+
+    async def dispatch(self, method, path, body):
+        if path == '/healthz':
+            return {'status': 'ok'}
+        if path == '/metrics':
+            return self.metrics()
+        if path != '/render':
+            raise HTTPError(404, f"No route for {path}")
+        if method != 'POST':
+            raise HTTPError(405, "Use POST")
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+
+        start = time.perf_counter()
+        result = await self.render(payload)
+        self.latency.record(time.perf_counter() - start)
+        return result
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = await self.handle_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def handle_request(self, request_line, reader, writer):
+        status, result = 200, None
+        keep_alive = True
+        try:
+            try:
+                method, path, version = request_line.decode('latin-1').split()
+            except ValueError:
+                raise HTTPError(400, "Malformed request line")
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = (version == 'HTTP/1.1' and
+                          headers.get('connection', '').lower() != 'close')
+
+            try:
+                length = int(headers.get('content-length') or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                # The body's extent is unknown, so the connection can't be reused
+                keep_alive = False
+                raise HTTPError(400, "Invalid Content-Length")
+            if length > MAX_BODY_BYTES:
+                keep_alive = False
+                raise HTTPError(413, "Request body too large")
+            body = await reader.readexactly(length) if length else b''
+
+            self.requests += 1
+            result = await self.dispatch(method, path.split('?', 1)[0], body)
+        except HTTPError as e:
+            status, result = e.status, {'error': str(e)}
+        except Exception as e:
+            self.errors += 1
+            status, result = 500, {'error': f"{type(e).__name__}: {e}"}
+
+        payload = json.dumps(result).encode('utf-8')
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                     .encode('latin-1') + payload)
+        await writer.drain()
+        return keep_alive
+
+    def close(self):
+        self.pool.shutdown()
+
+
+async def start_server(service, port=DEFAULT_PORT):
+    # Port 0 picks a free port; read it back from server.sockets
+    return await asyncio.start_server(service.handle_connection, HOST, port)
+
+
+async def serve(port=DEFAULT_PORT, **options):
+    service = RenderService(**options)
+    server = await start_server(service, port)
+    port = server.sockets[0].getsockname()[1]
+    print(f"Serving on http://{HOST}:{port}", file=sys.stderr, flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local character visualization render service")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="0 picks a free port")
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Renders running at once")
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Renders allowed to wait before requests get 503")
+    parser.add_argument('--cache-dir', help="Persist rendered images here across restarts")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.port, workers=args.workers, dpi=args.dpi,
+                          max_concurrency=args.max_concurrency, max_queue=args.max_queue,
+                          cache_dir=args.cache_dir))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
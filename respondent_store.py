@@ -0,0 +1,218 @@
+"""Append-only, memory-mapped columnar store of respondents.
+
+A store is a directory with one file per column:
+
+    answers.u8   N x Q answers (1-5), one column per entry in QUESTIONS
+    scores.u8    N x T raw trait scores (0..max_score), one column per trait
+    schema.json  the questions, traits and max_score, for people and tools
+
+Each column file starts with a fixed 64-byte header (magic, format version,
+column count and a digest of the questions/traits schema) followed by the
+rows back to back. The row count is implied by the file size, so appending
+never rewrites the header, and readers map the files read-only with
+np.memmap: every read is a zero-copy view, and scoring, norms and search
+jobs can stream millions of respondents in chunks. A store only opens
+against the catalog it was written with.
+
+There must be only one writer at a time. A row counts once both columns
+hold it; a row half-written by a crash is truncated on the next open. A
+directory with only some of the column files is refused, not repaired.
+
+    python respondent_store.py archive import responses.csv
+    python respondent_store.py archive info
+    python respondent_store.py archive norms norms.npz
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from character_scoring import ScoringEngine, load_response_matrix
+
+STORE_MAGIC = b'CHARSTOR'
+STORE_FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHHI32s')
+HEADER_SIZE = 64
+
+COLUMNS = ('answers', 'scores')
+DEFAULT_CHUNK_ROWS = 65536
+
+
+def schema_of(engine):
+    return {
+        'questions': [list(question) for question in engine.questions],
+        'traits': engine.traits,
+        'max_score': engine.max_score,
+    }
+
+
+def schema_digest(schema):
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode('utf-8')).digest()
+
+
+class RespondentStore:
+    def __init__(self, directory, engine=None):
+        self.directory = directory
+        self.engine = engine or ScoringEngine()
+        if self.engine.max_score > np.iinfo(np.uint8).max:
+            raise ValueError("Trait scores above 255 do not fit the store's uint8 columns")
+        schema = schema_of(self.engine)
+        self.digest = schema_digest(schema)
+        self.widths = {'answers': self.engine.n_questions, 'scores': len(self.engine.traits)}
+        self._maps = {}
+        self._rows = None
+
+        os.makedirs(directory, exist_ok=True)
+        missing = [name for name in COLUMNS if not os.path.exists(self._path(name))]
+        if missing and len(missing) < len(COLUMNS):
+            # Creating the missing column would make every existing row
+            # look half-written and truncate it away
+            raise ValueError(f"{directory} is missing its {', '.join(missing)} column; "
+                             f"refusing to open a partial respondent store")
+        for name in COLUMNS:
+            path = self._path(name)
+            if not missing:
+                self._check_header(name)
+            else:
+                with open(path, 'wb') as f:
+                    f.write(HEADER.pack(STORE_MAGIC, STORE_FORMAT_VERSION, 0, self.widths[name],
+                                        self.digest).ljust(HEADER_SIZE, b'\0'))
+        schema_path = os.path.join(directory, 'schema.json')
+        if not os.path.exists(schema_path):
+            with open(schema_path, 'w') as f:
+                json.dump(dict(schema, digest=self.digest.hex(),
+                               version=STORE_FORMAT_VERSION), f, indent=2)
+        self._truncate_partial_rows()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.u8')
+
+    def _check_header(self, name):
+        with open(self._path(name), 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f"{self._path(name)} is not a respondent store column")
+        magic, version, _, width, digest = HEADER.unpack(header[:HEADER.size])
+        if magic != STORE_MAGIC:
+            raise ValueError(f"{self._path(name)} is not a respondent store column")
+        if version != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported respondent store version {version}")
+        if digest != self.digest or width != self.widths[name]:
+            raise ValueError(f"{self.directory} was written for a different question/trait "
+                             f"catalog")
+
+    def _file_rows(self, name):
+        return (os.path.getsize(self._path(name)) - HEADER_SIZE) // self.widths[name]
+
+    def _truncate_partial_rows(self):
+        rows = min(self._file_rows(name) for name in COLUMNS)
+        for name in COLUMNS:
+            size = HEADER_SIZE + rows * self.widths[name]
+            if os.path.getsize(self._path(name)) != size:
+                os.truncate(self._path(name), size)
+
+    def __len__(self):
+        return min(self._file_rows(name) for name in COLUMNS)
+
+    def _column(self, name):
+        # Re-mapped only when the store has grown, e.g. by another process
+        rows = len(self)
+        if rows != self._rows:
+            self._maps = {}
+            self._rows = rows
+        if name not in self._maps:
+            if rows == 0:
+                self._maps[name] = np.zeros((0, self.widths[name]), dtype=np.uint8)
+            else:
+                self._maps[name] = np.memmap(self._path(name), dtype=np.uint8, mode='r',
+                                             offset=HEADER_SIZE, shape=(rows, self.widths[name]))
+        return self._maps[name]
+
+    @property
+    def answers(self):
+        return self._column('answers')
+
+    @property
+    def scores(self):
+        return self._column('scores')
+
+    def normalized(self, rows=slice(None)):
+        return self.scores[rows] / self.engine.max_score
+
+    def score_batch(self, rows=slice(None)):
+        # ScoreBatch (categories, ordering, profiles) for a range of rows
+        return self.engine.score_raw(self.scores[rows])
+
+    def append(self, answers):
+        # Validates and scores the answers, then appends both columns.
+        # Returns the row numbers given to the new respondents.
+        answers = self.engine.validate(answers)
+        scores = self.engine.raw_scores(answers)
+        start = len(self)
+        for name, values in (('answers', answers), ('scores', scores)):
+            with open(self._path(name), 'ab') as f:
+                f.write(np.ascontiguousarray(values, dtype=np.uint8).tobytes())
+        return range(start, start + len(answers))
+
+    def chunks(self, rows=DEFAULT_CHUNK_ROWS):
+        # Yields (first row, answers, scores) as zero-copy views
+        answers, scores = self.answers, self.scores
+        for start in range(0, len(answers), rows):
+            yield start, answers[start:start + rows], scores[start:start + rows]
+
+    def file_bytes(self):
+        return sum(os.path.getsize(self._path(name)) for name in COLUMNS)
+
+    def close(self):
+        self._maps = {}
+        self._rows = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage a memory-mapped respondent store")
+    parser.add_argument('store', help="Store directory (created if missing)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('import', help="Append an answer matrix (.csv or .npy)")
+    add.add_argument('responses')
+    commands.add_parser('info', help="Row count, size and per-trait means")
+    norms = commands.add_parser('norms', help="Build population norms by streaming the store")
+    norms.add_argument('output', help="Norms file (.npz) to write")
+    norms.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    try:
+        store = RespondentStore(args.store)
+        start = time.perf_counter()
+        if args.command == 'import':
+            rows = store.append(load_response_matrix(args.responses))
+            print(f"Appended {len(rows)} respondents (rows {rows.start}-{rows.stop - 1}) in "
+                  f"{time.perf_counter() - start:.2f} s", file=sys.stderr)
+        elif args.command == 'info':
+            print(f"{len(store)} respondents, {store.engine.n_questions} questions, "
+                  f"{len(store.engine.traits)} traits, {store.file_bytes() / 1e6:.1f} MB")
+            if len(store):
+                means = np.zeros(len(store.engine.traits))
+                for _, _, scores in store.chunks():
+                    means += scores.sum(axis=0)
+                means /= len(store) * store.engine.max_score
+                for trait, mean in zip(store.engine.traits, means):
+                    print(f"  {trait:<16} {mean:.3f}")
+        elif args.command == 'norms':
+            from trait_norms import TraitNorms
+            result = TraitNorms(store.engine.traits, store.engine.max_score)
+            for _, _, scores in store.chunks(args.chunk_rows):
+                result.update(scores)
+            result.save(args.output)
+            print(f"Norms over {result.count} respondents written to {args.output} in "
+                  f"{time.perf_counter() - start:.2f} s", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Unit-size geometry for every trait shape.
+
+Each shape is registered once as data: a tuple of ShapeParts whose
+coordinates are expressed in units of the shape size and centred on the
+origin. Drawing a shape is then a single affine transform (scale by size,
+translate to the shape centre) per part, with no trig at draw time.
+
+New shapes are added with register_shape() instead of another branch in
+draw_shape, e.g.
+
+    register_shape('cross', polyline([(-1, 0), (1, 0)]),
+                   polyline([(0, -1), (0, 1)]))
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# kind:      'polygon', 'polyline', 'circle', 'ellipse', 'wedge' or 'arrow'
+# points:    unit coordinates, shape (..., 2); polylines are (strokes, n, 2)
+# extent:    size-relative scalars (radius, ellipse width/height, arrow scale)
+# angles:    size-independent wedge angles in degrees
+# linewidth: stroke width in points; None keeps matplotlib's default
+# edgecolor: None to stroke in the fill colour, or a fixed edge colour
+# color:     fixed colour overriding the trait colour (e.g. the eye's pupil)
+# alpha:     fixed alpha overriding the intensity-derived alpha
+ShapePart = namedtuple('ShapePart', 'kind points extent angles linewidth edgecolor color alpha')
+
+# Kinds drawn as strokes rather than filled areas
+STROKE_KINDS = ('polyline', 'arrow')
+
+SHAPES = {}
+
+# Shape used for unknown shape names, always drawn in gray
+DEFAULT_SHAPE = 'default'
+DEFAULT_COLOR = 'gray'
+
+
+def _part(kind, points, extent=(), angles=(), linewidth=0.5, edgecolor=None,
+          color=None, alpha=None):
+    points = np.asarray(points, dtype=float)
+    points.setflags(write=False)
+    return ShapePart(kind, points, tuple(extent), tuple(angles), linewidth,
+                     edgecolor, color, alpha)
+
+
+def polygon(vertices, **style):
+    return _part('polygon', vertices, **style)
+
+
+def polyline(*strokes, linewidth=2, **style):
+    # All strokes of one part must have the same number of points
+    return _part('polyline', strokes, linewidth=linewidth, **style)
+
+
+def circle(radius, center=(0, 0), **style):
+    return _part('circle', center, extent=(radius,), **style)
+
+
+def ellipse(width, height, center=(0, 0), **style):
+    return _part('ellipse', center, extent=(width, height), **style)
+
+
+def wedge(radius, theta1, theta2, center=(0, 0), **style):
+    return _part('wedge', center, extent=(radius,), angles=(theta1, theta2), **style)
+
+
+def arrow(tail, head, mutation_scale, **style):
+    return _part('arrow', [tail, head], extent=(mutation_scale,), **style)
+
+
+def register_shape(name, *parts):
+    SHAPES[name] = tuple(parts)
+
+
+def get_shape(name):
+    # Returns (parts, colour override) for a shape name
+    if name in SHAPES:
+        return SHAPES[name], None
+    return SHAPES[DEFAULT_SHAPE], DEFAULT_COLOR
+
+
+def place(part, x, y, size):
+    # The one affine transform from unit space to data space
+    return part.points * size + (x, y), tuple(e * size for e in part.extent)
+
+
+def shape_radius(name):
+    # Radius of the smallest origin-centred circle holding the unit shape,
+    # ignoring stroke widths and arrow heads (which are sized in points)
+    parts, _ = get_shape(name)
+    radius = 0.0
+    for part in parts:
+        reach = np.hypot(*np.reshape(part.points, (-1, 2)).T).max()
+        if part.kind in ('circle', 'wedge'):
+            reach += part.extent[0]
+        elif part.kind == 'ellipse':
+            reach += max(part.extent) / 2
+        radius = max(radius, reach)
+    return float(radius)
+
+
+def shape_size(intensity):
+    return 0.5 + intensity * 1.5
+
+
+def shape_alpha(intensity):
+    return 0.3 + intensity * 0.6
+
+
+def _regular(n_points, radii, offset=0.0):
+    angles = np.linspace(0, 2*np.pi, n_points) + offset
+    return np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+
+
+def _build_default_shapes():
+    register_shape('circle', circle(1))
+    register_shape('square', polygon([(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)]))
+    register_shape('triangle', polygon([(0, 1), (-0.866, -0.5), (0.866, -0.5)]))
+    register_shape('hexagon', polygon(_regular(7, 1.0)))
+
+    star = _regular(11, 1.0)[:-1]
+    star[1::2] *= 0.5
+    register_shape('star', polygon(star))
+
+    register_shape('diamond', polygon([(0, 1), (-0.7, 0), (0, -1), (0.7, 0)]))
+
+    t = np.linspace(0, 2*np.pi, 100)
+    register_shape('heart', polygon(np.column_stack([
+        16*np.sin(t)**3 / 20,
+        (13*np.cos(t) - 5*np.cos(2*t) - 2*np.cos(3*t) - np.cos(4*t)) / 20,
+    ]), edgecolor='black'))
+
+    theta = np.linspace(0, 4*np.pi, 100)
+    r = np.linspace(0, 1, 100)
+    register_shape('spiral', polyline(np.column_stack([r*np.cos(theta), r*np.sin(theta)]),
+                                      linewidth=3))
+
+    register_shape('oval', ellipse(1.5, 1))
+    register_shape('arrow', arrow((0, -1), (0, 1), mutation_scale=20, linewidth=None))
+    register_shape('pentagon', polygon(_regular(6, 1.0, offset=-np.pi/2)[:-1]))
+    register_shape('crescent', wedge(1, 30, 330))
+
+    rays = np.linspace(0, 2*np.pi, 12, endpoint=False)
+    directions = np.column_stack([np.cos(rays), np.sin(rays)])
+    register_shape('sun', circle(0.5),
+                   polyline(*np.stack([directions * 0.5, directions], axis=1)))
+
+    u = np.linspace(-1, 1, 100)
+    register_shape('wave', polyline(np.column_stack([u, 0.3*np.sin(4*np.pi*u)]), linewidth=3))
+
+    register_shape('shield', polygon([(0, 1), (-0.7, 0.5), (-0.7, -0.3),
+                                      (0, -1), (0.7, -0.3), (0.7, 0.5)]))
+
+    # Almond outline: upper arc left to right, then lower arc back
+    half_height = 0.5*np.sqrt(1 - u**2)
+    register_shape('eye',
+                   polygon(np.concatenate([np.column_stack([u, half_height]),
+                                           np.column_stack([u[::-1], -half_height[::-1]])]),
+                           edgecolor='black'),
+                   circle(0.3, linewidth=None, color='black', alpha=1))
+
+    ticks = [-0.5, 0, 0.5]
+    register_shape('grid', polyline(*([[(t, -0.5), (t, 0.5)] for t in ticks] +
+                                      [[(-0.5, t), (0.5, t)] for t in ticks])))
+
+    t = np.linspace(0, 1.5*np.pi, 50)
+    register_shape('question',
+                   polyline(np.column_stack([0.3*np.cos(t + np.pi/2),
+                                             0.3 + 0.3*np.sin(t + np.pi/2)]), linewidth=3),
+                   circle(0.1, center=(0, -0.3), linewidth=None))
+
+    register_shape('line', polyline([(-1, 0), (1, 0)], linewidth=4))
+    register_shape('small_circle', circle(0.5))
+    register_shape(DEFAULT_SHAPE, circle(0.7))
+
+
+_build_default_shapes()
@@ -0,0 +1,188 @@
+"""Placement of trait shapes on the profile canvas.
+
+Shared by every output path (matplotlib, SVG) so they agree on where each
+shape goes. Coordinates are data units on the -10..10 profile axes.
+
+Up to SPIRAL_MAX_SHAPES visible traits keep the original spiral. Past
+that the spiral overlaps itself and runs off the axes, so packed_layout
+takes over. It walks a golden-angle (Vogel) spiral of candidate points,
+centre outwards, and puts each shape, strongest first, on the first
+candidate where it fits without touching anything placed before it. Each
+candidate remembers the largest radius that still fits there. A grid hash
+over the candidates finds the ones a newly placed shape constrains, and a
+max segment tree over candidate order answers "first candidate with room
+for radius r" in O(log M). A layout of N shapes therefore costs about
+O((N + M) log M) with M ~ N candidates, and it is deterministic. If the
+shapes cannot all fit, they are scaled down together and packed again.
+"""
+import numpy as np
+
+from shape_geometry import shape_radius, shape_size
+
+# Only traits strictly above this normalized score are drawn
+VISIBLE_THRESHOLD = 0.3
+
+# Largest number of visible shapes laid out on the original spiral
+SPIRAL_MAX_SHAPES = 20
+
+# Packed shapes stay inside this radius, clear of the subtitle at y = -9
+PACKED_RADIUS = 8.5
+
+# Share of the packing disc the shapes' bounding circles may cover before
+# they are scaled down; higher packs tighter but needs more retries
+PACKING_DENSITY = 0.5
+
+# Space kept around every shape, relative to its bounding radius
+PACKING_GAP = 0.08
+
+# Bounding radius shrink factor between packing attempts
+PACKING_SHRINK = 0.9
+MAX_PACKING_ATTEMPTS = 30
+
+# Candidate spacing as a fraction of the smallest shape radius, and a cap
+# on the number of candidates for very uneven sizes
+CANDIDATE_SPACING = 0.5
+MAX_CANDIDATES = 400000
+
+# Children per node of the candidate room tree
+TREE_FANOUT = 32
+
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+def spiral_layout(trait_info, sorted_traits):
+    num_shapes = len([t for t, s in sorted_traits if s > VISIBLE_THRESHOLD])
+
+    shapes = []
+    for i, (trait, score) in enumerate(sorted_traits[:num_shapes]):
+        if score > VISIBLE_THRESHOLD:
+            # Calculate position in a spiral
+            angle = i * (2 * np.pi / 5)
+            radius = 2 + i * 0.5
+            x = radius * np.cos(angle)
+            y = radius * np.sin(angle)
+
+            shapes.append((trait_info[trait]['shape'], x, y, score, trait_info[trait]['color'],
+                           shape_size(score)))
+    return shapes
+
+
+class _MaxTree:
+    # TREE_FANOUT-ary max tree over per-candidate room, supporting lowering
+    # a set of leaves and finding the first leaf with room >= r. A wide
+    # fanout keeps the tree to a few levels, each one numpy call deep.
+    def __init__(self, values):
+        level = self._padded(values)
+        self.levels = [level]
+        while len(level) > TREE_FANOUT:
+            level = self._padded(level.reshape(-1, TREE_FANOUT).max(axis=1))
+            self.levels.append(level)
+
+    @staticmethod
+    def _padded(values):
+        padded = np.full(-(-len(values) // TREE_FANOUT) * TREE_FANOUT, -np.inf)
+        padded[:len(values)] = values
+        return padded
+
+    def lower(self, indices, values):
+        # indices must be unique; only leaves that actually lose room are
+        # propagated up the tree
+        leaves = self.levels[0]
+        lowered = values < leaves[indices]
+        indices = indices[lowered]
+        if not len(indices):
+            return
+        leaves[indices] = values[lowered]
+        indices = np.sort(indices)
+        for below, above in zip(self.levels, self.levels[1:]):
+            # Parents of sorted indices stay sorted, so duplicates are adjacent
+            indices = indices // TREE_FANOUT
+            indices = indices[np.concatenate(([True], indices[1:] != indices[:-1]))]
+            above[indices] = below.reshape(-1, TREE_FANOUT)[indices].max(axis=1)
+
+    def first_at_least(self, value):
+        fits = self.levels[-1] >= value
+        index = int(np.argmax(fits))
+        if not fits[index]:
+            return None
+        for level in reversed(self.levels[:-1]):
+            block = level[index * TREE_FANOUT:(index + 1) * TREE_FANOUT]
+            index = index * TREE_FANOUT + int(np.argmax(block >= value))
+        return index
+
+
+def _pack(radii, limit):
+    # Centres for circles of the given radii inside a disc of radius limit,
+    # or None if some circle finds no room
+    spacing = max(radii.min() * CANDIDATE_SPACING, limit / np.sqrt(MAX_CANDIDATES))
+    k = np.arange(int((limit / spacing) ** 2) + 1)
+    distance = spacing * np.sqrt(k)
+    xs = distance * np.cos(k * GOLDEN_ANGLE)
+    ys = distance * np.sin(k * GOLDEN_ANGLE)
+
+    # Room only matters up to the largest radius, which bounds how far a
+    # placed circle's influence has to be propagated
+    largest = radii.max()
+    tree = _MaxTree(np.minimum(limit - distance, largest))
+
+    # Grid hash of the candidates in CSR form: cell -> candidate indices
+    cells = int(np.ceil(2 * limit / largest)) + 1
+    ix = ((xs + limit) / largest).astype(np.int64)
+    iy = ((ys + limit) / largest).astype(np.int64)
+    order = np.argsort(ix * cells + iy, kind='stable')
+    starts = np.searchsorted((ix * cells + iy)[order], np.arange(cells * cells + 1))
+
+    centres = np.empty((len(radii), 2))
+    for i, radius in enumerate(radii):
+        k = tree.first_at_least(radius)
+        if k is None:
+            return None
+        x, y = xs[k], ys[k]
+        centres[i] = x, y
+
+        # Every candidate within radius + largest of the new circle may
+        # lose room; anything farther already has at least `largest`
+        reach = radius + largest
+        x0, x1 = (int((x - reach + limit) / largest), int((x + reach + limit) / largest))
+        y0, y1 = (int((y - reach + limit) / largest), int((y + reach + limit) / largest))
+        near = np.concatenate([order[starts[cx * cells + max(y0, 0)]:
+                                     starts[cx * cells + min(y1, cells - 1) + 1]]
+                               for cx in range(max(x0, 0), min(x1, cells - 1) + 1)])
+        room = np.hypot(xs[near] - x, ys[near] - y) - radius
+        closer = room < largest
+        tree.lower(near[closer], room[closer])
+    return centres
+
+
+def packed_layout(items, limit=PACKED_RADIUS):
+    # items is a list of (shape_type, intensity, color), strongest first.
+    # Returns (shape_type, x, y, intensity, color, size) in the same order,
+    # strongest nearest the centre, with no two bounding circles touching.
+    if not items:
+        return []
+    unit = {shape_type: shape_radius(shape_type) for shape_type in {t for t, _, _ in items}}
+    sizes = np.array([shape_size(intensity) for _, intensity, _ in items])
+    radii = np.array([unit[t] for t, _, _ in items]) * sizes * (1 + PACKING_GAP)
+
+    scale = min(1.0, np.sqrt(PACKING_DENSITY * limit ** 2 / np.sum(radii ** 2)))
+    for _ in range(MAX_PACKING_ATTEMPTS):
+        centres = _pack(radii * scale, limit)
+        if centres is not None:
+            break
+        scale *= PACKING_SHRINK
+    else:
+        raise ValueError(f"Could not pack {len(items)} shapes into radius {limit}")
+
+    return [(shape_type, float(x), float(y), intensity, color, float(size * scale))
+            for (shape_type, intensity, color), (x, y), size in zip(items, centres, sizes)]
+
+
+def profile_layout(trait_info, sorted_traits):
+    # sorted_traits is a list of (trait, normalized score), strongest first.
+    # Returns (shape_type, x, y, intensity, color, size) per visible trait,
+    # in draw order.
+    visible = [(trait, score) for trait, score in sorted_traits if score > VISIBLE_THRESHOLD]
+    if len(visible) <= SPIRAL_MAX_SHAPES:
+        return spiral_layout(trait_info, sorted_traits)
+    return packed_layout([(trait_info[trait]['shape'], score, trait_info[trait]['color'])
+                          for trait, score in visible])
@@ -0,0 +1,282 @@
+"""Streaming scoring (and optional rendering) of JSON Lines responses.
+
+Each input line is a record such as
+
+    {"id": "r-001", "answers": [4, 5, 3, ...]}
+
+with one 1-5 answer per entry in QUESTIONS. Records flow through a chain
+of generators -- parse -> score -> categorize -> render -> emit -- so only
+a micro-batch plus the in-flight renders are ever held in memory. The
+render stage blocks once --max-in-flight images are pending, which stops
+upstream stages from pulling more input (backpressure). A record whose
+render fails is still emitted, with a render_error field instead of an
+image. Throughput and latency are reported per stage on stderr.
+
+    survey-feed | python stream_pipeline.py - --render-dir renders > scores.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from batch_render import DEFAULT_DPI, DEFAULT_NAME_TEMPLATE, init_worker, render_job
+from character_scoring import CATEGORY_NAMES, MAX_ANSWER, MIN_ANSWER, ScoringEngine
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# Latency samples kept per stage; older samples are replaced at random so
+# percentiles stay representative without unbounded memory
+LATENCY_RESERVOIR = 10000
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.busy = 0.0
+        self.latencies = []
+        # Records that passed through with an error instead of a result
+        self.failures = 0
+        self._rng = random.Random(0)
+
+    def record(self, latency):
+        self.count += 1
+        if len(self.latencies) < LATENCY_RESERVOIR:
+            self.latencies.append(latency)
+        else:
+            slot = self._rng.randrange(self.count)
+            if slot < LATENCY_RESERVOIR:
+                self.latencies[slot] = latency
+
+    def percentile(self, q):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def valid_answer(value):
+    # JSON numbers only: no strings or booleans, and no 2.7 or NaN that
+    # int() would quietly turn into a different answer. The range check
+    # comes first so huge integers never reach float()
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and MIN_ANSWER <= value <= MAX_ANSWER and float(value).is_integer())
+
+
+def parse_records(lines, n_questions, stats, errors):
+    index = 0
+    for line_number, line in enumerate(lines, 1):
+        start = time.perf_counter()
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            answers = record['answers']
+            if len(answers) != n_questions or not all(map(valid_answer, answers)):
+                raise ValueError(f"expected {n_questions} whole-number answers between "
+                                 f"{MIN_ANSWER} and {MAX_ANSWER}")
+        except (ValueError, KeyError, TypeError) as e:
+            errors.append((line_number, str(e)))
+            print(f"line {line_number}: skipped ({e})", file=sys.stderr)
+            continue
+        item = {'index': index, 'id': record.get('id', index),
+                'answers': answers, 'received': start}
+        index += 1
+        elapsed = time.perf_counter() - start
+        stats.busy += elapsed
+        stats.record(elapsed)
+        yield item
+
+
+def score_records(items, engine, batch_size, stats, norms=None):
+    # Micro-batches keep NumPy's per-call overhead off the per-record path;
+    # use batch_size=1 for a trickling live feed
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            return
+        start = time.perf_counter()
+        scores = engine.score([item['answers'] for item in batch])
+        percentiles = None
+        if norms is not None:
+            norms.update(scores.raw)
+            percentiles = norms.percentiles(scores.raw)
+        elapsed = time.perf_counter() - start
+        stats.busy += elapsed
+        for row, item in enumerate(batch):
+            item['scores'] = scores
+            item['row'] = row
+            if percentiles is not None:
+                item['percentiles'] = percentiles[row]
+            stats.record(elapsed)
+            yield item
+
+
+def categorize_records(items, stats):
+    for item in items:
+        start = time.perf_counter()
+        scores, row = item.pop('scores'), item.pop('row')
+        profile = scores.profile(row)
+        item['raw'] = scores.raw[row].tolist()
+        item['result'] = {
+            'id': item['id'],
+            'scores': dict(zip(scores.traits, scores.normalized[row].tolist())),
+            'categories': {trait: CATEGORY_NAMES[code]
+                           for trait, code in zip(scores.traits, scores.categories[row])},
+            'dominant': [t for t, _ in profile.dominant],
+            'strong': [t for t, _ in profile.strong],
+            'moderate': [t for t, _ in profile.moderate],
+        }
+        if 'percentiles' in item:
+            item['result']['percentiles'] = dict(zip(scores.traits,
+                                                     item.pop('percentiles').tolist()))
+        elapsed = time.perf_counter() - start
+        stats.busy += elapsed
+        stats.record(elapsed)
+        yield item
+
+
+def render_records(items, pool, out_dir, max_in_flight, stats, fmt='png',
+                   name_template=DEFAULT_NAME_TEMPLATE):
+    in_flight = deque()
+
+    def complete_oldest():
+        item, submitted, future = in_flight.popleft()
+        wait_start = time.perf_counter()
+        try:
+            _, path, _, _ = future.result()
+        except Exception as e:
+            # One bad render must not abort the stream and every completed
+            # record behind it; the record is emitted without an image
+            stats.failures += 1
+            item['result']['render_error'] = str(e)
+            print(f"record {item['id']}: render failed ({e})", file=sys.stderr)
+        else:
+            item['result']['image'] = path
+        stats.busy += time.perf_counter() - wait_start
+        stats.record(time.perf_counter() - submitted)
+        return item
+
+    for item in items:
+        # Backpressure: don't pull another record until a render slot frees
+        while len(in_flight) >= max_in_flight:
+            yield complete_oldest()
+        path = os.path.join(out_dir, name_template.format(index=item['index'], ext=fmt))
+        job = (item['index'], item['raw'], path, fmt)
+        in_flight.append((item, time.perf_counter(), pool.submit(render_job, job)))
+        # Hand back anything already finished, preserving input order
+        while in_flight and in_flight[0][2].done():
+            yield complete_oldest()
+
+    while in_flight:
+        yield complete_oldest()
+
+
+def emit_records(items, out, stats):
+    for item in items:
+        start = time.perf_counter()
+        out.write(json.dumps(item['result']) + '\n')
+        out.flush()
+        stats.busy += time.perf_counter() - start
+        # End-to-end latency from the moment the record was read
+        stats.record(time.perf_counter() - item['received'])
+        yield item['result']
+
+
+def run_pipeline(lines, out, render_dir=None, workers=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 batch_size=DEFAULT_BATCH_SIZE, dpi=DEFAULT_DPI, fmt='png', norms=None,
+                 cache_dir=None):
+    engine = ScoringEngine()
+    stages = {name: StageStats(name) for name in ('parse', 'score', 'categorize', 'render', 'emit')}
+    errors = []
+
+    start = time.perf_counter()
+    items = parse_records(lines, engine.n_questions, stages['parse'], errors)
+    items = score_records(items, engine, batch_size, stages['score'], norms)
+    items = categorize_records(items, stages['categorize'])
+
+    pool = None
+    if render_dir:
+        os.makedirs(render_dir, exist_ok=True)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                   initargs=(dpi, cache_dir))
+        items = render_records(items, pool, render_dir, max_in_flight, stages['render'], fmt)
+    else:
+        del stages['render']
+
+    try:
+        for _ in emit_records(items, out, stages['emit']):
+            pass
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {'seconds': time.perf_counter() - start, 'stages': stages, 'errors': errors}
+
+
+def print_report(report, stream=sys.stderr):
+    elapsed = report['seconds']
+    print(f"{'stage':<12}{'records':>9}{'rec/s':>11}{'busy s':>9}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}", file=stream)
+    for stats in report['stages'].values():
+        print(f"{stats.name:<12}{stats.count:>9}{stats.count / elapsed if elapsed else 0:>11.1f}"
+              f"{stats.busy:>9.2f}{stats.percentile(0.5) * 1000:>10.2f}"
+              f"{stats.percentile(0.95) * 1000:>10.2f}{stats.percentile(0.99) * 1000:>10.2f}",
+              file=stream)
+    if report['errors']:
+        print(f"{len(report['errors'])} records skipped", file=stream)
+    for stats in report['stages'].values():
+        if stats.failures:
+            print(f"{stats.failures} records failed in {stats.name}", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream-score JSON Lines survey responses")
+    parser.add_argument('input', nargs='?', default='-', help="JSON Lines file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="JSON Lines output (default stdout)")
+    parser.add_argument('--render-dir', help="Also render one image per record into this directory")
+    parser.add_argument('-w', '--workers', type=int, default=None)
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help="Pending renders before input reading pauses")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Records scored per NumPy call; 1 for lowest latency")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--norms', help="Population norms file (.npz) to update as records "
+                                        "arrive; adds percentiles to the output")
+    parser.add_argument('--cache-dir', help="Reuse rendered images for repeated score vectors "
+                                            "across runs")
+    args = parser.parse_args(argv)
+
+    norms = None
+    if args.norms:
+        from trait_norms import TraitNorms
+        engine = ScoringEngine()
+        norms = TraitNorms.load_or_create(args.norms, engine.traits, engine.max_score)
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        report = run_pipeline(source, out, args.render_dir, args.workers, args.max_in_flight,
+                              args.batch_size, args.dpi, args.format, norms,
+                              args.cache_dir)
+    finally:
+        if norms is not None:
+            norms.save(args.norms)
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
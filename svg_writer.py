@@ -0,0 +1,366 @@
+"""Direct SVG output of character profiles, without matplotlib.
+
+Builds the same layout and shapes as draw_profile straight from the
+shape_geometry parts, so a profile is a few dozen SVG elements written
+with string formatting instead of a figure, a renderer and savefig.
+Output is byte-stable: the same profile always gives the same bytes.
+
+The canvas matches the matplotlib profile axes: data units -10..10, with
+stroke widths in points converted at the axes' scale, fills drawn before
+strokes (patch vs line zorder) and fill and edge alpha kept separate as
+matplotlib does.
+
+    python svg_writer.py responses.csv -o svgs
+    python svg_writer.py --check 200      # compare against matplotlib
+"""
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from html import escape
+
+import numpy as np
+
+from shape_geometry import get_shape, place, shape_alpha
+from shape_layout import profile_layout
+
+# The 10 x 10 in profile figure gives square 7.7 in axes for 20 data units
+POINTS_PER_UNIT = 7.7 * 72 / 20
+
+# matplotlib's default widths for parts with linewidth=None
+PATCH_LINEWIDTH = 1.0
+LINE_LINEWIDTH = 1.5
+
+# FancyArrowPatch defaults for arrowstyle='->', in points
+ARROW_SHRINK = 2.0
+ARROW_HEAD_LENGTH = 0.4
+ARROW_HEAD_WIDTH = 0.2
+
+TITLE = "Your Unique Character Profile"
+SUBTITLE = ("Shapes arranged in a Fibonacci spiral: strongest traits near center, "
+            "size indicates trait strength")
+FONT_FAMILY = "DejaVu Sans, Bitstream Vera Sans, sans-serif"
+
+# Canvas in data units: the axes plus room for the title above
+VIEW_LEFT, VIEW_RIGHT = -10.2, 10.2
+VIEW_TOP, VIEW_BOTTOM = 11.8, -10.2
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+
+
+def _num(value):
+    text = f'{value:.3f}'.rstrip('0').rstrip('.')
+    return '0' if text in ('-0', '') else text
+
+
+def _xy(point):
+    # SVG y grows downwards
+    return f'{_num(point[0])} {_num(-point[1])}'
+
+
+def _pt(width):
+    # Widths shrink by the placement scale, so keep significant digits
+    # rather than decimals
+    return f'{width / POINTS_PER_UNIT:.4g}'
+
+
+# Catalog colour -> escaped #rrggbb
+_svg_colors = {}
+
+
+def _color(color):
+    # Catalogs may use any matplotlib colour ('C0', 'tab:blue', [r, g, b],
+    # ...), most of which SVG does not understand. Alpha is dropped, as
+    # the shapes' own alpha overrides it in matplotlib too.
+    key = tuple(color) if isinstance(color, list) else color
+    text = _svg_colors.get(key)
+    if text is None:
+        from matplotlib.colors import to_hex
+        text = _svg_colors[key] = escape(to_hex(key), quote=True)
+    return text
+
+
+def _fill(color, alpha):
+    return f'fill="{_color(color)}" fill-opacity="{_num(alpha)}"'
+
+
+def _stroke(color, alpha, width, join='miter', cap='butt'):
+    return (f'stroke="{_color(color)}" stroke-opacity="{_num(alpha)}" stroke-width="{_pt(width)}" '
+            f'stroke-linejoin="{join}" stroke-linecap="{cap}"')
+
+
+def arrow_strokes(tail, head, mutation_scale, linewidth):
+    # Shaft plus the open '->' head, following FancyArrowPatch: both ends
+    # shrink by 2 pt and the tip is pulled back so the stroke ends on it
+    direction = (head - tail) / np.hypot(*(head - tail))
+    normal = np.array([-direction[1], direction[0]])
+    head_length = ARROW_HEAD_LENGTH * mutation_scale
+    head_width = ARROW_HEAD_WIDTH * mutation_scale
+    sin_t = head_width / np.hypot(head_length, head_width)
+    start = tail + direction * ARROW_SHRINK / POINTS_PER_UNIT
+    tip = head - direction * (ARROW_SHRINK + 0.5 * linewidth / sin_t) / POINTS_PER_UNIT
+    back = tip - direction * head_length / POINTS_PER_UNIT
+    wing = normal * head_width / POINTS_PER_UNIT
+    return [np.array([start, tip]), np.array([back + wing, tip, back - wing])]
+
+
+# Formatted unit-space point lists per part, built on first use
+_unit_points = {}
+
+
+def _unit_text(part):
+    # Polygon and polyline points are formatted once in unit space and
+    # placed with an SVG transform, so a profile costs a few dozen short
+    # strings rather than formatting every vertex
+    cached = _unit_points.get(id(part))
+    if cached is None or cached[0] is not part:
+        strokes = part.points if part.kind == 'polyline' else [part.points]
+        cached = (part, [' '.join(f'{_num(px)} {_num(py)}' for px, py in stroke)
+                         for stroke in strokes])
+        _unit_points[id(part)] = cached
+    return cached[1]
+
+
+def _placement(x, y, size):
+    return f'transform="translate({_xy((x, y))}) scale({_num(size)} {_num(-size)})"'
+
+
+def shape_elements(part, x, y, size, color, alpha):
+    # SVG elements for one placed ShapePart; same colour and alpha rules as
+    # shape_artists
+    color = part.color or color
+    alpha = part.alpha if part.alpha is not None else alpha
+
+    if part.kind == 'polyline':
+        # Stroke widths are divided by size to undo the placement scale
+        width = (part.linewidth or LINE_LINEWIDTH) / size
+        style = f'fill="none" {_stroke(color, alpha, width, "round", "square")}'
+        return [f'<polyline {_placement(x, y, size)} points="{text}" {style}/>'
+                for text in _unit_text(part)]
+    if part.kind == 'polygon':
+        width = (part.linewidth or PATCH_LINEWIDTH) / size
+        style = f'{_fill(color, alpha)} {_stroke(part.edgecolor or color, alpha, width)}'
+        return [f'<path {_placement(x, y, size)} d="M{_unit_text(part)[0]} Z" {style}/>']
+
+    points, extent = place(part, x, y, size)
+    if part.kind == 'arrow':
+        width = part.linewidth or PATCH_LINEWIDTH
+        style = f'fill="none" {_stroke(color, alpha, width, "round", "round")}'
+        return [f'<polyline points="{" ".join(_xy(p) for p in stroke)}" {style}/>'
+                for stroke in arrow_strokes(points[0], points[1], extent[0], width)]
+
+    width = part.linewidth or PATCH_LINEWIDTH
+    style = f'{_fill(color, alpha)} {_stroke(part.edgecolor or color, alpha, width)}'
+    if part.kind == 'circle':
+        cx, cy = points
+        return [f'<circle cx="{_num(cx)}" cy="{_num(-cy)}" r="{_num(extent[0])}" {style}/>']
+    if part.kind == 'ellipse':
+        cx, cy = points
+        return [f'<ellipse cx="{_num(cx)}" cy="{_num(-cy)}" rx="{_num(extent[0] / 2)}" '
+                f'ry="{_num(extent[1] / 2)}" {style}/>']
+    if part.kind == 'wedge':
+        radius = extent[0]
+        theta1, theta2 = np.radians(part.angles)
+        start = points + radius * np.array([np.cos(theta1), np.sin(theta1)])
+        end = points + radius * np.array([np.cos(theta2), np.sin(theta2)])
+        large = 1 if (part.angles[1] - part.angles[0]) % 360 > 180 else 0
+        # Counter-clockwise in data space is sweep-flag 0 once y is flipped
+        return [f'<path d="M{_xy(points)} L{_xy(start)} A{_num(radius)} {_num(radius)} 0 '
+                f'{large} 0 {_xy(end)} Z" {style}/>']
+    raise ValueError(f"Unknown shape part kind: {part.kind}")
+
+
+def profile_svg(trait_info, sorted_traits):
+    fills, strokes = [], []
+    for shape_type, x, y, intensity, color, size in profile_layout(trait_info, sorted_traits):
+        alpha = shape_alpha(intensity)
+        parts, color_override = get_shape(shape_type)
+        for part in parts:
+            elements = shape_elements(part, x, y, size, color_override or color, alpha)
+            # Lines sit above every patch in matplotlib (zorder 2 vs 1)
+            (strokes if part.kind == 'polyline' else fills).extend(elements)
+
+    width = VIEW_RIGHT - VIEW_LEFT
+    height = VIEW_TOP - VIEW_BOTTOM
+    title_y = -(10 + 20 / POINTS_PER_UNIT)
+    return '\n'.join([
+        f'<svg xmlns="{SVG_NS}" width="{_num(width * POINTS_PER_UNIT)}pt" '
+        f'height="{_num(height * POINTS_PER_UNIT)}pt" '
+        f'viewBox="{_num(VIEW_LEFT)} {_num(-VIEW_TOP)} {_num(width)} {_num(height)}">',
+        '<rect x="-10" y="-10" width="20" height="20" fill="#f0f0f0" fill-opacity="0.3"/>',
+        '<g id="shapes">',
+        *fills,
+        *strokes,
+        '</g>',
+        f'<text x="0" y="{_num(title_y)}" font-family="{FONT_FAMILY}" '
+        f'font-size="{_pt(16)}" font-weight="bold" text-anchor="middle">{escape(TITLE)}</text>',
+        f'<text x="0" y="9" font-family="{FONT_FAMILY}" font-size="{_pt(9)}" '
+        f'font-style="italic" fill="gray" text-anchor="middle">{escape(SUBTITLE)}</text>',
+        '</svg>',
+        '',
+    ])
+
+
+def _outline(element):
+    # Data-space outline points of one SVG shape element, plus the scale
+    # its stroke width is drawn at
+    tag = element.tag.split('}')[-1]
+    if tag in ('circle', 'ellipse'):
+        cx, cy = float(element.get('cx')), float(element.get('cy'))
+        rx = float(element.get('r') or element.get('rx'))
+        ry = float(element.get('r') or element.get('ry'))
+        t = np.linspace(0, 2 * np.pi, 128)
+        points = np.column_stack([cx + rx * np.cos(t), cy + ry * np.sin(t)])
+    elif tag == 'polyline':
+        points = np.array(element.get('points').split(), dtype=float).reshape(-1, 2)
+    else:
+        tokens = element.get('d').replace('Z', '').replace('M', '').replace('L', '').split()
+        path, i = [], 0
+        while i < len(tokens):
+            if tokens[i].startswith('A'):
+                # Circular arc from the previous point around the first one
+                radius = float(tokens[i][1:])
+                sweep = int(tokens[i + 4])
+                end = np.array([float(tokens[i + 5]), float(tokens[i + 6])])
+                center, start = path[0], path[-1]
+                theta1 = np.arctan2(*(start - center)[::-1])
+                theta2 = np.arctan2(*(end - center)[::-1])
+                if sweep and theta2 <= theta1:
+                    theta2 += 2 * np.pi
+                elif not sweep and theta2 >= theta1:
+                    theta2 -= 2 * np.pi
+                t = np.linspace(theta1, theta2, 128)
+                path.extend(center + radius * np.column_stack([np.cos(t), np.sin(t)]))
+                i += 7
+            else:
+                path.append(np.array([float(tokens[i]), float(tokens[i + 1])]))
+                i += 2
+        path.append(path[0])
+        points = np.array(path)
+
+    scale, offset = np.ones(2), np.zeros(2)
+    if element.get('transform'):
+        # translate(tx ty) scale(sx sy), as written by _placement
+        values = element.get('transform').replace('translate(', '').replace(') scale(', ' ')
+        tx, ty, sx, sy = map(float, values.rstrip(')').split())
+        scale, offset = np.array([sx, sy]), np.array([tx, ty])
+    return (points * scale + offset) * (1, -1), abs(scale[0])
+
+
+def _distance(a, b):
+    # Largest distance from any point of a to the polyline through b
+    starts, ends = b[:-1], b[1:]
+    seg = ends - starts
+    length = np.maximum((seg ** 2).sum(axis=1), 1e-12)
+    t = np.clip(((a[:, None, :] - starts) * seg).sum(axis=2) / length, 0, 1)
+    nearest = starts + t[..., None] * seg
+    return np.sqrt(((a[:, None, :] - nearest) ** 2).sum(axis=2).min(axis=1)).max()
+
+
+def check_equivalence(trait_info, sorted_traits, tolerance=0.05):
+    # Compares every shape element of profile_svg with the artists
+    # draw_profile puts on a matplotlib axes: outline (in data units),
+    # fill, edge colour, alpha and stroke width. Returns a list of
+    # mismatch descriptions, empty when the two paths agree.
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import to_rgba
+    from matplotlib.figure import Figure
+    from matplotlib.patches import FancyArrowPatch
+    from character_drawing import PROFILE_FIGSIZE, draw_profile
+
+    fig = Figure(figsize=PROFILE_FIGSIZE)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    draw_profile(ax, trait_info, sorted_traits, use_collections=False)
+    fig.canvas.draw()
+
+    reference = []
+    for patch in ax.patches[1:]:
+        if isinstance(patch, FancyArrowPatch):
+            # get_path() is already in data units; shaft and head are
+            # separate subpaths
+            for stroke in patch.get_path().to_polygons(closed_only=False):
+                reference.append((stroke, None, patch.get_edgecolor(), patch.get_linewidth()))
+            continue
+        # Sample the Bezier segments; their control points are off the curve
+        path = patch.get_path().transformed(patch.get_transform() - ax.transData)
+        outline = np.concatenate([segment(np.linspace(0, 1, 16))
+                                  for segment, _ in path.iter_bezier()])
+        reference.append((outline, patch.get_facecolor(), patch.get_edgecolor(),
+                          patch.get_linewidth()))
+    for line in ax.lines:
+        reference.append((line.get_xydata(), None, to_rgba(line.get_color(), line.get_alpha()),
+                          line.get_linewidth()))
+
+    root = ET.fromstring(profile_svg(trait_info, sorted_traits))
+    elements = list(root.find(f'{{{SVG_NS}}}g'))
+    if len(elements) != len(reference):
+        return [f"{len(elements)} SVG elements but {len(reference)} matplotlib artists"]
+
+    problems = []
+    for i, (element, (outline, face, edge, width)) in enumerate(zip(elements, reference)):
+        ours, scale = _outline(element)
+        gap = max(_distance(ours, outline), _distance(outline, ours))
+        if gap > tolerance:
+            problems.append(f"element {i}: outline off by {gap:.3f} units")
+        if face is not None:
+            fill = to_rgba(element.get('fill'), float(element.get('fill-opacity')))
+            if not np.allclose(fill, face, atol=1e-3):
+                problems.append(f"element {i}: fill {fill} != {tuple(face)}")
+        stroke = to_rgba(element.get('stroke'), float(element.get('stroke-opacity')))
+        if not np.allclose(stroke, edge, atol=1e-3):
+            problems.append(f"element {i}: stroke {stroke} != {tuple(edge)}")
+        stroke_width = float(element.get('stroke-width')) * scale * POINTS_PER_UNIT
+        if abs(stroke_width - width) > 0.01:
+            problems.append(f"element {i}: stroke width {stroke_width:.2f} != {width:.2f}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write character visualizations as SVG")
+    parser.add_argument('responses', nargs='?', help="N x Q answer matrix as .csv or .npy")
+    parser.add_argument('-o', '--output-dir', default='svgs')
+    parser.add_argument('--name-template', default='character_{index:05d}.svg')
+    parser.add_argument('--check', type=int, metavar='N',
+                        help="Compare N random profiles against the matplotlib renderer")
+    args = parser.parse_args(argv)
+
+    from character_scoring import ScoringEngine, load_response_matrix
+    from trait_catalog import TRAIT_INFO
+    engine = ScoringEngine()
+
+    if args.check:
+        rng = np.random.default_rng(0)
+        batch = engine.score(rng.integers(1, 6, size=(args.check, engine.n_questions)))
+        failures = 0
+        for row in range(len(batch)):
+            problems = check_equivalence(TRAIT_INFO, batch.profile(row).sorted_traits)
+            if problems:
+                failures += 1
+                print(f"profile {row}: " + '; '.join(problems), file=sys.stderr)
+        print(f"{len(batch) - failures}/{len(batch)} profiles match the matplotlib output",
+              file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+    if not args.responses:
+        parser.error("responses is required unless --check is given")
+    try:
+        batch = engine.score(load_response_matrix(args.responses))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    for row in range(len(batch)):
+        svg = profile_svg(TRAIT_INFO, batch.profile(row).sorted_traits)
+        path = os.path.join(args.output_dir, args.name_template.format(index=row))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(svg)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(batch)} SVGs in {elapsed:.2f} s "
+          f"({elapsed / max(len(batch), 1) * 1e6:.0f} us per profile)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
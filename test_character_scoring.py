@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from character_scoring import ScoringEngine
+from trait_catalog import MAX_SCORE, QUESTIONS, TRAIT_INFO
+
+
+def dict_scores(answers):
+    # The Tk app's original scoring: add each answer to its trait, divide
+    # by MAX_SCORE and sort strongest first
+    responses = {trait: 0 for trait in TRAIT_INFO}
+    for (_, trait), answer in zip(QUESTIONS, answers):
+        responses[trait] += int(answer)
+    normalized = {trait: score / MAX_SCORE for trait, score in responses.items()}
+    return sorted(normalized.items(), key=lambda x: x[1], reverse=True)
+
+
+def test_matches_dict_scoring():
+    engine = ScoringEngine()
+    answers = np.random.default_rng(0).integers(1, 6, size=(200, engine.n_questions))
+    batch = engine.score(answers)
+    for row in range(len(batch)):
+        assert batch.profile(row).sorted_traits == dict_scores(answers[row])
+
+
+@pytest.mark.parametrize('bad', [np.nan, np.inf, 2.7])
+def test_rejects_non_integral_answers(bad):
+    engine = ScoringEngine()
+    answers = np.full(engine.n_questions, 3.0)
+    answers[0] = bad
+    with pytest.raises(ValueError):
+        engine.score(answers)
+
+
+def test_rejects_out_of_range_answers():
+    engine = ScoringEngine()
+    with pytest.raises(ValueError):
+        engine.score([6] * engine.n_questions)
+
+
+def test_accepts_whole_floats():
+    engine = ScoringEngine()
+    whole = engine.score([3.0] * engine.n_questions)
+    assert (whole.raw == engine.score([3] * engine.n_questions).raw).all()
@@ -0,0 +1,54 @@
+import asyncio
+import base64
+import json
+
+from character_scoring import ScoringEngine
+from render_service import RenderService, start_server
+
+
+async def request(port, method, path, body=b'', headers=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    headers = {'Content-Length': str(len(body)), 'Connection': 'close', **(headers or {})}
+    writer.write(f"{method} {path} HTTP/1.1\r\n".encode('latin-1')
+                 + "".join(f"{k}: {v}\r\n" for k, v in headers.items()).encode('latin-1')
+                 + b"\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+
+async def round_trip(tmp_path):
+    service = RenderService(workers=1, cache_dir=str(tmp_path))
+    server = await start_server(service, 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        body = json.dumps({'answers': [4] * ScoringEngine().n_questions}).encode()
+        for _ in range(2):
+            status, result = await request(port, 'POST', '/render', body)
+            assert status == 200
+            assert base64.b64decode(result['image']['base64']).startswith(b'\x89PNG')
+
+        status, result = await request(port, 'POST', '/render', b'{}',
+                                       {'Content-Length': 'ten'})
+        assert status == 400
+        status, result = await request(port, 'POST', '/render', b'',
+                                       {'Content-Length': '-5'})
+        assert status == 400
+
+        status, metrics = await request(port, 'GET', '/metrics')
+        assert status == 200
+        # The second request is served from the cache, not drawn again
+        assert metrics['rendered'] == 1
+        assert metrics['cache']['memory_hits'] == 1
+        assert metrics['errors'] == 0
+    finally:
+        server.close()
+        await server.wait_closed()
+        service.close()
+
+
+def test_render_round_trip(tmp_path):
+    asyncio.run(round_trip(tmp_path))
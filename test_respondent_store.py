@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pytest
+
+from character_scoring import ScoringEngine
+from respondent_store import HEADER_SIZE, RespondentStore
+from trait_catalog import QUESTIONS
+
+
+def random_answers(count, engine):
+    return np.random.default_rng(0).integers(1, 6, size=(count, engine.n_questions))
+
+
+def test_append_and_reopen(tmp_path):
+    store = RespondentStore(str(tmp_path))
+    answers = random_answers(20, store.engine)
+    assert store.append(answers) == range(0, 20)
+    store.close()
+
+    reopened = RespondentStore(str(tmp_path))
+    assert len(reopened) == 20
+    np.testing.assert_array_equal(reopened.answers, answers)
+    np.testing.assert_array_equal(reopened.scores, reopened.engine.raw_scores(answers))
+
+
+def test_partial_rows_are_truncated(tmp_path):
+    store = RespondentStore(str(tmp_path))
+    store.append(random_answers(5, store.engine))
+    # A crash after the answers were written but before the scores were
+    answers_path = os.path.join(str(tmp_path), 'answers.u8')
+    with open(answers_path, 'ab') as f:
+        f.write(bytes([3]) * (store.engine.n_questions + 2))
+
+    reopened = RespondentStore(str(tmp_path))
+    assert len(reopened) == 5
+    assert os.path.getsize(answers_path) == HEADER_SIZE + 5 * reopened.engine.n_questions
+    assert reopened.append(random_answers(1, reopened.engine)) == range(5, 6)
+
+
+def test_missing_column_is_refused(tmp_path):
+    store = RespondentStore(str(tmp_path))
+    store.append(random_answers(5, store.engine))
+    os.unlink(os.path.join(str(tmp_path), 'scores.u8'))
+    with pytest.raises(ValueError, match='partial respondent store'):
+        RespondentStore(str(tmp_path))
+    assert not os.path.exists(os.path.join(str(tmp_path), 'scores.u8'))
+
+
+def test_different_catalog_is_rejected(tmp_path):
+    RespondentStore(str(tmp_path)).append(random_answers(5, ScoringEngine()))
+    with pytest.raises(ValueError, match='different question/trait catalog'):
+        RespondentStore(str(tmp_path), ScoringEngine(questions=list(QUESTIONS)[::-1]))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from shape_geometry import SHAPES, shape_radius
+from shape_layout import PACKED_RADIUS, packed_layout, profile_layout
+
+
+def random_items(count, seed=0):
+    rng = np.random.default_rng(seed)
+    shapes = sorted(SHAPES)
+    intensities = np.sort(rng.uniform(0.31, 1.0, count))[::-1]
+    return [(shapes[rng.integers(len(shapes))], float(intensity), 'blue')
+            for intensity in intensities]
+
+
+def bounding_circles(layout):
+    centres = np.array([(x, y) for _, x, y, _, _, _ in layout])
+    radii = np.array([shape_radius(shape_type) * size
+                      for shape_type, _, _, _, _, size in layout])
+    return centres, radii
+
+
+@pytest.mark.parametrize('count', [1, 21, 150])
+def test_no_overlaps_inside_the_disc(count):
+    items = random_items(count)
+    layout = packed_layout(items)
+    assert [(t, i, c) for t, _, _, i, c, _ in layout] == items
+
+    centres, radii = bounding_circles(layout)
+    distance = np.hypot(*(centres[:, None] - centres[None]).transpose(2, 0, 1))
+    gaps = distance - (radii[:, None] + radii[None])
+    np.fill_diagonal(gaps, np.inf)
+    assert gaps.min() > 0
+    assert (np.hypot(*centres.T) + radii <= PACKED_RADIUS + 1e-9).all()
+
+
+def test_deterministic():
+    items = random_items(80)
+    assert packed_layout(items) == packed_layout(list(items))
+
+
+def test_profile_layout_packs_large_profiles():
+    trait_info = {f't{i}': {'shape': shape, 'color': 'red'}
+                  for i, shape in enumerate(sorted(SHAPES) * 3)}
+    sorted_traits = [(trait, 0.9 - 0.005 * i) for i, trait in enumerate(trait_info)]
+    layout = profile_layout(trait_info, sorted_traits)
+    assert len(layout) == len(trait_info)
+    assert layout == packed_layout([(trait_info[t]['shape'], s, 'red') for t, s in sorted_traits])
@@ -0,0 +1,33 @@
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from character_scoring import ScoringEngine
+from svg_writer import check_equivalence, profile_svg
+from trait_catalog import TRAIT_INFO
+
+
+def random_profiles(count):
+    engine = ScoringEngine()
+    batch = engine.score(np.random.default_rng(0).integers(1, 6, size=(count, engine.n_questions)))
+    return [batch.profile(row).sorted_traits for row in range(count)]
+
+
+def test_matches_matplotlib():
+    for sorted_traits in random_profiles(10):
+        assert check_equivalence(TRAIT_INFO, sorted_traits) == []
+
+
+def test_any_matplotlib_colour():
+    colors = ['C0', 'tab:blue', [0.2, 0.4, 0.6], '#123456aa', 'xkcd:sky blue']
+    trait_info = {trait: dict(info, color=colors[i % len(colors)])
+                  for i, (trait, info) in enumerate(TRAIT_INFO.items())}
+    for sorted_traits in random_profiles(3):
+        root = ET.fromstring(profile_svg(trait_info, sorted_traits))
+        for element in root.iter():
+            for attribute in ('fill', 'stroke'):
+                value = element.get(attribute)
+                assert value is None or value in ('none', 'gray') or re.fullmatch(
+                    r'#[0-9a-f]{6}', value), value
+        assert check_equivalence(trait_info, sorted_traits) == []
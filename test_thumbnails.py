@@ -0,0 +1,23 @@
+import numpy as np
+from matplotlib.colors import to_rgb
+
+from character_scoring import ScoringEngine
+from thumbnails import color_rgb, render_profile
+from trait_catalog import TRAIT_INFO
+
+
+def test_color_rgb_matches_matplotlib():
+    for color in ['#123456', '#abc', '#123456aa', 'C0', 'tab:blue', 'red',
+                  [0.2, 0.4, 0.6], (0.2, 0.4, 0.6, 0.5)]:
+        np.testing.assert_allclose(color_rgb(color), to_rgb(color), atol=1e-6)
+
+
+def test_list_colours_render():
+    colors = ['C0', [0.2, 0.4, 0.6], (0.9, 0.1, 0.1), '#123456']
+    trait_info = {trait: dict(info, color=colors[i % len(colors)])
+                  for i, (trait, info) in enumerate(TRAIT_INFO.items())}
+    engine = ScoringEngine()
+    batch = engine.score(np.random.default_rng(0).integers(1, 6, size=(3, engine.n_questions)))
+    for row in range(len(batch)):
+        pixels = render_profile(trait_info, batch.profile(row).sorted_traits, size=64)
+        assert pixels.shape == (64, 64, 4)
@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from trait_catalog import DEFAULT_CATALOG_PATH, compile_catalog, parse_catalog
+
+
+def default_document():
+    with open(DEFAULT_CATALOG_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_default_catalog_compiles():
+    trait_info, questions, max_score = parse_catalog(default_document())
+    catalog = compile_catalog(trait_info, questions, max_score)
+    assert catalog.traits == list(trait_info)
+    assert catalog.max_score == max_score
+
+
+@pytest.mark.parametrize('max_score', [0, -10, 10.5, '10', True])
+def test_rejects_bad_max_score(max_score):
+    document = dict(default_document(), max_score=max_score)
+    with pytest.raises(ValueError, match='max_score must be a positive integer'):
+        parse_catalog(document)
+
+
+@pytest.mark.parametrize('field, value', [('color', [0.1, 0.2, 0.3]), ('shape', None)])
+def test_rejects_non_string_shape_or_color(field, value):
+    document = default_document()
+    document['traits'][0][field] = value
+    with pytest.raises(ValueError, match=f'{field} must be a string'):
+        parse_catalog(document)
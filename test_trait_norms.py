@@ -0,0 +1,49 @@
+import numpy as np
+
+from trait_norms import TraitNorms
+
+TRAITS = ['a', 'b', 'c']
+MAX_RAW = 20
+
+
+def random_raw(count, seed=0):
+    return np.random.default_rng(seed).integers(0, MAX_RAW + 1, size=(count, len(TRAITS)))
+
+
+def test_merged_batches_match_one_batch():
+    raw = random_raw(500)
+    merged = TraitNorms(TRAITS, MAX_RAW)
+    for start in range(0, len(raw), 37):
+        merged.update(raw[start:start + 37])
+    merged.update(raw[:0])
+
+    assert merged.count == len(raw)
+    np.testing.assert_allclose(merged.mean, raw.mean(axis=0))
+    np.testing.assert_allclose(merged.variance, raw.var(axis=0, ddof=1))
+    assert (merged.histogram.sum(axis=1) == len(raw)).all()
+
+
+def test_percentiles_are_mid_rank():
+    norms = TraitNorms(TRAITS, MAX_RAW)
+    norms.update([[0, 5, 10], [10, 5, 10], [20, 5, 10], [20, 15, 0]])
+    # a: one below 10 and one at it; b: nobody below 5 and three at it;
+    # c: everyone below 20
+    np.testing.assert_allclose(norms.percentiles([10, 5, 20]), [[0.375, 0.375, 1.0]])
+
+
+def test_empty_norms():
+    norms = TraitNorms(TRAITS, MAX_RAW)
+    assert (norms.variance == 0).all()
+    assert (norms.percentiles([1, 2, 3]) == 0.5).all()
+
+
+def test_save_and_load(tmp_path):
+    norms = TraitNorms(TRAITS, MAX_RAW)
+    norms.update(random_raw(50))
+    path = str(tmp_path / 'norms.npz')
+    norms.save(path)
+
+    loaded = TraitNorms.load_or_create(path, TRAITS, MAX_RAW)
+    assert loaded.count == norms.count
+    np.testing.assert_array_equal(loaded.histogram, norms.histogram)
+    np.testing.assert_allclose(loaded.percentiles([3, 4, 5]), norms.percentiles([3, 4, 5]))
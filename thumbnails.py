@@ -0,0 +1,307 @@
+"""Pure-NumPy thumbnails of character profiles.
+
+Rasterizes the shape_geometry parts straight into a uint8 RGBA array and
+writes PNGs with zlib and struct, so dashboards can produce thousands of
+small profile images without a matplotlib figure per profile.
+
+Fills use scanline coverage: a few sub-scanlines per pixel row with exact
+horizontal coverage, even-odd rule. Strokes use the distance from each
+pixel centre to the stroke, which gives anti-aliased edges and round
+joins. Each fill, and each part's strokes together, are alpha-composited
+(source over) into the canvas.
+
+Thumbnails show the profile axes only (data -10..10); the title and
+subtitle text are left out.
+
+    python thumbnails.py responses.csv -o thumbs --size 128
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from shape_geometry import get_shape, place, shape_alpha
+from shape_layout import profile_layout
+from svg_writer import LINE_LINEWIDTH, PATCH_LINEWIDTH, POINTS_PER_UNIT, arrow_strokes
+
+DEFAULT_SIZE = 128
+DEFAULT_PNG_LEVEL = 6
+
+# Sub-scanlines per pixel row for fills
+SUBSAMPLES = 4
+# Vertices used for circles, ellipses and wedge arcs
+CURVE_POINTS = 64
+# Longest stroke piece, in pixels, measured in one distance window
+STROKE_PIECE = 4
+
+DATA_EXTENT = 10
+BACKGROUND = '#ffffff'
+AXES_COLOR = '#f0f0f0'
+AXES_ALPHA = 0.3
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+_colors = {}
+
+
+def color_rgb(color):
+    # Any matplotlib colour: '#rrggbb', names, 'C0', or [r, g, b(, a)] from
+    # a JSON catalog. Alpha is dropped, as the shapes' own alpha overrides
+    # it in matplotlib too.
+    key = tuple(color) if isinstance(color, (list, tuple)) else color
+    rgb = _colors.get(key)
+    if rgb is None:
+        if isinstance(key, str) and key.startswith('#') and len(key) == 7:
+            rgb = [int(key[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+        else:
+            # Everything else goes through matplotlib's parser; only the
+            # colors module is needed, never a figure
+            from matplotlib.colors import to_rgb
+            rgb = to_rgb(key)
+        rgb = _colors[key] = np.array(rgb, dtype=np.float32)
+    return rgb
+
+
+def part_outline(part, x, y, size):
+    # Closed data-space outline of a filled ShapePart
+    points, extent = place(part, x, y, size)
+    if part.kind == 'polygon':
+        return points
+    if part.kind == 'wedge':
+        theta = np.radians(np.linspace(part.angles[0], part.angles[1], CURVE_POINTS))
+        arc = points + extent[0] * np.column_stack([np.cos(theta), np.sin(theta)])
+        return np.vstack([points, arc])
+    t = np.linspace(0, 2 * np.pi, CURVE_POINTS, endpoint=False)
+    if part.kind == 'circle':
+        rx = ry = extent[0]
+    elif part.kind == 'ellipse':
+        rx, ry = extent[0] / 2, extent[1] / 2
+    else:
+        raise ValueError(f"Unknown filled shape part kind: {part.kind}")
+    return points + np.column_stack([rx * np.cos(t), ry * np.sin(t)])
+
+
+def _sparse(coverage, x0, y0, width):
+    rows, cols = np.nonzero(coverage)
+    return (y0 + rows) * width + x0 + cols, coverage[rows, cols]
+
+
+def polygon_coverage(points, width, height, subsamples=SUBSAMPLES):
+    # Returns (flat pixel indices, coverage) of the pixels the polygon
+    # touches, or None when it is off the canvas
+    x0 = max(int(np.floor(points[:, 0].min())), 0)
+    x1 = min(int(np.ceil(points[:, 0].max())), width)
+    y0 = max(int(np.floor(points[:, 1].min())), 0)
+    y1 = min(int(np.ceil(points[:, 1].max())), height)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    w = x1 - x0
+
+    # Crossing of every sub-scanline with every edge, half-open in y so a
+    # vertex on a scanline is counted once
+    start, end = points, np.roll(points, -1, axis=0)
+    ys = y0 + (np.arange((y1 - y0) * subsamples) + 0.5) / subsamples
+    low = np.minimum(start[:, 1], end[:, 1])
+    high = np.maximum(start[:, 1], end[:, 1])
+    crosses = (ys[:, None] >= low) & (ys[:, None] < high)
+    dy = end[:, 1] - start[:, 1]
+    t = (ys[:, None] - start[:, 1]) / np.where(dy == 0, 1, dy)
+    xs = np.where(crosses, start[:, 0] + t * (end[:, 0] - start[:, 0]), np.inf)
+    xs.sort(axis=1)
+    xs = np.clip(xs[:, :crosses.sum(axis=1).max()] - x0, 0, w)
+
+    # Span [a, b) adds 1 - frac(a) to pixel floor(a) and 1 to every pixel
+    # after it, and the same negated at b: coverage = direct + cumsum(step)
+    signs = np.where(np.arange(xs.shape[1]) % 2, -1.0, 1.0)
+    cells = np.floor(xs).astype(np.intp)
+    rows = np.arange(len(ys))[:, None] * (w + 2)
+    direct = np.bincount((rows + cells).ravel(), (signs * (1 - (xs - cells))).ravel(),
+                         minlength=len(ys) * (w + 2))
+    step = np.bincount((rows + cells + 1).ravel(), np.broadcast_to(signs, xs.shape).ravel(),
+                       minlength=len(ys) * (w + 2))
+    coverage = (direct.reshape(len(ys), w + 2) +
+                np.cumsum(step.reshape(len(ys), w + 2), axis=1))[:, :w]
+    coverage = np.clip(coverage.reshape(y1 - y0, subsamples, w).mean(axis=1), 0, 1)
+    return _sparse(coverage, x0, y0, width)
+
+
+def stroke_coverage(strokes, linewidth, width, height, closed=False):
+    # strokes is a sequence of point arrays sharing one style; overlaps
+    # between them are covered once. Strokes thinner than a pixel are
+    # drawn one pixel wide and fainter. Segments are cut into pieces of at
+    # most STROKE_PIECE pixels and each piece only measures distances in a
+    # small window around itself.
+    if closed:
+        strokes = [np.vstack([points, points[:1]]) for points in strokes]
+    strokes = [points for points in strokes if len(points) > 1]
+    if not strokes:
+        return None
+    half = max(linewidth, 1) / 2
+    starts = np.concatenate([points[:-1] for points in strokes])
+    segments = np.concatenate([np.diff(points, axis=0) for points in strokes])
+    pieces = np.maximum(np.ceil(np.hypot(*segments.T) / STROKE_PIECE), 1).astype(np.intp)
+    owner = np.repeat(np.arange(len(segments)), pieces)
+    step = np.arange(len(owner)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    origin = starts[owner] + segments[owner] * (step / pieces[owner])[:, None]
+    delta = segments[owner] / pieces[owner][:, None]
+
+    reach = half + 1
+    k = int(np.ceil(STROKE_PIECE + 2 * reach)) + 1
+    corner = np.floor(np.minimum(origin, origin + delta) - reach).astype(np.intp)
+    px = corner[:, 0, None, None] + np.arange(k)[None, None, :]
+    py = corner[:, 1, None, None] + np.arange(k)[None, :, None]
+    rel_x = px + 0.5 - origin[:, 0, None, None]
+    rel_y = py + 0.5 - origin[:, 1, None, None]
+    dx, dy = delta[:, 0, None, None], delta[:, 1, None, None]
+    t = np.clip((rel_x * dx + rel_y * dy) / np.maximum(dx * dx + dy * dy, 1e-12), 0, 1)
+    coverage = np.clip(half + 0.5 - np.hypot(rel_x - t * dx, rel_y - t * dy), 0, 1)
+
+    keep = (coverage > 0) & (px >= 0) & (px < width) & (py >= 0) & (py < height)
+    if not keep.any():
+        return None
+    index = (py * width + px)[keep]
+    values = coverage[keep] * min(linewidth, 1)
+    # Windows overlap; a pixel takes its best coverage, not the sum
+    order = np.argsort(index, kind='stable')
+    index, values = index[order], values[order]
+    index, first = np.unique(index, return_index=True)
+    return index, np.maximum.reduceat(values, first)
+
+
+class Canvas:
+    def __init__(self, width, height, background=BACKGROUND):
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 4), dtype=np.uint8)
+        if background is not None:
+            self.pixels[..., :3] = np.round(color_rgb(background) * 255)
+            self.pixels[..., 3] = 255
+
+    def composite(self, coverage, color, alpha):
+        # Source-over with straight (non-premultiplied) alpha, touching only
+        # the covered pixels
+        if coverage is None:
+            return
+        index, values = coverage
+        flat = self.pixels.reshape(-1, 4)
+        dst = flat[index].astype(np.float32) / 255
+        src_alpha = np.asarray(values * alpha, dtype=np.float32)[..., None]
+        dst_weight = dst[:, 3:] * (1 - src_alpha)
+        out_alpha = src_alpha + dst_weight
+        rgb = ((color_rgb(color) * src_alpha + dst[:, :3] * dst_weight) /
+               np.maximum(out_alpha, 1e-6))
+        flat[index, :3] = np.round(rgb * 255)
+        flat[index, 3:] = np.round(out_alpha * 255)
+
+    def paint(self, color, alpha):
+        # A uniform layer over the whole canvas
+        self.composite((slice(None), np.float32(1)), color, alpha)
+
+    def fill(self, points, color, alpha):
+        self.composite(polygon_coverage(points, self.width, self.height), color, alpha)
+
+    def stroke(self, strokes, linewidth, color, alpha, closed=False):
+        self.composite(stroke_coverage(strokes, linewidth, self.width, self.height, closed),
+                       color, alpha)
+
+
+def render_profile(trait_info, sorted_traits, size=DEFAULT_SIZE, background=BACKGROUND):
+    # Returns a size x size x 4 uint8 RGBA thumbnail
+    canvas = Canvas(size, size, background)
+    scale = size / (2 * DATA_EXTENT)
+    pixels_per_point = scale / POINTS_PER_UNIT
+
+    def to_pixels(points):
+        return (points * (1, -1) + DATA_EXTENT) * scale
+
+    # The axes background rectangle covers the whole thumbnail
+    canvas.paint(AXES_COLOR, AXES_ALPHA)
+
+    lines = []
+    for shape_type, x, y, intensity, color, part_size in profile_layout(trait_info,
+                                                                        sorted_traits):
+        alpha = shape_alpha(intensity)
+        parts, color_override = get_shape(shape_type)
+        for part in parts:
+            part_color = part.color or color_override or color
+            part_alpha = part.alpha if part.alpha is not None else alpha
+            if part.kind == 'polyline':
+                # Lines go above every patch, as in matplotlib
+                points, _ = place(part, x, y, part_size)
+                width = (part.linewidth or LINE_LINEWIDTH) * pixels_per_point
+                lines.append((to_pixels(points), width, part_color, part_alpha))
+            elif part.kind == 'arrow':
+                points, extent = place(part, x, y, part_size)
+                linewidth = part.linewidth or PATCH_LINEWIDTH
+                strokes = arrow_strokes(points[0], points[1], extent[0], linewidth)
+                canvas.stroke([to_pixels(stroke) for stroke in strokes],
+                              linewidth * pixels_per_point, part_color, part_alpha)
+            else:
+                outline = to_pixels(part_outline(part, x, y, part_size))
+                canvas.fill(outline, part_color, part_alpha)
+                canvas.stroke([outline], (part.linewidth or PATCH_LINEWIDTH) * pixels_per_point,
+                              part.edgecolor or part_color, part_alpha, closed=True)
+
+    for strokes, width, color, alpha in lines:
+        canvas.stroke(strokes, width, color, alpha)
+    return canvas.pixels
+
+
+def encode_png(pixels, level=DEFAULT_PNG_LEVEL):
+    # 8-bit RGBA PNG. Every row uses the 'Up' filter (difference from the
+    # row above), which turns the flat fills into long runs of zeros.
+    height, width, _ = pixels.shape
+    rows = pixels.reshape(height, width * 4)
+    raw = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 0] = 2
+    raw[:, 1:] = rows
+    raw[1:, 1:] -= rows[:-1]
+
+    def chunk(tag, data):
+        return (struct.pack('>I', len(data)) + tag + data +
+                struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (PNG_SIGNATURE + chunk(b'IHDR', header) +
+            chunk(b'IDAT', zlib.compress(raw.tobytes(), level)) + chunk(b'IEND', b''))
+
+
+def write_png(path, pixels, level=DEFAULT_PNG_LEVEL):
+    with open(path, 'wb') as f:
+        f.write(encode_png(pixels, level))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render profile thumbnails without matplotlib")
+    parser.add_argument('responses', help="N x Q answer matrix as .csv or .npy")
+    parser.add_argument('-o', '--output-dir', default='thumbnails')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help="Edge length in pixels")
+    parser.add_argument('--level', type=int, default=DEFAULT_PNG_LEVEL,
+                        help="zlib compression level, 0-9")
+    parser.add_argument('--name-template', default='character_{index:05d}.png')
+    args = parser.parse_args(argv)
+
+    from character_scoring import ScoringEngine, load_response_matrix
+    from trait_catalog import TRAIT_INFO
+    try:
+        batch = ScoringEngine().score(load_response_matrix(args.responses))
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    start = time.perf_counter()
+    for row in range(len(batch)):
+        pixels = render_profile(TRAIT_INFO, batch.profile(row).sorted_traits, args.size)
+        write_png(os.path.join(args.output_dir, args.name_template.format(index=row)),
+                  pixels, args.level)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(batch)} {args.size}px thumbnails in {elapsed:.2f} s "
+          f"({len(batch) / elapsed if elapsed else 0:.1f} images/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
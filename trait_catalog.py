@@ -0,0 +1,214 @@
+"""Traits, their shapes and the survey questions, loaded from a catalog file.
+
+The catalog is JSON (catalogs/default.json unless CHARVIZ_CATALOG names
+another file):
+
+    {"version": 1, "max_score": 10,
+     "traits": [{"id": "compassionate", "shape": "circle", "color": "blue",
+                 "description": "...", "rationale": "..."}, ...],
+     "questions": [{"text": "...", "trait": "compassionate"}, ...]}
+
+TRAIT_INFO and QUESTIONS are the dict and (text, trait) forms the Tk app
+and renderers use. They are parsed with the standard library only, so the
+app still starts without NumPy. compile_catalog() turns a catalog into
+integer trait ids and NumPy arrays for scoring. load_compiled() caches
+that form as .npz, keyed by the catalog file's content, so large catalogs
+load without parsing JSON or resolving colours again.
+
+    python trait_catalog.py catalogs/default.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from cache_paths import cache_dir
+
+CATALOG_FORMAT_VERSION = 1
+
+# Bump when the compiled arrays change meaning
+COMPILED_CATALOG_VERSION = 1
+
+DEFAULT_CATALOG_PATH = os.environ.get('CHARVIZ_CATALOG') or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'catalogs', 'default.json')
+
+
+def parse_catalog(document, source='catalog'):
+    # Returns (trait_info, questions, max_score) from a decoded catalog
+    if document.get('version') != CATALOG_FORMAT_VERSION:
+        raise ValueError(f"{source}: unsupported catalog version {document.get('version')!r}")
+    trait_info = {}
+    for trait in document['traits']:
+        info = dict(trait)
+        trait_id = info.pop('id')
+        if trait_id in trait_info:
+            raise ValueError(f"{source}: trait {trait_id!r} is defined twice")
+        if 'shape' not in info or 'color' not in info:
+            raise ValueError(f"{source}: trait {trait_id!r} needs a shape and a color")
+        # Compiled catalogs store shapes and colours as strings, so an
+        # [r, g, b] colour has to be written as '#rrggbb'
+        for field in ('shape', 'color'):
+            if not isinstance(info[field], str):
+                raise ValueError(f"{source}: trait {trait_id!r} {field} must be a string, "
+                                 f"not {info[field]!r}")
+        trait_info[trait_id] = info
+    questions = []
+    for question in document['questions']:
+        if question['trait'] not in trait_info:
+            raise ValueError(f"{source}: question {question['text']!r} refers to unknown trait "
+                             f"{question['trait']!r}")
+        questions.append((question['text'], question['trait']))
+    max_score = document['max_score']
+    if isinstance(max_score, bool) or not isinstance(max_score, int) or max_score <= 0:
+        # Normalized scores divide by it
+        raise ValueError(f"{source}: max_score must be a positive integer, not {max_score!r}")
+    return trait_info, questions, max_score
+
+
+def read_catalog(path=DEFAULT_CATALOG_PATH):
+    with open(path, encoding='utf-8') as f:
+        return parse_catalog(json.load(f), path)
+
+
+class CompiledCatalog:
+    # Integer-indexed form of a catalog. Traits are numbered in catalog
+    # order; shapes and colours by first appearance.
+    def __init__(self, traits, shapes, trait_shape, colors, trait_color, question_text,
+                 item_trait, max_score, trait_rgba=None):
+        import numpy as np
+
+        self.traits = list(traits)
+        self.trait_index = {trait: i for i, trait in enumerate(self.traits)}
+        self.shapes = list(shapes)
+        self.trait_shape = np.asarray(trait_shape, dtype=np.int32)
+        self.colors = list(colors)
+        self.trait_color = np.asarray(trait_color, dtype=np.int32)
+        self.question_text = list(question_text)
+        self.item_trait = np.asarray(item_trait, dtype=np.int32)
+        self.max_score = int(max_score)
+        self._trait_rgba = trait_rgba
+
+        # Items grouped by trait, for summing answers run by run
+        self.item_counts = np.bincount(self.item_trait, minlength=len(self.traits))
+        self.item_order = np.argsort(self.item_trait, kind='stable')
+        self.run_traits = np.flatnonzero(self.item_counts)
+        self.run_starts = np.concatenate(([0], np.cumsum(self.item_counts[self.run_traits])[:-1]))
+
+    @property
+    def questions(self):
+        return [(text, self.traits[j]) for text, j in zip(self.question_text, self.item_trait)]
+
+    @property
+    def trait_rgba(self):
+        # T x 4 float RGBA; resolving colour names needs matplotlib, so it is
+        # done on first use and then kept in the compiled cache
+        if self._trait_rgba is None:
+            from matplotlib.colors import to_rgba_array
+            self._trait_rgba = to_rgba_array(self.colors)[self.trait_color]
+        return self._trait_rgba
+
+    def arrays(self):
+        import numpy as np
+        return {
+            'version': np.array(COMPILED_CATALOG_VERSION),
+            'traits': np.array(self.traits, dtype=str),
+            'shapes': np.array(self.shapes, dtype=str),
+            'trait_shape': self.trait_shape,
+            'colors': np.array(self.colors, dtype=str),
+            'trait_color': self.trait_color,
+            'trait_rgba': self.trait_rgba,
+            'question_text': np.array(self.question_text, dtype=str),
+            'item_trait': self.item_trait,
+            'max_score': np.array(self.max_score),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        if int(arrays['version']) != COMPILED_CATALOG_VERSION:
+            raise ValueError(f"Unsupported compiled catalog version {int(arrays['version'])}")
+        return cls(arrays['traits'].tolist(), arrays['shapes'].tolist(), arrays['trait_shape'],
+                   arrays['colors'].tolist(), arrays['trait_color'],
+                   arrays['question_text'].tolist(), arrays['item_trait'],
+                   int(arrays['max_score']), arrays['trait_rgba'])
+
+
+def compile_catalog(trait_info, questions, max_score):
+    shapes, colors = {}, {}
+    trait_shape = [shapes.setdefault(info['shape'], len(shapes)) for info in trait_info.values()]
+    trait_color = [colors.setdefault(info['color'], len(colors)) for info in trait_info.values()]
+    trait_index = {trait: i for i, trait in enumerate(trait_info)}
+    return CompiledCatalog(list(trait_info), list(shapes), trait_shape, list(colors), trait_color,
+                           [text for text, _ in questions],
+                           [trait_index[trait] for _, trait in questions], max_score)
+
+
+def load_compiled(path=DEFAULT_CATALOG_PATH, cache_directory=None):
+    # Compiled catalog for a catalog file, from the .npz cache when the
+    # file's content has been compiled before
+    import numpy as np
+
+    with open(path, 'rb') as f:
+        content = f.read()
+    key = hashlib.sha256(content + f'\0{COMPILED_CATALOG_VERSION}'.encode()).hexdigest()
+    directory = cache_directory or cache_dir('catalog')
+    cached = os.path.join(directory, f'catalog-{key}.npz')
+    try:
+        with np.load(cached, allow_pickle=False) as arrays:
+            return CompiledCatalog.from_arrays(arrays)
+    except (OSError, ValueError, KeyError):
+        pass
+
+    catalog = compile_catalog(*parse_catalog(json.loads(content), path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **catalog.arrays())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, cached)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return catalog
+
+
+TRAIT_INFO, QUESTIONS, MAX_SCORE = read_catalog()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check and compile a trait catalog")
+    parser.add_argument('catalog', nargs='?', default=DEFAULT_CATALOG_PATH)
+    parser.add_argument('--cache-dir', help="Compiled catalog cache (default: user cache)")
+    args = parser.parse_args(argv)
+
+    import numpy  # noqa: F401  (kept out of the load timings)
+
+    try:
+        start = time.perf_counter()
+        read_catalog(args.catalog)
+        parsed = time.perf_counter() - start
+        start = time.perf_counter()
+        catalog = load_compiled(args.catalog, args.cache_dir)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        load_compiled(args.catalog, args.cache_dir)
+        cached = time.perf_counter() - start
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"{args.catalog}: {e}")
+
+    print(f"{len(catalog.traits)} traits, {len(catalog.question_text)} questions, "
+          f"{len(catalog.shapes)} shapes, {len(catalog.colors)} colors, "
+          f"max_score {catalog.max_score}")
+    unasked = [catalog.traits[j] for j in range(len(catalog.traits))
+               if catalog.item_counts[j] == 0]
+    if unasked:
+        print(f"  {len(unasked)} traits have no questions and always score 0", file=sys.stderr)
+    print(f"  JSON parse {parsed * 1000:.1f} ms, load_compiled {first * 1000:.1f} ms "
+          f"then {cached * 1000:.1f} ms from the cache")
+
+
+if __name__ == "__main__":
+    main()
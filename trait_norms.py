@@ -0,0 +1,99 @@
+"""Online population norms for trait scores.
+
+Keeps, per trait, a running mean and variance (Welford, merged a batch at
+a time with Chan's formula) and a count histogram over the possible raw
+scores. Raw trait scores are small integers (0..MAX_SCORE), so the
+histogram is an exact quantile sketch: a few hundred integers for the whole
+population, updated in O(1) per profile and never rescanned.
+
+Profiles can then be reported as percentiles against everyone scored so
+far instead of against the fixed max_score.
+"""
+import os
+
+import numpy as np
+
+from character_scoring import MAX_SCORE
+
+NORMS_FORMAT_VERSION = 1
+
+
+class TraitNorms:
+    def __init__(self, traits, max_raw=MAX_SCORE):
+        self.traits = list(traits)
+        self.max_raw = max_raw
+        self.count = 0
+        self.mean = np.zeros(len(self.traits))
+        self.m2 = np.zeros(len(self.traits))
+        # histogram[t, s] = respondents whose raw score on trait t is s
+        self.histogram = np.zeros((len(self.traits), max_raw + 1), dtype=np.int64)
+
+    def update(self, raw):
+        raw = np.atleast_2d(np.asarray(raw))
+        if raw.shape[1] != len(self.traits):
+            raise ValueError(f"Expected {len(self.traits)} trait scores per row, got {raw.shape[1]}")
+        if raw.size and (raw.min() < 0 or raw.max() > self.max_raw):
+            raise ValueError(f"Raw scores must be between 0 and {self.max_raw}")
+        n = raw.shape[0]
+        if n == 0:
+            return
+
+        # Chan et al. parallel update of mean and sum of squared deviations
+        batch_mean = raw.mean(axis=0)
+        batch_m2 = ((raw - batch_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+        trait_index = np.broadcast_to(np.arange(len(self.traits)), raw.shape)
+        np.add.at(self.histogram, (trait_index, raw.astype(np.intp)), 1)
+
+    @property
+    def variance(self):
+        if self.count < 2:
+            return np.zeros(len(self.traits))
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def percentiles(self, raw):
+        # Mid-rank percentile in [0, 1]: the share of the population scoring
+        # below, plus half of those with the same score
+        raw = np.atleast_2d(np.asarray(raw)).astype(np.intp)
+        if self.count == 0:
+            return np.full(raw.shape, 0.5)
+        below = np.cumsum(self.histogram, axis=1) - self.histogram
+        rows = np.arange(len(self.traits))
+        return (below[rows, raw] + 0.5 * self.histogram[rows, raw]) / self.count
+
+    def save(self, path):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, version=NORMS_FORMAT_VERSION, traits=np.array(self.traits),
+                 max_raw=self.max_raw, count=self.count, mean=self.mean, m2=self.m2,
+                 histogram=self.histogram)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['version']) != NORMS_FORMAT_VERSION:
+                raise ValueError(f"Unsupported norms file version {int(data['version'])}")
+            norms = cls(data['traits'].tolist(), int(data['max_raw']))
+            norms.count = int(data['count'])
+            norms.mean = data['mean']
+            norms.m2 = data['m2']
+            norms.histogram = data['histogram']
+        return norms
+
+    @classmethod
+    def load_or_create(cls, path, traits, max_raw=MAX_SCORE):
+        if os.path.exists(path):
+            norms = cls.load(path)
+            if norms.traits != list(traits) or norms.max_raw != max_raw:
+                raise ValueError(f"Norms in {path} were built for a different trait catalog")
+            return norms
+        return cls(traits, max_raw)